@@ -2,163 +2,274 @@
 Nurova 2.0 — Flask Backend API
 Endpoints:
   POST /predict_distraction
+  POST /predict_distraction/batch
+  POST /predict_distraction/stream   (NDJSON)
   POST /get_personality
+  POST /get_personality/batch        (feature rows and/or stored user ids)
   GET  /recommend_content
   POST /log_session
+  POST /log_session/bulk             (NDJSON or JSON array)
+  GET  /analytics?days=7
+  GET  /risk_trend?user_id=...
   GET  /health
   GET  /metrics
+  GET  /metrics/prometheus
+Responses are JSON, or MessagePack with Accept: application/msgpack, and are
+gzip / brotli compressed above NUROVA_COMPRESS_MIN_BYTES (response_encoding.py).
 
 Run locally:  python app.py
-Deploy:       gunicorn app:app --bind 0.0.0.0:$PORT
+Deploy:       gunicorn app:app -c gunicorn.conf.py
 """
 
 import os
 import json
+import math
+import time
+import queue
+import codecs
 import sqlite3
-import joblib
-import numpy as np
-from datetime import datetime, timedelta
-from flask import Flask, request, jsonify
+import threading
+from datetime import datetime, timedelta, timezone
+from flask import Flask, request, jsonify, stream_with_context, g, has_request_context
 from flask_cors import CORS
 from dotenv import load_dotenv
 
+from model_registry import ModelRegistry
+from session_store import (
+    TREND_HALF_LIFE_HOURS, TREND_SESSIONS, SessionStore, query_daily_analytics, query_user_means, query_user_stats,
+    query_user_trend,
+)
+from youtube_client import SearchCache, YouTubeSearchBackend
+from response_cache import ResponseCache, etag_for
+from response_encoding import MIMETYPES, NegotiatingJSONProvider, compress_response, decode, encode, negotiate
+from instrumentation import metrics as runtime_metrics
+from personality import DEFAULT_CLUSTER, label_vectors, personality_result
+
 load_dotenv()
 
 app = Flask(__name__)
+# JSON via orjson, MessagePack for clients that ask for it; see response_encoding.py
+app.json = NegotiatingJSONProvider(app)
 CORS(app)
 
-DB_PATH = "nurova.db"
-MODELS_DIR = "models"
+DB_PATH = os.getenv("NUROVA_DB_PATH", "nurova.db")
+MODELS_DIR = os.getenv("NUROVA_MODELS_DIR", "models")
 YOUTUBE_API_KEY = os.getenv("YOUTUBE_API_KEY", "YOUR_YOUTUBE_API_KEY_HERE")
 
+# Hard latency budget for the upstream search inside /recommend_content;
+# past it the request is answered from CONTENT_CATALOG
+YOUTUBE_BUDGET_MS = float(os.getenv("YOUTUBE_BUDGET_MS", "300"))
+
+youtube = SearchCache(YouTubeSearchBackend(YOUTUBE_API_KEY))
+
+# Memoized results of the deterministic endpoints, keyed on model version +
+# normalized inputs; see response_cache.py
+response_cache = ResponseCache()
+
+# Client cache lifetime for /recommend_content; after it, clients revalidate with If-None-Match
+RECOMMEND_MAX_AGE = int(os.getenv("RECOMMEND_MAX_AGE", "60"))
+
 # ─────────────────────────────────────────────
-# Load Models (lazy load at startup)
+# Load Models (lazy on first use, or preloaded in the gunicorn master)
 # ─────────────────────────────────────────────
+# Model arrays are memory-mapped read-only, so workers forked from a
+# preloading master (and workers loading on their own) share one copy of
+# the pages through the OS page cache instead of each holding a private one.
+# Publishing a new version (model_registry.py publish / activate) is picked
+# up by every worker without a restart; see model_registry.py.
+
+_startup = {"preloaded": False}
+
+
+def _smoke_test(bundle):
+    """Dummy prediction through both models; raises if a bundle can't serve"""
+    import numpy as np
+
+    engine = bundle.engine
+    X = np.array([_distraction_row({}, engine.features)])
+    risk = engine.predict_risk(X)
+    if risk.shape != (1,) or not 0.0 <= float(risk[0]) <= 1.0:
+        raise ValueError(f"distraction engine smoke prediction out of range: {risk!r}")
+    if bundle.scorer is not engine:
+        bound = bundle.scorer.meta["error"]["max_error_bound"]
+        if abs(float(bundle.scorer.predict_risk(X)[0]) - float(risk[0])) > bound:
+            raise ValueError("risk table disagrees with the distraction engine")
 
-_distraction_model = None
-_cluster_model = None
+    cluster_pkg = bundle.cluster_model
+    X = np.zeros((1, len(cluster_pkg["features"])))
+    cluster_id = int(cluster_pkg["model"].predict(cluster_pkg["scaler"].transform(X))[0])
+    if cluster_id not in cluster_pkg["cluster_name_map"]:
+        raise ValueError(f"cluster model predicted unknown cluster {cluster_id}")
+    if int(bundle.cluster_engine.predict(X)[0]) != cluster_id:
+        raise ValueError("cluster engine disagrees with the cluster model")
+
+
+def _on_model_reload(version, ok, seconds):
+    runtime_metrics.inc("nurova_model_reloads_total", result="success" if ok else "failed")
+    runtime_metrics.observe("nurova_stage_duration_seconds", seconds, stage="model_reload")
+    runtime_metrics.flush(force=True)
+
+
+models = ModelRegistry(MODELS_DIR, smoke_test=_smoke_test, on_reload=_on_model_reload)
+
+
+def _models():
+    """The bundle pinned to the current request, so a swap mid-request can't mix versions"""
+    if has_request_context():
+        if "models" not in g:
+            g.models = models.current()
+        return g.models
+    return models.current()
 
 def get_distraction_model():
-    global _distraction_model
-    if _distraction_model is None:
-        path = os.path.join(MODELS_DIR, "distraction_model.pkl")
-        if os.path.exists(path):
-            _distraction_model = joblib.load(path)
-        else:
-            raise FileNotFoundError("distraction_model.pkl not found. Run train_models.py first.")
-    return _distraction_model
+    return _models().distraction_model()
+
+def get_distraction_engine():
+    """Array-backed scorer; compiled from the pkl if no exported engine exists"""
+    return _models().engine
+
+def get_risk_scorer():
+    """What /predict_distraction scores with: the risk lookup table when
+    NUROVA_RISK_TABLE=1 and the version has a usable one, else the engine"""
+    return _models().scorer
 
 def get_cluster_model():
-    global _cluster_model
-    if _cluster_model is None:
-        path = os.path.join(MODELS_DIR, "cluster_model.pkl")
-        if os.path.exists(path):
-            _cluster_model = joblib.load(path)
-        else:
-            raise FileNotFoundError("cluster_model.pkl not found. Run train_models.py first.")
-    return _cluster_model
+    return _models().cluster_model
+
+def get_cluster_engine():
+    """Nearest-centroid evaluator for the cluster model (scaler folded into the centroids)"""
+    return _models().cluster_engine
+
+
+def preload_models():
+    """Load and smoke-test the active model version, and warm everything else
+    that is built lazily (schema, catalog index).
+
+    Called from gunicorn's when_ready hook (see gunicorn.conf.py) so the
+    master pays the load once before forking, and from `python app.py`.
+    """
+    init_db()
+    get_catalog_index()
+    bundle = models.current()
+    _startup.update({
+        "preloaded": True,
+        "preload_pid": os.getpid(),
+        "model_version": bundle.version,
+        "load_ms": bundle.load_ms,
+        "warmup_ms": bundle.validate_ms,
+    })
+    return _startup
+
+
+def _memory_report():
+    """RSS of this worker; on Linux also PSS and private pages, which show how
+    much of the RSS is really shared with the master and sibling workers"""
+    report = {"pid": os.getpid()}
+    try:
+        for fname, keys in (("/proc/self/status", ("VmRSS", "RssAnon", "RssFile")),
+                            ("/proc/self/smaps_rollup", ("Pss", "Private_Dirty"))):
+            if not os.path.exists(fname):
+                continue
+            with open(fname) as f:
+                for line in f:
+                    key, _, rest = line.partition(":")
+                    if key in keys:
+                        report[key.lower() + "_mb"] = round(int(rest.split()[0]) / 1024, 1)
+    except OSError:
+        import resource
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report["maxrss_mb"] = round(peak / 1024, 1)
+    return report
 
 
 # ─────────────────────────────────────────────
 # Database Setup
 # ─────────────────────────────────────────────
 
+store = SessionStore(
+    DB_PATH,
+    on_commit=lambda seconds, rows: runtime_metrics.observe(
+        "nurova_stage_duration_seconds", seconds, stage="sqlite_batch_commit"),
+)
+
+
 def init_db():
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        CREATE TABLE IF NOT EXISTS sessions (
-            id INTEGER PRIMARY KEY AUTOINCREMENT,
-            screen_time REAL,
-            productive_mins INTEGER,
-            apps_used TEXT,
-            risk_prob REAL,
-            personality_cluster TEXT,
-            created_at TEXT
-        )
-    """)
-    conn.commit()
-    conn.close()
-
-
-init_db()
+    """Create / migrate the schema now. Otherwise the store does it on first
+    use, so importing the app (CLI tools, a worker answering /health) never
+    touches the database."""
+    store.init_schema()
+
+
+_catalog = {}
+_catalog_lock = threading.Lock()
+
+
+def get_catalog_index():
+    """CatalogIndex over the built-in catalog, built once on first use (or in preload_models)"""
+    index = _catalog.get("index")
+    if index is None:
+        with _catalog_lock:
+            index = _catalog.get("index")
+            if index is None:
+                from recommender import CONTENT_CATALOG, CatalogIndex
+                index = _catalog["index"] = CatalogIndex(CONTENT_CATALOG)
+    return index
 
 
 # ─────────────────────────────────────────────
-# Content Scoring Algorithm
+# Instrumentation
 # ─────────────────────────────────────────────
 
-CONTENT_CATALOG = [
-    {"title": "5 LeetCode Patterns You MUST Know", "url": "https://youtu.be/0K_eZGS5NsU",
-     "thumbnail": "https://img.youtube.com/vi/0K_eZGS5NsU/hqdefault.jpg",
-     "channel": "NeetCode", "duration": "11 min", "category": "DSA",
-     "views": 450000, "duration_mins": 11, "goal_relevance": 0.95, "user_interest": 0.88},
-    {"title": "System Design Interview — Step by Step Guide", "url": "https://youtu.be/bUHFg8CZFws",
-     "thumbnail": "https://img.youtube.com/vi/bUHFg8CZFws/hqdefault.jpg",
-     "channel": "Gaurav Sen", "duration": "14 min", "category": "System Design",
-     "views": 1200000, "duration_mins": 14, "goal_relevance": 0.92, "user_interest": 0.85},
-    {"title": "Python DSA Crash Course", "url": "https://youtu.be/pkYVOmU3MgA",
-     "thumbnail": "https://img.youtube.com/vi/pkYVOmU3MgA/hqdefault.jpg",
-     "channel": "Tech With Tim", "duration": "10 min", "category": "DSA",
-     "views": 320000, "duration_mins": 10, "goal_relevance": 0.90, "user_interest": 0.82},
-    {"title": "ML Pipeline End-to-End in 15 min", "url": "https://youtu.be/7eh4d6sabA0",
-     "thumbnail": "https://img.youtube.com/vi/7eh4d6sabA0/hqdefault.jpg",
-     "channel": "Sentdex", "duration": "13 min", "category": "ML/AI",
-     "views": 280000, "duration_mins": 13, "goal_relevance": 0.87, "user_interest": 0.80},
-    {"title": "How to Deep Work — Cal Newport Method", "url": "https://youtu.be/ZD7dXfdDPfg",
-     "thumbnail": "https://img.youtube.com/vi/ZD7dXfdDPfg/hqdefault.jpg",
-     "channel": "Thomas Frank", "duration": "9 min", "category": "Productivity",
-     "views": 850000, "duration_mins": 9, "goal_relevance": 0.78, "user_interest": 0.75},
-    {"title": "Focus Music — Deep Work Session 🎵", "url": "https://youtu.be/jfKfPfyJRdk",
-     "thumbnail": "https://img.youtube.com/vi/jfKfPfyJRdk/hqdefault.jpg",
-     "channel": "Lofi Girl", "duration": "57 min", "category": "Mindfulness",
-     "views": 5000000, "duration_mins": 57, "goal_relevance": 0.60, "user_interest": 0.90},
-    {"title": "Pomodoro Technique — Explained Properly", "url": "https://youtu.be/VFW3Ld7JO0w",
-     "thumbnail": "https://img.youtube.com/vi/VFW3Ld7JO0w/hqdefault.jpg",
-     "channel": "Thomas Frank", "duration": "7 min", "category": "Productivity",
-     "views": 1100000, "duration_mins": 7, "goal_relevance": 0.75, "user_interest": 0.72},
-    {"title": "REST API Design — Best Practices", "url": "https://youtu.be/7nm1pYuKAhY",
-     "thumbnail": "https://img.youtube.com/vi/7nm1pYuKAhY/hqdefault.jpg",
-     "channel": "Fireship", "duration": "11 min", "category": "Web Dev",
-     "views": 680000, "duration_mins": 11, "goal_relevance": 0.88, "user_interest": 0.85},
-]
-
-CLUSTER_BOOSTS = {
-    "NightScrollAddict": {"Mindfulness": 0.15, "Productivity": 0.10},
-    "StressScroller": {"Mindfulness": 0.20, "Productivity": 0.10},
-    "ProcrastinationBinger": {"DSA": 0.10, "System Design": 0.10, "Productivity": 0.05},
-    "ProductiveSprinter": {"ML/AI": 0.10, "System Design": 0.10},
-}
+@app.before_request
+def _start_timer():
+    g.request_started = time.perf_counter()
+    models.poll()
 
-RISK_FILTERS = {
-    "high": lambda x: x["duration_mins"] <= 15,
-    "medium": lambda x: x["duration_mins"] <= 30,
-    "low": lambda x: True,
-}
 
+@app.after_request
+def _record_request(response):
+    with runtime_metrics.time("compress"):
+        response = compress_response(response)
+    started = g.pop("request_started", None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else "unmatched"
+        runtime_metrics.inc("nurova_http_requests_total",
+                            route=route, method=request.method, status=response.status_code)
+        runtime_metrics.observe("nurova_http_request_duration_seconds",
+                                time.perf_counter() - started, route=route)
+        runtime_metrics.flush()
+    bundle = g.get("models")
+    if bundle is not None:
+        response.headers["X-Model-Version"] = bundle.version
+    return response
 
-def score_content(item, risk_level, cluster, query=""):
-    mood_match = 0.5
-    if risk_level == "high" and item["category"] in ("Mindfulness", "Productivity"):
-        mood_match = 0.9
-    elif risk_level == "low" and item["category"] in ("DSA", "System Design", "ML/AI"):
-        mood_match = 0.85
 
-    goal_relevance = item["goal_relevance"]
-    user_interest = item["user_interest"]
+def _json_body():
+    with runtime_metrics.time("json_parse"):
+        return request.get_json(force=True)
 
-    # Query match boost
-    if query and query.lower() in item["title"].lower():
-        goal_relevance = min(goal_relevance + 0.08, 1.0)
-    if query and query.lower() in item["category"].lower():
-        goal_relevance = min(goal_relevance + 0.05, 1.0)
 
-    # Cluster boost
-    boosts = CLUSTER_BOOSTS.get(cluster, {})
-    cluster_boost = boosts.get(item["category"], 0)
+_static_metrics = {}   # path → (mtime, parsed json)
 
-    score = (goal_relevance * 0.6) + (user_interest * 0.3) + (mood_match * 0.1) + cluster_boost
-    return round(min(score, 1.0), 3)
+def _model_metrics():
+    """Active version's distraction/cluster metrics JSON, re-read only when the file changes"""
+    result = {}
+    try:
+        models_dir = models.current().path
+    except Exception:
+        models_dir = MODELS_DIR
+    for fname in ("distraction_metrics.json", "cluster_metrics.json"):
+        path = os.path.join(models_dir, fname)
+        try:
+            mtime = os.stat(path).st_mtime
+        except OSError:
+            continue
+        cached = _static_metrics.get(path)
+        if cached is None or cached[0] != mtime:
+            with open(path) as f:
+                cached = _static_metrics[path] = (mtime, json.load(f))
+        result[fname.replace("_metrics.json", "")] = cached[1]
+    return result
 
 
 # ─────────────────────────────────────────────
@@ -167,63 +278,69 @@ def score_content(item, risk_level, cluster, query=""):
 
 @app.route("/health", methods=["GET"])
 def health():
-    return jsonify({"status": "ok", "version": "2.0.0", "timestamp": datetime.utcnow().isoformat()})
+    return jsonify({
+        "status": "ok",
+        "version": "2.0.0",
+        "timestamp": datetime.utcnow().isoformat(),
+        "startup": _startup,
+        "model": models.status(),
+        "session_store": store.status(),
+        "memory": _memory_report(),
+    })
 
 
 @app.route("/metrics", methods=["GET"])
 def metrics():
-    result = {}
-    for fname in ("distraction_metrics.json", "cluster_metrics.json"):
-        path = os.path.join(MODELS_DIR, fname)
-        if os.path.exists(path):
-            with open(path) as f:
-                result[fname.replace("_metrics.json", "")] = json.load(f)
+    result = dict(_model_metrics())
+    result["model"] = models.status()
+    result["youtube_cache"] = youtube.stats()
+    result["response_cache"] = response_cache.stats()
     return jsonify(result)
 
 
-@app.route("/predict_distraction", methods=["POST"])
-def predict_distraction():
-    data = request.get_json(force=True)
+@app.route("/metrics/prometheus", methods=["GET"])
+def metrics_prometheus():
+    """Request/stage latency histograms and counters, summed over all workers"""
+    body = runtime_metrics.render()
+    return app.response_class(body, mimetype="text/plain; version=0.0.4")
 
-    required = [
-        "screen_time", "distraction_freq", "mood_score",
-        "goal_alignment_score", "task_completion_rate",
-        "time_of_day", "hour_of_session",
-    ]
 
-    try:
-        pkg = get_distraction_model()
-        model = pkg["model"]
-        scaler = pkg["scaler"]
-        features = pkg["features"]
+DISTRACTION_DEFAULTS = {
+    "daily_screen_time": ("screen_time", 4),
+    "distraction_frequency": ("distraction_freq", 10),
+    "mood_score": ("mood_score", 5),
+    "goal_alignment_score": ("goal_alignment_score", 0.5),
+    "task_completion_rate": ("task_completion_rate", 0.5),
+    "time_of_day": ("time_of_day", 12),
+    "hour_of_session": ("hour_of_session", 1),
+}
+
+BATCH_CHUNK_SIZE = 2048
 
-        # Map request fields → model features
-        feature_map = {
-            "daily_screen_time": float(data.get("screen_time", 4)),
-            "distraction_frequency": float(data.get("distraction_freq", 10)),
-            "mood_score": float(data.get("mood_score", 5)),
-            "goal_alignment_score": float(data.get("goal_alignment_score", 0.5)),
-            "task_completion_rate": float(data.get("task_completion_rate", 0.5)),
-            "time_of_day": float(data.get("time_of_day", 12)),
-            "hour_of_session": float(data.get("hour_of_session", 1)),
-        }
 
-        X = np.array([[feature_map[f] for f in features]])
-        X_scaled = scaler.transform(X)
-        risk_prob = float(model.predict_proba(X_scaled)[0][1])
-
-    except Exception as e:
-        # Fallback heuristic
-        screen_time = float(data.get("screen_time", 4))
-        mood = float(data.get("mood_score", 5))
-        hour = float(data.get("time_of_day", 12))
-        risk_prob = min(
-            0.3 + (screen_time / 16) * 0.35
-              + (1 - mood / 10) * 0.2
-              + (0.15 if hour >= 22 or hour <= 4 else 0),
-            0.99
-        )
+def _distraction_row(data, features):
+    """Map request fields → model feature vector (in model column order)"""
+    row = []
+    for f in features:
+        key, default = DISTRACTION_DEFAULTS[f]
+        row.append(float(data.get(key, default)))
+    return row
 
+
+def _heuristic_risk(data):
+    """Fallback heuristic used when the model package is unavailable"""
+    screen_time = float(data.get("screen_time", 4))
+    mood = float(data.get("mood_score", 5))
+    hour = float(data.get("time_of_day", 12))
+    return min(
+        0.3 + (screen_time / 16) * 0.35
+          + (1 - mood / 10) * 0.2
+          + (0.15 if hour >= 22 or hour <= 4 else 0),
+        0.99
+    )
+
+
+def _risk_result(risk_prob):
     if risk_prob > 0.75:
         action = "HIGH_RISK"
     elif risk_prob > 0.45:
@@ -231,70 +348,252 @@ def predict_distraction():
     else:
         action = "LOW_RISK"
 
-    return jsonify({
+    return {
         "risk_prob": round(risk_prob, 4),
         "action": action,
         "risk_percent": round(risk_prob * 100, 1),
+    }
+
+
+def score_distraction_batch(rows):
+    """Score many request payloads in one vectorized pass (engine or risk table).
+
+    Returns risk probabilities in input order. Falls back to the heuristic
+    for the whole batch if the model can't be loaded or scored.
+    """
+    if not rows:
+        return []
+    import numpy as np
+
+    try:
+        scorer = get_risk_scorer()
+        with runtime_metrics.time("feature_mapping"):
+            X = np.array([_distraction_row(data, scorer.features) for data in rows], dtype=float)
+        with runtime_metrics.time("predict_proba"):
+            return scorer.predict_risk(X).tolist()
+
+    except Exception:
+        runtime_metrics.inc("nurova_distraction_fallback_total", len(rows))
+        return [_heuristic_risk(data) for data in rows]
+
+
+def cached_risk_result(data):
+    """_risk_result for one payload, memoized on (model version, feature vector).
+
+    Heuristic fallbacks are never cached.
+    """
+    try:
+        bundle = _models()
+        with runtime_metrics.time("feature_mapping"):
+            row = _distraction_row(data, bundle.engine.features)
+    except Exception:
+        return _risk_result(score_distraction_batch([data])[0])
+
+    # Table and engine answers differ slightly, so they are cached apart
+    namespace = "predict" if bundle.scorer is bundle.engine else "predict_table"
+    cached = response_cache.get(namespace, bundle.version, row)
+    if cached is not None:
+        return json.loads(cached)
+    import numpy as np
+
+    try:
+        with runtime_metrics.time("predict_proba"):
+            risk_prob = float(bundle.scorer.predict_risk(np.array([row]))[0])
+    except Exception:
+        return _risk_result(score_distraction_batch([data])[0])
+    result = _risk_result(risk_prob)
+    response_cache.put(namespace, bundle.version, row, json.dumps(result).encode())
+    return result
+
+
+@app.route("/predict_distraction", methods=["POST"])
+def predict_distraction():
+    data = _json_body()
+
+    return jsonify({
+        **cached_risk_result(data),
         "timestamp": datetime.utcnow().isoformat(),
     })
 
 
+@app.route("/predict_distraction/batch", methods=["POST"])
+def predict_distraction_batch():
+    """Score a JSON list of feature dicts (or {"items": [...]}) in one pass"""
+    data = _json_body()
+    rows = data.get("items", []) if isinstance(data, dict) else data
+    if not isinstance(rows, list) or not all(isinstance(r, dict) for r in rows):
+        return jsonify({"error": "expected a list of feature objects"}), 400
+
+    for i, row in enumerate(rows):
+        try:
+            _distraction_row(row, DISTRACTION_DEFAULTS)
+        except (TypeError, ValueError):
+            return jsonify({"error": f"row {i} has a non-numeric feature value"}), 400
+
+    timestamp = datetime.utcnow().isoformat()
+    results = []
+    for start in range(0, len(rows), BATCH_CHUNK_SIZE):
+        chunk = rows[start:start + BATCH_CHUNK_SIZE]
+        results.extend(_risk_result(p) for p in score_distraction_batch(chunk))
+
+    return jsonify({"results": results, "count": len(results), "timestamp": timestamp})
+
+
+@app.route("/predict_distraction/stream", methods=["POST"])
+def predict_distraction_stream():
+    """NDJSON in → NDJSON out; rows are scored in chunks as the body streams in.
+
+    Blank lines are skipped; malformed lines yield {"line": n, "error": ...}
+    in place so output stays aligned with input order.
+    """
+    @stream_with_context
+    def generate():
+        pending = []
+
+        def flush():
+            valid = [data for _, data in pending if data is not None]
+            probs = iter(score_distraction_batch(valid))
+            out = []
+            for line_no, data in pending:
+                if data is None:
+                    out.append(json.dumps({"line": line_no, "error": "invalid feature object"}))
+                else:
+                    out.append(json.dumps(_risk_result(next(probs))))
+            pending.clear()
+            return "\n".join(out) + "\n"
+
+        for line_no, raw in enumerate(request.stream, start=1):
+            raw = raw.strip()
+            if not raw:
+                continue
+            try:
+                data = json.loads(raw)
+                if not isinstance(data, dict):
+                    data = None
+                else:
+                    _distraction_row(data, DISTRACTION_DEFAULTS)
+            except (TypeError, ValueError):
+                data = None
+            pending.append((line_no, data))
+            if len(pending) >= BATCH_CHUNK_SIZE:
+                yield flush()
+
+        if pending:
+            yield flush()
+
+    return app.response_class(generate(), mimetype="application/x-ndjson")
+
+
 @app.route("/get_personality", methods=["POST"])
 def get_personality():
-    data = request.get_json(force=True)
-    history = data.get("usage_history", [{}])
+    """Classify a user into a personality cluster.
+
+    With "user_id", classifies from that user's stored running feature means
+    (maintained by /log_session). Otherwise averages the client-sent
+    "usage_history" rows, as older clients do.
+    """
+    import numpy as np
+
+    data = _json_body()
+    user_id = data.get("user_id")
+    history = data.get("usage_history") or [{}]
+    source = "usage_history"
 
     try:
         pkg = get_cluster_model()
-        model = pkg["model"]
-        scaler = pkg["scaler"]
+        engine = get_cluster_engine()
         features = pkg["features"]
         name_map = pkg["cluster_name_map"]
-        traits_map = pkg["cluster_traits"]
-
-        # Aggregate history → single feature vector
-        avg = {}
-        for feat in features:
-            vals = [float(row.get(feat, 0)) for row in history if feat in row or True]
-            avg[feat] = np.mean(vals) if vals else 0.0
-
-        # Map request fields
-        feature_map = {
-            "daily_screen_time": float(history[0].get("screen_time", avg.get("daily_screen_time", 4))),
-            "distraction_frequency": float(history[0].get("distraction_freq", avg.get("distraction_frequency", 10))),
-            "mood_score": float(history[0].get("mood_score", avg.get("mood_score", 5))),
-            "goal_alignment_score": float(history[0].get("goal_alignment_score", avg.get("goal_alignment_score", 0.5))),
-            "task_completion_rate": float(history[0].get("task_completion_rate", avg.get("task_completion_rate", 0.5))),
-            "time_of_day": float(history[0].get("time_of_day", avg.get("time_of_day", 12))),
-        }
 
-        X = np.array([[feature_map[f] for f in features]])
-        X_scaled = scaler.transform(X)
-        cluster_id = int(model.predict(X_scaled)[0])
-        cluster_name = name_map.get(cluster_id, "ProcrastinationBinger")
+        stats = {}
+        if user_id:
+            with runtime_metrics.time("sqlite_user_stats"), store.connection() as conn:
+                stats = query_user_stats(conn, user_id)
+
+        with runtime_metrics.time("feature_mapping"):
+            feature_map = {}
+            for feat in features:
+                key, default = DISTRACTION_DEFAULTS[feat]
+                if feat in stats:
+                    feature_map[feat] = stats[feat]["mean"]
+                    continue
+                vals = [float(row[key]) for row in history if key in row]
+                feature_map[feat] = float(np.mean(vals)) if vals else float(default)
+            if stats:
+                source = "stored"
+            vector = [feature_map[f] for f in features]
+
+        version = _models().version
+        cached = response_cache.get("personality", version, vector)
+        if cached is not None:
+            cluster_name = cached.decode()
+        else:
+            with runtime_metrics.time("predict"):
+                cluster_id = int(engine.predict(vector)[0])
+            cluster_name = name_map.get(cluster_id, DEFAULT_CLUSTER)
+            response_cache.put("personality", version, vector, cluster_name.encode())
 
     except Exception:
-        cluster_name = "ProcrastinationBinger"
+        runtime_metrics.inc("nurova_personality_fallback_total")
+        cluster_name = DEFAULT_CLUSTER
 
-    emoji_map = {
-        "NightScrollAddict": "🌙",
-        "StressScroller": "😰",
-        "ProcrastinationBinger": "📱",
-        "ProductiveSprinter": "⚡",
-    }
-    traits_map_full = {
-        "NightScrollAddict": ["Active late-night (10 PM+)", "Long scroll sessions", "Low next-day productivity"],
-        "StressScroller": ["High distraction frequency", "Low mood score", "Frequent context-switching"],
-        "ProcrastinationBinger": ["High screen time", "Low task completion", "Short productivity bursts"],
-        "ProductiveSprinter": ["Strong goal alignment", "Low distraction", "Consistent task completion"],
-    }
+    return jsonify({**personality_result(cluster_name), "source": source})
 
-    return jsonify({
-        "cluster": cluster_name,
-        "traits": traits_map_full.get(cluster_name, []),
-        "emoji": emoji_map.get(cluster_name, "🤖"),
-        "display_name": cluster_name.replace("_", " "),
-    })
+
+@app.route("/get_personality/batch", methods=["POST"])
+def get_personality_batch():
+    """Classify many users in one vectorized pass, for cohort reports.
+
+    Body: {"items": [feature dicts]} and/or {"user_ids": [...]} (classified
+    from their stored running feature means, like /get_personality). Results
+    keep request order, items first; user ids without stored sessions get an
+    "error" instead of a cluster.
+    """
+    import numpy as np
+
+    data = _json_body()
+    items = data.get("items", []) if isinstance(data, dict) else data
+    user_ids = data.get("user_ids", []) if isinstance(data, dict) else []
+    if not isinstance(items, list) or not all(isinstance(r, dict) for r in items):
+        return jsonify({"error": "items must be a list of feature objects"}), 400
+    if not isinstance(user_ids, list) or not all(isinstance(u, str) and u for u in user_ids):
+        return jsonify({"error": "user_ids must be a list of non-empty strings"}), 400
+    if not items and not user_ids:
+        return jsonify({"error": "expected items or user_ids"}), 400
+
+    try:
+        pkg = get_cluster_model()
+        engine = get_cluster_engine()
+    except Exception:
+        return jsonify({"error": "cluster model unavailable"}), 503
+    features = engine.features
+
+    vectors = []
+    for i, row in enumerate(items):
+        try:
+            vectors.append(_distraction_row(row, features))
+        except (TypeError, ValueError):
+            return jsonify({"error": f"item {i} has a non-numeric feature value"}), 400
+
+    means = {}
+    if user_ids:
+        with runtime_metrics.time("sqlite_user_stats"), store.connection() as conn:
+            means = query_user_means(conn, user_ids)
+        known = [u for u in user_ids if u in means]
+        vectors += [[float(means[u].get(f, DISTRACTION_DEFAULTS[f][1])) for f in features] for u in known]
+
+    with runtime_metrics.time("predict"):
+        labeled = label_vectors(engine, pkg["cluster_name_map"], np.array(vectors).reshape(-1, len(features)))
+
+    results = labeled[:len(items)]
+    stored = iter(labeled[len(items):])
+    for u in user_ids:
+        if u in means:
+            results.append({"user_id": u, **next(stored), "source": "stored"})
+        else:
+            results.append({"user_id": u, "error": "no stored sessions"})
+
+    return jsonify({"results": results, "count": len(results), "model_version": _models().version})
 
 
 @app.route("/recommend_content", methods=["GET"])
@@ -302,116 +601,397 @@ def recommend_content():
     query = request.args.get("query", "DSA")
     risk_level = request.args.get("risk_level", "medium")
     cluster = request.args.get("cluster", "ProcrastinationBinger")
+    fmt = negotiate()
 
-    # Try YouTube API first, fallback to catalog
+    # Try YouTube API first (within the latency budget), fallback to catalog
     items = None
     if YOUTUBE_API_KEY and YOUTUBE_API_KEY != "YOUR_YOUTUBE_API_KEY_HERE":
         items = _fetch_youtube(query, risk_level)
 
     if not items:
-        items = CONTENT_CATALOG
+        # Catalog ranking is a pure function of its inputs: serve the encoded body from cache.
+        # Keyed by the active model version, read without loading the models
+        version = models.version()
+        parts = [query.lower(), risk_level, cluster]
+        namespace = f"recommend.{fmt}"
+        body = response_cache.get(namespace, version, parts)
+        if body is None:
+            body = _encode_items(get_catalog_index().recommend(risk_level, cluster, query, k=8), fmt)
+            response_cache.put(namespace, version, parts, body)
+        response = _conditional_response(body, fmt, source="catalog")
+        response.headers["X-Model-Version"] = version
+        return response
 
-    risk_filter = RISK_FILTERS.get(risk_level, RISK_FILTERS["medium"])
+    from recommender import rank_candidates
+
+    body = _encode_items(rank_candidates(items, risk_level, cluster, query, k=8), fmt)
+    return _conditional_response(body, fmt, source="youtube")
 
-    scored = []
-    for item in items:
-        if not risk_filter(item):
-            continue
-        if item.get("views", 1001) < 1000:
-            continue
-        s = score_content(item, risk_level, cluster, query)
-        if s >= 0.65:
-            scored.append({**item, "score": s})
 
-    scored.sort(key=lambda x: x["score"], reverse=True)
-    return jsonify(scored[:8])
+# What the app reads from a recommendation. MessagePack clients get only
+# these, plus "duration" when it isn't just "<duration_mins> min".
+COMPACT_ITEM_FIELDS = ("title", "url", "thumbnail", "channel", "duration_mins", "score")
+
+
+def _compact_item(item):
+    compact = {k: item[k] for k in COMPACT_ITEM_FIELDS if k in item}
+    if "duration" in item and item["duration"] != f"{item.get('duration_mins')} min":
+        compact["duration"] = item["duration"]
+    return compact
+
+
+def _encode_items(items, fmt):
+    return encode(items if fmt == "json" else [_compact_item(it) for it in items], fmt)
+
+
+def _conditional_response(body, fmt, source):
+    """Response with ETag + Cache-Control; 304 if the client's If-None-Match matches"""
+    resp = app.response_class(body, mimetype=MIMETYPES[fmt])
+    resp.headers["X-Content-Source"] = source
+    resp.set_etag(etag_for(body))
+    resp.cache_control.public = True
+    resp.cache_control.max_age = RECOMMEND_MAX_AGE
+    return resp.make_conditional(request)
 
 
 def _fetch_youtube(query, risk_level):
-    """Fetch from YouTube Data API v3"""
+    """YouTube Data API v3 search through the shared TTL/LRU cache.
+
+    Returns None on failure or if upstream misses the YOUTUBE_BUDGET_MS budget.
+    """
+    return youtube.get(query, risk_level, timeout=YOUTUBE_BUDGET_MS / 1000)
+
+
+# Optional per-session model inputs; they feed the per-user running aggregates
+SESSION_FEATURE_FIELDS = (
+    "distraction_freq", "mood_score", "goal_alignment_score",
+    "task_completion_rate", "time_of_day",
+)
+
+
+# JSON numbers decode to exactly these; bools (a subclass of int) are rejected
+_NUMBER_TYPES = (int, float)
+
+
+def _session_row(data, created_at):
+    """Request payload → sessions row. Raises ValueError for values that
+    couldn't be stored, so they are rejected before they reach a write batch."""
+    if not isinstance(data, dict):
+        raise ValueError("expected a session object")
+    get = data.get
+    apps_used = get("apps_used", [])
+    if type(apps_used) is not list or not all(type(name) is str for name in apps_used):
+        raise ValueError("apps_used must be a list of app names")
+    for key in ("screen_time", "productive_mins", "risk_prob"):
+        if type(get(key, 0)) not in _NUMBER_TYPES:
+            raise ValueError(f"{key} must be a number")
+    features = {}
+    for key in SESSION_FEATURE_FIELDS:
+        value = get(key)
+        if value is not None:
+            if type(value) not in _NUMBER_TYPES:
+                raise ValueError(f"{key} must be a number")
+            value = float(value)
+        features[key] = value
+    for key in ("personality_cluster", "user_id"):
+        value = get(key)
+        if value is not None and type(value) is not str:
+            raise ValueError(f"{key} must be a string")
     try:
-        from googleapiclient.discovery import build
-        duration_map = {"high": "short", "medium": "medium", "low": "any"}
-        yt = build("youtube", "v3", developerKey=YOUTUBE_API_KEY)
-        search_resp = yt.search().list(
-            q=query + " tutorial",
-            type="video",
-            part="snippet",
-            maxResults=10,
-            videoDuration=duration_map.get(risk_level, "medium"),
-            relevanceLanguage="en",
-        ).execute()
-
-        items = []
-        for item in search_resp.get("items", []):
-            vid_id = item["id"]["videoId"]
-            snippet = item["snippet"]
-            items.append({
-                "title": snippet["title"],
-                "url": f"https://youtu.be/{vid_id}",
-                "thumbnail": snippet["thumbnails"]["high"]["url"],
-                "channel": snippet["channelTitle"],
-                "duration": "~10 min",
-                "category": query,
-                "views": 5000,
-                "duration_mins": 10,
-                "goal_relevance": 0.82,
-                "user_interest": 0.78,
-            })
-        return items
-    except Exception:
-        return None
+        return {
+            "screen_time": float(get("screen_time", 0)),
+            "productive_mins": int(get("productive_mins", 0)),
+            "apps_used": apps_used,
+            "risk_prob": float(get("risk_prob", 0)),
+            "personality_cluster": get("personality_cluster", ""),
+            "created_at": created_at,
+            "user_id": get("user_id"),
+            **features,
+        }
+    except OverflowError as e:
+        raise ValueError(str(e))
+
+
+# Seconds a client should wait before retrying a /log_session answered with 503
+LOG_RETRY_AFTER = os.getenv("NUROVA_LOG_RETRY_AFTER", "1")
+
+
+def _retry_later(error):
+    return jsonify({"error": error}), 503, {"Retry-After": LOG_RETRY_AFTER}
 
 
 @app.route("/log_session", methods=["POST"])
 def log_session():
-    data = request.get_json(force=True)
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    c.execute("""
-        INSERT INTO sessions (screen_time, productive_mins, apps_used, risk_prob, personality_cluster, created_at)
-        VALUES (?, ?, ?, ?, ?, ?)
-    """, (
-        float(data.get("screen_time", 0)),
-        int(data.get("productive_mins", 0)),
-        json.dumps(data.get("apps_used", [])),
-        float(data.get("risk_prob", 0)),
-        data.get("personality_cluster", ""),
-        datetime.utcnow().isoformat(),
-    ))
-    conn.commit()
-    conn.close()
-    return jsonify({"status": "logged", "id": c.lastrowid})
+    """Queue a session for the batched writer.
+
+    Pass ?durable=1 (or "durable": true in the body) to wait for the commit
+    and get the row id back; otherwise the response returns immediately.
+    """
+    data = _json_body()
+    try:
+        row = _session_row(data, datetime.utcnow().isoformat())
+    except (TypeError, ValueError) as e:
+        return jsonify({"error": str(e)}), 400
+    durable = request.args.get("durable", "").lower() in ("1", "true") or bool(data.get("durable"))
+    with runtime_metrics.time("sqlite_log_session"):
+        try:
+            row_id = store.log(row, durable=durable)
+        except queue.Full:
+            return _retry_later("session queue is full")
+        except TimeoutError:
+            return _retry_later("session write was not committed in time")
+        except RuntimeError as e:
+            return _retry_later(str(e))     # store closed: the worker is shutting down
+        except sqlite3.Error as e:
+            return _retry_later(f"database error: {e}")
+    if durable:
+        return jsonify({"status": "logged", "id": row_id})
+    return jsonify({"status": "queued", "id": None})
+
+
+BULK_CHUNK_SIZE = 2500
+BULK_MAX_ROWS = int(os.getenv("BULK_MAX_ROWS", "100000"))
+NDJSON_MIMETYPES = ("application/x-ndjson", "application/ndjson", "application/jsonl")
+
+
+class _UploadTooLarge(Exception):
+    pass
+
+
+def _iter_ndjson(stream, chunk_size=64 * 1024):
+    """Raw non-blank lines; each is parsed (and possibly rejected) on its own.
+
+    Reads in chunks: line-by-line iteration of the request stream costs a
+    Python-level readline per session.
+    """
+    tail = b""
+    while True:
+        chunk = stream.read(chunk_size)
+        if not chunk:
+            break
+        lines = (tail + chunk).split(b"\n")
+        tail = lines.pop()
+        for raw in lines:
+            raw = raw.strip()
+            if raw:
+                yield raw
+    tail = tail.strip()
+    if tail:
+        yield tail
+
+
+def _iter_json_array(stream, chunk_size=64 * 1024):
+    """Elements of a top-level JSON array, decoded as the body streams in.
+
+    Only the unread tail of the current chunk is buffered. Raises ValueError
+    on malformed input (an array can't be resynchronized after an error).
+    """
+    decoder = json.JSONDecoder()
+    utf8 = codecs.getincrementaldecoder("utf-8")()
+    buf, pos, eof = "", 0, False
+
+    def more():
+        nonlocal buf, pos, eof
+        chunk = stream.read(chunk_size)
+        eof = not chunk
+        buf = buf[pos:] + utf8.decode(chunk, final=eof)
+        pos = 0
+
+    def skip_ws():
+        nonlocal pos
+        while True:
+            while pos < len(buf) and buf[pos] in " \t\r\n":
+                pos += 1
+            if pos < len(buf) or eof:
+                return
+            more()
+
+    skip_ws()
+    if buf[pos:pos + 1] != "[":
+        raise ValueError("body is not a JSON array")
+    pos += 1
+    skip_ws()
+    if buf[pos:pos + 1] == "]":
+        return
+    while True:
+        skip_ws()
+        try:
+            item, end = decoder.raw_decode(buf, pos)
+        except json.JSONDecodeError:
+            if eof:
+                raise
+            more()
+            continue
+        if not eof and buf[end:end + 1] not in (" ", "\t", "\r", "\n", ",", "]"):
+            # A scalar cut at the chunk edge ("12" of "12.5") decodes early; read on
+            more()
+            continue
+        pos = end
+        yield item
+        skip_ws()
+        sep = buf[pos:pos + 1]
+        pos += 1
+        if sep == "]":
+            return
+        if sep != ",":
+            raise ValueError(f"expected ',' or ']' after element, got {sep!r}")
+
+
+def _bulk_session_row(item, now):
+    """Validated sessions row for one uploaded session; raises ValueError"""
+    if not isinstance(item, dict):
+        raise ValueError("expected a session object")
+    created_at = item.get("created_at")
+    if created_at is None:
+        created_at = now
+    else:
+        # Offline sessions keep the time they were recorded (stored as naive UTC)
+        dt = datetime.fromisoformat(str(created_at))
+        if dt.tzinfo is not None:
+            dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+        created_at = dt.isoformat()
+    row = _session_row(item, created_at)
+    for key in ("screen_time", "risk_prob", *SESSION_FEATURE_FIELDS):
+        value = row[key]
+        if value is not None and not math.isfinite(value):
+            raise ValueError(f"{key} must be a finite number")
+    if row["screen_time"] < 0 or row["productive_mins"] < 0:
+        raise ValueError("screen_time and productive_mins must be non-negative")
+    if not 0.0 <= row["risk_prob"] <= 1.0:
+        raise ValueError("risk_prob must be between 0 and 1")
+    return row
+
+
+@app.route("/log_session/bulk", methods=["POST"])
+def log_session_bulk():
+    """Ingest many sessions (e.g. recorded offline) in one request.
+
+    Body: NDJSON (Content-Type application/x-ndjson) or a JSON array of the
+    objects /log_session accepts, plus an optional ISO "created_at". The body
+    is parsed and validated as it streams in, with no lock held, and every
+    BULK_CHUNK_SIZE valid rows are inserted in their own short transaction so
+    queued /log_session writes aren't stalled behind a slow upload. Invalid
+    rows are skipped and reported by 0-based index. An upload that turns out
+    malformed or over BULK_MAX_ROWS is rejected; chunks committed before that
+    point are kept and counted in "accepted".
+    """
+    ndjson = request.mimetype in NDJSON_MIMETYPES
+    items = _iter_ndjson(request.stream) if ndjson else _iter_json_array(request.stream)
+    now = datetime.utcnow().isoformat()
+    accepted, rejected, pending = 0, [], []
+
+    try:
+        with runtime_metrics.time("sqlite_bulk_ingest"):
+            for index, item in enumerate(items):
+                if index >= BULK_MAX_ROWS:
+                    raise _UploadTooLarge
+                try:
+                    pending.append(_bulk_session_row(decode(item) if ndjson else item, now))
+                except ValueError as e:
+                    rejected.append({"index": index, "error": str(e)})
+                    continue
+                if len(pending) >= BULK_CHUNK_SIZE:
+                    accepted += store.insert_rows(pending)
+                    pending = []
+            accepted += store.insert_rows(pending)
+    except _UploadTooLarge:
+        return jsonify({"error": f"more than {BULK_MAX_ROWS} sessions in one upload", "accepted": accepted}), 413
+    except ValueError as e:
+        return jsonify({"error": f"malformed JSON array: {e}", "accepted": accepted}), 400
+    except sqlite3.Error as e:
+        return jsonify({"error": f"database error: {e}", "accepted": accepted}), 503
+
+    return jsonify({
+        "status": "logged",
+        "accepted": accepted,
+        "rejected": len(rejected),
+        "errors": rejected,
+    })
+
+
+ANALYTICS_MAX_DAYS = int(os.getenv("ANALYTICS_MAX_DAYS", "365"))
 
 
 @app.route("/analytics", methods=["GET"])
 def analytics():
-    """Return 7-day aggregated analytics"""
-    conn = sqlite3.connect(DB_PATH)
-    c = conn.cursor()
-    seven_days_ago = (datetime.utcnow() - timedelta(days=7)).isoformat()
-    rows = c.execute("""
-        SELECT DATE(created_at) as date, 
-               AVG(risk_prob) as avg_risk,
-               SUM(screen_time) as total_screen_time,
-               COUNT(*) as sessions
-        FROM sessions
-        WHERE created_at >= ?
-        GROUP BY DATE(created_at)
-        ORDER BY date
-    """, (seven_days_ago,)).fetchall()
-    conn.close()
-
-    result = [
-        {"date": r[0], "avg_risk": round(r[1], 3),
-         "total_screen_time": round(r[2], 2), "sessions": r[3]}
-        for r in rows
-    ]
+    """Return per-day aggregated analytics for the last ?days=N days (default 7)
+
+    Served from the daily rollup tables, so cost depends on the window size,
+    not on how many sessions have ever been logged.
+    """
+    try:
+        days = int(request.args.get("days", 7))
+    except ValueError:
+        return jsonify({"error": "days must be an integer"}), 400
+    days = max(1, min(days, ANALYTICS_MAX_DAYS))
+
+    since_day = (datetime.utcnow() - timedelta(days=days)).date().isoformat()
+    with runtime_metrics.time("sqlite_analytics"), store.connection() as conn:
+        result = query_daily_analytics(conn, since_day)
     return jsonify(result)
 
 
+TREND_ALERT_RISK = float(os.getenv("NUROVA_TREND_ALERT_RISK", "0.7"))
+TREND_RISING_SLOPE = float(os.getenv("NUROVA_TREND_RISING_SLOPE", "0.01"))
+
+
+def _round_or_none(value, digits=4):
+    return None if value is None else round(value, digits)
+
+
+@app.route("/risk_trend", methods=["GET"])
+def risk_trend():
+    """Rolling risk trend for one user, maintained incrementally by the session writer.
+
+    ewma_risk averages the last ~NUROVA_TREND_SESSIONS sessions; recent_risk and
+    slope_per_hour (risk change per hour) weight sessions by age with a
+    NUROVA_TREND_HALF_LIFE_HOURS half-life. "warning" is "high_risk" once
+    ewma_risk reaches NUROVA_TREND_ALERT_RISK, "rising_risk" when it is above
+    0.5 and climbing, else null. Queued /log_session writes show up once their
+    batch commits (a few ms).
+    """
+    user_id = request.args.get("user_id")
+    if not user_id:
+        return jsonify({"error": "user_id is required"}), 400
+    with runtime_metrics.time("sqlite_risk_trend"), store.connection() as conn:
+        trend = query_user_trend(conn, user_id)
+    if trend is None:
+        return jsonify({"error": "no sessions logged for this user", "user_id": user_id}), 404
+
+    slope = trend["slope_per_hour"]
+    if slope is None:
+        direction = "unknown"
+    elif slope >= TREND_RISING_SLOPE:
+        direction = "rising"
+    elif slope <= -TREND_RISING_SLOPE:
+        direction = "falling"
+    else:
+        direction = "steady"
+
+    warning = None
+    if trend["ewma_risk"] >= TREND_ALERT_RISK:
+        warning = "high_risk"
+    elif trend["ewma_risk"] > 0.5 and direction == "rising":
+        warning = "rising_risk"
+
+    return jsonify({
+        "user_id": user_id,
+        "sessions": trend["sessions"],
+        "last_session_at": trend["last_at"],
+        "last_risk": _round_or_none(trend["last_risk"]),
+        "ewma_risk": _round_or_none(trend["ewma_risk"]),
+        "ewma_screen_time": _round_or_none(trend["ewma_screen_time"], 2),
+        "recent_risk": _round_or_none(trend["recent_risk"]),
+        "slope_per_hour": _round_or_none(slope, 5),
+        "trend": direction,
+        "warning": warning,
+        "window": {"sessions": TREND_SESSIONS, "half_life_hours": TREND_HALF_LIFE_HOURS},
+    })
+
+
 if __name__ == "__main__":
     port = int(os.getenv("PORT", 5000))
     debug = os.getenv("FLASK_DEBUG", "true").lower() == "true"
-    print(f"🚀 Nurova API starting on port {port}")
+    preload_models()
+    print(f"🚀 Nurova API starting on port {port} (models loaded in {_startup['load_ms']} ms)")
     app.run(host="0.0.0.0", port=port, debug=debug)
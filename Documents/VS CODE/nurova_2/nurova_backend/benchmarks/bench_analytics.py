@@ -0,0 +1,122 @@
+"""
+Nurova 2.0 — /analytics scaling benchmark
+Fills a scratch database with N sessions spread over the last year and times
+the 7-day analytics query four ways as N grows:
+  legacy      original GROUP BY DATE(created_at) over one raw sessions table, no index
+  indexed     same query using a created_at index
+  partitioned same query over only the monthly partitions in the window (sessions_source)
+  rollups     query_daily_analytics over the daily rollup tables (what /analytics serves)
+
+Run: python benchmarks/bench_analytics.py --sizes 100000,1000000,10000000
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore, connect, query_daily_analytics, sessions_source  # noqa: E402
+
+CLUSTERS = ["NightScrollAddict", "StressScroller", "ProcrastinationBinger", "ProductiveSprinter"]
+
+LEGACY_SQL = """
+    SELECT DATE(created_at) as date,
+           AVG(risk_prob) as avg_risk,
+           SUM(screen_time) as total_screen_time,
+           COUNT(*) as sessions
+    FROM {source}
+    WHERE created_at >= ?
+    GROUP BY DATE(created_at)
+    ORDER BY date
+"""
+
+
+# The original single sessions table, for the legacy / indexed baselines
+LEGACY_SCHEMA = """
+    CREATE TABLE legacy_sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        screen_time REAL, productive_mins INTEGER, apps_used TEXT,
+        risk_prob REAL, personality_cluster TEXT, created_at TEXT
+    );
+    CREATE INDEX idx_legacy_sessions_created_at ON legacy_sessions (created_at);
+"""
+
+
+def fill(store, conn, start_n, end_n, now):
+    rng = random.Random(start_n)
+    rows = [
+        (rng.uniform(0.5, 12), rng.randint(0, 240), "[]", rng.random(), rng.choice(CLUSTERS),
+         (now - timedelta(seconds=rng.randint(0, 365 * 86400))).isoformat())
+        for _ in range(end_n - start_n)
+    ]
+    with conn:
+        conn.executemany("""
+            INSERT INTO legacy_sessions (screen_time, productive_mins, apps_used, risk_prob, personality_cluster, created_at)
+            VALUES (?, ?, ?, ?, ?, ?)
+        """, rows)
+    keys = ("screen_time", "productive_mins", "apps_used", "risk_prob", "personality_cluster", "created_at")
+    with store.bulk_insert() as insert:
+        for start in range(0, len(rows), 100_000):
+            insert([dict(zip(keys, r)) for r in rows[start:start + 100_000]])
+
+
+def time_query(fn, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - t0)
+    return round(best * 1000, 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10000,100000,1000000")
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    store = SessionStore(db_path)
+    store.init_schema()
+    conn = connect(db_path)
+    conn.executescript(LEGACY_SCHEMA)
+    now = datetime.utcnow()
+    since = (now - timedelta(days=7)).isoformat()
+    since_day = (now - timedelta(days=7)).date().isoformat()
+
+    results, current = [], 0
+    print(f"{'rows':>12} {'legacy ms':>12} {'indexed ms':>12} {'partitioned ms':>15} {'rollups ms':>12}")
+    for size in sorted(int(s) for s in args.sizes.split(",")):
+        fill(store, conn, current, size, now)
+        current = size
+        res = {
+            "rows": size,
+            "legacy_ms": time_query(lambda: conn.execute(
+                LEGACY_SQL.format(source="legacy_sessions NOT INDEXED"), (since,)).fetchall(), args.repeat),
+            "indexed_ms": time_query(lambda: conn.execute(
+                LEGACY_SQL.format(source="legacy_sessions"), (since,)).fetchall(), args.repeat),
+            "partitioned_ms": time_query(lambda: conn.execute(
+                LEGACY_SQL.format(source=sessions_source(conn, since)), (since,)).fetchall(), args.repeat),
+            "rollups_ms": time_query(lambda: query_daily_analytics(conn, since_day), args.repeat),
+        }
+        results.append(res)
+        print(f"{size:>12,} {res['legacy_ms']:>12} {res['indexed_ms']:>12} {res['partitioned_ms']:>15} "
+              f"{res['rollups_ms']:>12}")
+
+    conn.close()
+    store.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
@@ -0,0 +1,155 @@
+"""
+Nurova 2.0 — Bulk upload vs. queued writes
+Streams one slow POST /log_session/bulk (the body trickles in over --seconds)
+while another thread keeps posting /log_session, queued and ?durable=1,
+through the in-process app. Fails unless:
+  - every session landed: bulk "accepted" + single posts == rows stored
+  - the session writer reported no errors
+  - no durable /log_session waited longer than --max-wait-ms, i.e. the
+    upload never held the write lock while its body was streaming
+
+Run: python benchmarks/bench_bulk_concurrency.py --rows 5000 --seconds 3
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+import threading
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-bulk-concurrency-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "bench.db")
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+from common import PayloadFactory, run_metadata, write_results  # noqa: E402
+import app as nurova  # noqa: E402
+
+
+class SlowBody:
+    """Request body that hands out `piece` bytes per read, `pause` seconds apart"""
+
+    def __init__(self, data, pieces, seconds):
+        self.data = data
+        self.pos = 0
+        self.piece = max(1, len(data) // pieces)
+        self.pause = seconds / pieces
+
+    def read(self, size=-1):
+        if self.pos >= len(self.data):
+            return b""
+        time.sleep(self.pause)
+        n = self.piece if size is None or size < 0 else min(size, self.piece)
+        chunk = self.data[self.pos:self.pos + n]
+        self.pos += len(chunk)
+        return chunk
+
+    def readline(self, size=-1):
+        return self.read(size)
+
+    # The test client measures the body with tell() / seek()
+    def tell(self):
+        return self.pos
+
+    def seek(self, offset, whence=0):
+        self.pos = (0, self.pos, len(self.data))[whence] + offset
+        return self.pos
+
+
+def count_rows():
+    nurova.store.flush()
+    with nurova.store.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="sessions in the bulk upload")
+    parser.add_argument("--seconds", type=float, default=3.0, help="how long the upload body takes to arrive")
+    parser.add_argument("--max-wait-ms", type=float, default=1000.0,
+                        help="fail if a durable /log_session waits longer than this")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    try:
+        client = nurova.app.test_client()
+        factory = PayloadFactory()
+        body = "\n".join(json.dumps(factory.session()) for _ in range(args.rows)).encode()
+        before = count_rows()
+        upload = {}
+
+        def run_upload():
+            t0 = time.perf_counter()
+            resp = client.post("/log_session/bulk", input_stream=SlowBody(body, 200, args.seconds),
+                               content_length=len(body), content_type="application/x-ndjson")
+            upload.update(status=resp.status_code, body=resp.get_json(),
+                          seconds=round(time.perf_counter() - t0, 3))
+
+        uploader = threading.Thread(target=run_upload)
+        uploader.start()
+        singles, waits, failed = 0, [], []
+        while uploader.is_alive():
+            durable = singles % 5 == 0
+            t0 = time.perf_counter()
+            resp = client.post("/log_session?durable=1" if durable else "/log_session", json=factory.session())
+            if durable:
+                waits.append((time.perf_counter() - t0) * 1000)
+            if resp.status_code != 200:
+                failed.append(resp.status_code)
+            singles += 1
+            time.sleep(0.005)
+        uploader.join()
+
+        landed = count_rows() - before
+        accepted = (upload["body"] or {}).get("accepted", 0)
+        status = nurova.store.status()
+        res = {
+            "upload_status": upload["status"],
+            "upload_seconds": upload["seconds"],
+            "bulk_accepted": accepted,
+            "single_posts": singles,
+            "rows_landed": landed,
+            "durable_p50_ms": round(statistics.median(waits), 2) if waits else None,
+            "durable_max_ms": round(max(waits), 2) if waits else None,
+            "writer": status,
+        }
+        print(f"upload: {upload['status']} in {upload['seconds']}s, {accepted} accepted")
+        print(f"/log_session during upload: {singles} posts, durable p50 {res['durable_p50_ms']} ms, "
+              f"max {res['durable_max_ms']} ms")
+        print(f"rows landed: {landed} (expected {accepted + singles})")
+
+        failures = []
+        if upload["status"] != 200 or accepted != args.rows:
+            failures.append(f"bulk upload: {upload['status']} {upload['body']}")
+        if failed:
+            failures.append(f"{len(failed)} /log_session posts failed: {sorted(set(failed))}")
+        if landed != accepted + singles:
+            failures.append(f"{accepted + singles - landed} sessions lost")
+        if status.get("write_errors"):
+            failures.append(f"writer errors: {status['last_error']}")
+        if waits and max(waits) > args.max_wait_ms:
+            failures.append(f"a durable /log_session waited {max(waits):.0f} ms behind the upload")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("✅ No session lost, queued writes kept committing during the upload")
+
+        path = write_results("bulk_concurrency", {
+            "meta": run_metadata(rows=args.rows, seconds=args.seconds, max_wait_ms=args.max_wait_ms,
+                                 chunk_size=nurova.BULK_CHUNK_SIZE),
+            "results": res,
+            "failures": failures,
+        }, args.json)
+        print(f"📁 {path}")
+        if failures:
+            raise SystemExit(1)
+    finally:
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
@@ -0,0 +1,112 @@
+"""
+Nurova 2.0 — Bulk session ingestion benchmark
+Uploads the same N sessions to a scratch database four ways through the
+Flask test client and reports rows/second, checking every row landed:
+  loop         one POST /log_session per row (write-behind queue)
+  loop-durable one POST /log_session?durable=1 per row
+  ndjson       POST /log_session/bulk, application/x-ndjson body
+  array        POST /log_session/bulk, JSON array body
+Fails if bulk NDJSON is less than --min-speedup (default 10) times the
+/log_session loop's rows/second.
+
+Run: python benchmarks/bench_bulk_ingest.py --rows 20000
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-bulk-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "bench.db")
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+from common import PayloadFactory, run_metadata, write_results  # noqa: E402
+import app as nurova  # noqa: E402
+
+
+def count_rows():
+    nurova.store.flush()
+    with nurova.store.connection() as conn:
+        return conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+
+
+def encode(sessions, mode, batch):
+    """Request bodies, built up front so only the server side is timed"""
+    if mode.startswith("loop"):
+        return [json.dumps(s) for s in sessions]
+    chunks = [sessions[i:i + batch] for i in range(0, len(sessions), batch)]
+    if mode == "ndjson":
+        return ["\n".join(json.dumps(s) for s in chunk) for chunk in chunks]
+    return [json.dumps(chunk) for chunk in chunks]
+
+
+def run_loop(client, bodies, durable):
+    path = "/log_session?durable=1" if durable else "/log_session"
+    for body in bodies:
+        client.post(path, data=body, content_type="application/json")
+    nurova.store.flush()
+
+
+def run_bulk(client, bodies, mode):
+    content_type = "application/x-ndjson" if mode == "ndjson" else "application/json"
+    for data in bodies:
+        resp = client.post("/log_session/bulk", data=data, content_type=content_type)
+        body = resp.get_json()
+        if resp.status_code != 200 or body["rejected"]:
+            raise RuntimeError(f"bulk upload failed: {resp.status_code} {body}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--batch", type=int, default=10000, help="sessions per bulk upload")
+    parser.add_argument("--min-speedup", type=float, default=10.0,
+                        help="fail below this bulk NDJSON / loop rows-per-second ratio")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    try:
+        client = nurova.app.test_client()
+        factory = PayloadFactory()
+        sessions = [factory.session() for _ in range(args.rows)]
+
+        results = {}
+        print(f"{'mode':<14} {'rows':>8} {'seconds':>9} {'rows/s':>10}")
+        for mode in ("loop", "loop-durable", "ndjson", "array"):
+            bodies = encode(sessions, mode, args.batch)
+            before = count_rows()
+            t0 = time.perf_counter()
+            if mode.startswith("loop"):
+                run_loop(client, bodies, durable=mode == "loop-durable")
+            else:
+                run_bulk(client, bodies, mode)
+            elapsed = time.perf_counter() - t0
+            landed = count_rows() - before
+            if landed != len(sessions):
+                raise SystemExit(f"{mode}: {landed} of {len(sessions)} rows landed")
+            results[mode] = {"rows": landed, "seconds": round(elapsed, 3),
+                             "rows_per_s": round(landed / elapsed, 1)}
+            r = results[mode]
+            print(f"{mode:<14} {r['rows']:>8} {r['seconds']:>9} {r['rows_per_s']:>10}")
+
+        speedup = round(results["ndjson"]["rows_per_s"] / results["loop"]["rows_per_s"], 1)
+        print(f"Bulk NDJSON vs /log_session loop: {speedup}x")
+        path = write_results("bulk_ingest", {
+            "meta": run_metadata(rows=args.rows, batch=args.batch, chunk_size=nurova.BULK_CHUNK_SIZE),
+            "results": results,
+            "speedup_vs_loop": speedup,
+        }, args.json)
+        print(f"📁 {path}")
+        if speedup < args.min_speedup:
+            raise SystemExit(f"❌ bulk NDJSON only {speedup}x the loop (target {args.min_speedup}x)")
+    finally:
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
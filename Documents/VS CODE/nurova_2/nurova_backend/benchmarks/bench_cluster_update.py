@@ -0,0 +1,113 @@
+"""
+Nurova 2.0 — Incremental cluster update benchmark
+Grows a scratch session database to each --history size, brings a scratch
+copy of the cluster model up to date (checkpoint at the newest session),
+then logs --new more sessions and times the incremental update that folds
+them in. The update should cost the same at every history size, since it
+only reads sessions after the checkpoint. Also reports centroid drift and
+users that changed cluster per update, and a full refit's time for scale.
+
+Run: python benchmarks/bench_cluster_update.py --history 10000,100000,500000 --new 5000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-cluster-update-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "bench.db")
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+from common import BACKEND_DIR, PayloadFactory, run_metadata, write_results  # noqa: E402
+import app as nurova  # noqa: E402
+from model_registry import ARTIFACTS  # noqa: E402
+import train_models  # noqa: E402
+
+
+def scratch_models():
+    dest = os.path.join(TMP, "models")
+    os.makedirs(dest)
+    for name in ARTIFACTS:
+        src = os.path.join(BACKEND_DIR, "models", name)
+        if os.path.isdir(src):
+            shutil.copytree(src, os.path.join(dest, name))
+        elif os.path.exists(src):
+            shutil.copy2(src, os.path.join(dest, name))
+    return dest
+
+
+def log_sessions(factory, n, batch=10000):
+    now = datetime.utcnow().isoformat()
+    with nurova.store.bulk_insert() as insert:
+        for start in range(0, n, batch):
+            insert([nurova._bulk_session_row(factory.session(), now) for _ in range(min(batch, n - start))])
+
+
+def refit_seconds():
+    """Full KMeans refit (the only refresh path before) on every logged session"""
+    import pandas as pd
+    from sklearn.cluster import KMeans
+    from sklearn.preprocessing import StandardScaler
+    from session_store import CLUSTER_SESSIONS_QUERY
+
+    with nurova.store.connection() as conn:
+        rows = conn.execute(CLUSTER_SESSIONS_QUERY, (0, 2 ** 62)).fetchall()
+    t0 = time.perf_counter()
+    X = StandardScaler().fit_transform(pd.DataFrame([r[1:] for r in rows]))
+    KMeans(n_clusters=4, random_state=42, n_init=10, max_iter=300).fit(X)
+    return round(time.perf_counter() - t0, 3)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--history", default="10000,100000,500000", help="sessions already folded in")
+    parser.add_argument("--new", type=int, default=5000, help="sessions logged since the last update")
+    parser.add_argument("--refit", action="store_true", help="also time a full KMeans refit at each size")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    try:
+        factory = PayloadFactory()
+        models_dir = scratch_models()
+        db_path = os.environ["NUROVA_DB_PATH"]
+        logged, results = 0, []
+        print(f"{'history':>9} {'new':>7} {'update s':>9} {'µs/session':>11} {'max drift σ':>12} "
+              f"{'users changed':>14} {'refit s':>8}")
+        for history in [int(x) for x in args.history.split(",")]:
+            log_sessions(factory, history - logged)
+            train_models.update_clusters(db_path, models_dir)
+            log_sessions(factory, args.new)
+            logged = history + args.new
+
+            report = train_models.update_clusters(db_path, models_dir)
+            res = {
+                "history": history,
+                "new": report["sessions"],
+                "seconds": report["seconds"],
+                "us_per_session": round(report["seconds"] / max(report["sessions"], 1) * 1e6, 1),
+                "max_drift_scaled": max(d["shift_scaled"] for d in report["drift"].values()),
+                "users_seen": report["users_seen"],
+                "users_changed": report["users_changed"],
+                "refit_seconds": refit_seconds() if args.refit else None,
+            }
+            results.append(res)
+            print(f"{history:>9} {res['new']:>7} {res['seconds']:>9} {res['us_per_session']:>11} "
+                  f"{res['max_drift_scaled']:>12.4f} {res['users_changed']:>6}/{res['users_seen']:<7} "
+                  f"{res['refit_seconds'] if args.refit else '-':>8}")
+
+        path = write_results("cluster_update", {
+            "meta": run_metadata(history=args.history, new=args.new),
+            "results": results,
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
@@ -0,0 +1,322 @@
+"""
+Nurova 2.0 — Concurrency stress test
+Replays one fixed request mix covering every endpoint twice, each time on a
+fresh scratch database seeded the same way: serially, then from --threads
+threads at once (in-process through the Flask test client, or with --gunicorn
+against threaded gunicorn workers). Fails unless:
+  - every read response matches the serial run exactly ("timestamp" aside);
+    writes, /analytics, /health and /metrics only need the same status
+  - no request errored and no session was lost: session counts, per-user
+    feature statistics, daily rollups and risk trends match the serial
+    run (order-dependent EWMA fields and float sums to 1e-9 relative)
+
+Run: python benchmarks/bench_concurrency.py --threads 16 --requests 3000
+     python benchmarks/bench_concurrency.py --gunicorn --workers 2 --gunicorn-threads 8
+"""
+
+import os
+import sys
+import json
+import time
+import queue
+import shutil
+import sqlite3
+import argparse
+import tempfile
+import warnings
+import threading
+import subprocess
+import http.client
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-concurrency-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "import.db")
+os.environ["YOUTUBE_API_KEY"] = "YOUR_YOUTUBE_API_KEY_HERE"
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+from common import BACKEND_DIR, TREND_USERS, PayloadFactory, run_metadata, write_results  # noqa: E402
+from bench_endpoints import _free_port  # noqa: E402
+import app as nurova  # noqa: E402
+from session_store import SessionStore  # noqa: E402
+
+WRITERS = [f"writer-{i}" for i in range(40)]
+BULK_WRITERS = [f"bulk-writer-{i}" for i in range(10)]
+SEED_START = datetime(2026, 1, 5)
+REL_TOL = 1e-9
+
+# Fields of user_trend that depend on the order sessions arrive in. WRITERS log
+# through /log_session, stamped with the server's clock, so for them only the
+# session count is comparable between runs.
+ORDER_DEPENDENT = ("last_at", "last_risk", "ewma_risk", "ewma_screen_time")
+
+
+# ─────────────────────────────────────────────
+# Request mix
+# ─────────────────────────────────────────────
+
+def seed_sessions(factory):
+    """Identical history for the users the read endpoints look up"""
+    return [{**factory.session(u), "created_at": (SEED_START + timedelta(hours=i + 7 * j)).isoformat()}
+            for i, u in enumerate(TREND_USERS) for j in range(6)]
+
+
+def request_mix(n, seed=7):
+    """[(name, method, path, body bytes, content type, compare)]; compare is "body" or "status" """
+    f = PayloadFactory(seed)
+    rng = f.rng
+    ndjson = "application/x-ndjson"
+
+    def bulk(user):
+        t = SEED_START + timedelta(minutes=rng.randint(0, 60 * 24 * 30))
+        return [{**f.session(user), "created_at": (t + timedelta(minutes=5 * k)).isoformat()} for k in range(5)]
+
+    kinds = [
+        lambda: ("predict_distraction", "POST", "/predict_distraction", f.predict(), None, "body"),
+        lambda: ("predict_batch", "POST", "/predict_distraction/batch", f.batch(20), None, "body"),
+        lambda: ("predict_stream", "POST", "/predict_distraction/stream",
+                 "\n".join(json.dumps(r) for r in f.batch(20)), ndjson, "body"),
+        lambda: ("personality_history", "POST", "/get_personality",
+                 {"usage_history": f.batch(rng.randint(1, 8))}, None, "body"),
+        lambda: ("personality_user", "POST", "/get_personality", {"user_id": rng.choice(TREND_USERS)}, None, "body"),
+        lambda: ("personality_batch", "POST", "/get_personality/batch",
+                 {"items": f.batch(10), "user_ids": rng.sample(TREND_USERS, 5) + ["nobody"]}, None, "body"),
+        lambda: ("recommend_content", "GET", "/recommend_content?" + f.recommend_query(), None, None, "body"),
+        lambda: ("risk_trend", "GET", f"/risk_trend?user_id={rng.choice(TREND_USERS)}", None, None, "body"),
+        lambda: ("log_session", "POST", "/log_session", f.session(rng.choice(WRITERS)), None, "status"),
+        lambda: ("log_session_durable", "POST", "/log_session?durable=1",
+                 f.session(rng.choice(WRITERS)), None, "status"),
+        lambda: ("log_session_bulk", "POST", "/log_session/bulk", bulk(rng.choice(BULK_WRITERS)), None, "body"),
+        lambda: ("analytics", "GET", "/analytics?days=7", None, None, "status"),
+        lambda: ("health", "GET", "/health", None, None, "status"),
+        lambda: ("metrics_prometheus", "GET", "/metrics/prometheus", None, None, "status"),
+    ]
+    mix = []
+    for i in range(n):
+        name, method, path, body, content_type, compare = kinds[i % len(kinds)]()
+        if body is not None and not isinstance(body, str):
+            body = json.dumps(body)
+        mix.append((name, method, path, body.encode() if body is not None else None,
+                    content_type or "application/json", compare))
+    return mix
+
+
+def normalize(status, body, compare):
+    if compare == "status":
+        return status
+    lines = [json.loads(line) for line in body.decode().splitlines() if line.strip()]
+    for obj in lines:
+        if isinstance(obj, dict):
+            obj.pop("timestamp", None)
+    return status, lines
+
+
+# ─────────────────────────────────────────────
+# Transports
+# ─────────────────────────────────────────────
+
+class InProcess:
+    def __init__(self):
+        self._local = threading.local()
+
+    def request(self, method, path, body, content_type):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            client = self._local.client = nurova.app.test_client()
+        resp = client.open(path, method=method, data=body, content_type=content_type)
+        return resp.status_code, resp.get_data()
+
+
+class Http:
+    def __init__(self, port):
+        self.port = port
+
+    def request(self, method, path, body, content_type):
+        conn = http.client.HTTPConnection("127.0.0.1", self.port, timeout=60)
+        try:
+            conn.request(method, path, body=body, headers={"Content-Type": content_type} if body else {})
+            resp = conn.getresponse()
+            return resp.status, resp.read()
+        finally:
+            conn.close()
+
+
+def use_store(db_path):
+    """Point the in-process app at a fresh database, with cold caches"""
+    nurova.store.close()
+    nurova.store = SessionStore(db_path)
+    nurova.store.init_schema()
+    nurova.response_cache.clear()
+
+
+def run_serial(transport, mix):
+    out = []
+    t0 = time.perf_counter()
+    for _, method, path, body, content_type, compare in mix:
+        out.append(normalize(*transport.request(method, path, body, content_type), compare))
+    return out, time.perf_counter() - t0
+
+
+def run_concurrent(transport, mix, threads):
+    out = [None] * len(mix)
+    todo = queue.Queue()
+    for i in range(len(mix)):
+        todo.put(i)
+
+    def worker():
+        while True:
+            try:
+                i = todo.get_nowait()
+            except queue.Empty:
+                return
+            _, method, path, body, content_type, compare = mix[i]
+            try:
+                out[i] = normalize(*transport.request(method, path, body, content_type), compare)
+            except Exception as e:
+                out[i] = f"{type(e).__name__}: {e}"
+
+    pool = [threading.Thread(target=worker) for _ in range(threads)]
+    t0 = time.perf_counter()
+    for t in pool:
+        t.start()
+    for t in pool:
+        t.join()
+    return out, time.perf_counter() - t0
+
+
+def start_gunicorn(db_path, workers, threads):
+    port = _free_port()
+    env = {**os.environ, "PORT": str(port), "NUROVA_DB_PATH": db_path, "WEB_CONCURRENCY": str(workers),
+           "GUNICORN_THREADS": str(threads), "PYTHONWARNINGS": "ignore"}
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    transport = Http(port)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if transport.request("GET", "/health", None, "")[0] == 200:
+                return proc, transport
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not become healthy within 60 s")
+
+
+# ─────────────────────────────────────────────
+# Final state
+# ─────────────────────────────────────────────
+
+def db_state(db_path):
+    conn = sqlite3.connect(db_path)
+    try:
+        trend_cols = [r[1] for r in conn.execute("PRAGMA table_info(user_trend)")]
+        return {
+            "sessions": conn.execute("SELECT COUNT(*) FROM sessions").fetchall(),
+            "user_stats": conn.execute("SELECT * FROM user_stats ORDER BY user_id, feature").fetchall(),
+            "daily_rollups": conn.execute("SELECT * FROM daily_rollups ORDER BY day").fetchall(),
+            "daily_cluster_rollups": conn.execute(
+                "SELECT * FROM daily_cluster_rollups ORDER BY day, cluster").fetchall(),
+            "user_trend": [
+                (row[0], row[trend_cols.index("sessions")]) if row[0] in WRITERS else
+                tuple(v for c, v in zip(trend_cols, row) if c not in ORDER_DEPENDENT)
+                for row in conn.execute("SELECT * FROM user_trend ORDER BY user_id")
+            ],
+        }
+    finally:
+        conn.close()
+
+
+def same_value(a, b):
+    if isinstance(a, float) or isinstance(b, float):
+        return abs(a - b) <= REL_TOL * max(abs(a), abs(b), 1.0)
+    return a == b
+
+
+def state_mismatches(expected, actual):
+    bad = {}
+    for table, rows in expected.items():
+        other = actual[table]
+        n = abs(len(rows) - len(other)) + sum(
+            len(r) != len(o) or not all(same_value(a, b) for a, b in zip(r, o)) for r, o in zip(rows, other))
+        if n:
+            bad[table] = n
+    return bad
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--threads", type=int, default=16, help="client threads in the concurrent run")
+    parser.add_argument("--gunicorn", action="store_true", help="run the concurrent pass against gunicorn")
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--gunicorn-threads", type=int, default=8, help="threads per gunicorn worker")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    proc = None
+    try:
+        mix = request_mix(args.requests)
+        seed = json.dumps(seed_sessions(PayloadFactory(3))).encode()
+
+        serial_db = os.path.join(TMP, "serial.db")
+        use_store(serial_db)
+        local = InProcess()
+        local.request("POST", "/log_session/bulk", seed, "application/json")
+        serial, serial_s = run_serial(local, mix)
+        nurova.store.close()
+
+        concurrent_db = os.path.join(TMP, "concurrent.db")
+        if args.gunicorn:
+            proc, transport = start_gunicorn(concurrent_db, args.workers, args.gunicorn_threads)
+        else:
+            use_store(concurrent_db)
+            transport = local
+        transport.request("POST", "/log_session/bulk", seed, "application/json")
+        concurrent, concurrent_s = run_concurrent(transport, mix, args.threads)
+        if proc is not None:
+            proc.terminate()     # workers commit their write-behind queues on exit
+            proc.wait(30)
+            proc = None
+        else:
+            nurova.store.close()
+
+        by_endpoint = {}
+        for (name, *_), expected, got in zip(mix, serial, concurrent):
+            stats = by_endpoint.setdefault(name, {"requests": 0, "mismatches": 0})
+            stats["requests"] += 1
+            stats["mismatches"] += expected != got
+        errors = sum(isinstance(r, str) or (r if isinstance(r, int) else r[0]) >= 500 for r in concurrent)
+        state = state_mismatches(db_state(serial_db), db_state(concurrent_db))
+        response_mismatches = sum(s["mismatches"] for s in by_endpoint.values())
+
+        mode = (f"gunicorn {args.workers} workers × {args.gunicorn_threads} threads" if args.gunicorn
+                else "in-process")
+        print(f"{len(mix)} requests, {args.threads} client threads, {mode}")
+        print(f"{'endpoint':<22} {'requests':>9} {'mismatches':>11}")
+        for name, s in by_endpoint.items():
+            print(f"{name:<22} {s['requests']:>9} {s['mismatches']:>11}")
+        print(f"Serial {len(mix) / serial_s:,.0f} req/s | concurrent {len(mix) / concurrent_s:,.0f} req/s")
+        print(f"{'✅' if not (errors or response_mismatches or state) else '❌'} errors {errors}, "
+              f"response mismatches {response_mismatches}, database mismatches {state or 0}")
+
+        path = write_results("concurrency", {
+            "meta": run_metadata(requests=args.requests, threads=args.threads, mode=mode),
+            "endpoints": by_endpoint,
+            "errors": errors,
+            "response_mismatches": response_mismatches,
+            "database_mismatches": state,
+            "serial_rps": round(len(mix) / serial_s, 1),
+            "concurrent_rps": round(len(mix) / concurrent_s, 1),
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(30)
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
+
+    if errors or response_mismatches or state:
+        raise SystemExit(1)
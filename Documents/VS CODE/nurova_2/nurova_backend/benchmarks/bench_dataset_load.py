@@ -0,0 +1,126 @@
+"""
+Nurova 2.0 — Dataset loading benchmark
+Writes an N-row synthetic training CSV to a temp dir, converts it to the
+columnar format, checks both hold identical values, then loads it each way in
+a fresh child process:
+  csv        pandas.read_csv (what training used to do)
+  columnar   load_dataset (memory-mapped) + one full pass over every column
+
+Reports wall time and private (anonymous) memory growth; mapped file pages
+are page cache, shared across processes and not counted.
+
+Run: python benchmarks/bench_dataset_load.py --rows 2000000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import multiprocessing as mp
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import run_metadata, write_results  # noqa: E402
+from columnar import csv_to_dataset, load_dataset  # noqa: E402
+
+
+def write_csv(path, rows, seed=42, chunk=500_000):
+    rng = np.random.RandomState(seed)
+    for start in range(0, rows, chunk):
+        n = min(chunk, rows - start)
+        pd.DataFrame({
+            "daily_screen_time": rng.uniform(2, 16, n),
+            "distraction_frequency": rng.randint(0, 51, n),
+            "mood_score": rng.randint(1, 11, n),
+            "goal_alignment_score": rng.uniform(0, 1, n),
+            "task_completion_rate": rng.uniform(0, 1, n),
+            "time_of_day": rng.randint(0, 24, n),
+            "hour_of_session": rng.uniform(0, 24, n),
+            "distraction_risk": rng.randint(0, 2, n),
+        }).to_csv(path, mode="a", header=start == 0, index=False)
+
+
+def _anon_kb():
+    with open("/proc/self/status") as f:
+        for line in f:
+            if line.startswith("RssAnon:"):
+                return int(line.split()[1])
+    return 0
+
+
+def _load_csv(path):
+    df = pd.read_csv(path)
+    return df, float(sum(df[c].sum() for c in df.columns))
+
+
+def _load_columnar(path):
+    ds = load_dataset(path)
+    return ds, float(sum(ds[c].sum() for c in ds.columns))
+
+
+def _measure(fn, path, out):
+    before = _anon_kb()
+    t0 = time.perf_counter()
+    data, checksum = fn(path)    # keep the data alive while memory is sampled
+    elapsed = time.perf_counter() - t0
+    out.put({"seconds": round(elapsed, 4),
+             "anon_mb": round((_anon_kb() - before) / 1024, 1),
+             "checksum": checksum})
+    del data
+
+
+def measure(fn, path):
+    ctx = mp.get_context("fork")
+    out = ctx.Queue()
+    p = ctx.Process(target=_measure, args=(fn, path, out))
+    p.start()
+    res = out.get()
+    p.join()
+    return res
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nurova-dataset-")
+    try:
+        csv_path = os.path.join(tmp, "data.csv")
+        ds_path = os.path.join(tmp, "data")
+        print(f"📝 Writing {args.rows:,}-row CSV...")
+        write_csv(csv_path, args.rows)
+
+        t0 = time.perf_counter()
+        csv_to_dataset(csv_path, ds_path)
+        convert_s = round(time.perf_counter() - t0, 3)
+
+        ds = load_dataset(ds_path)
+        ref = pd.read_csv(csv_path, float_precision="round_trip")
+        mismatched = [c for c in ref.columns if not np.array_equal(ref[c].to_numpy(), ds[c])]
+        del ref, ds
+        print(f"✅ Converted in {convert_s}s | columns with mismatches: {mismatched or 'none'}")
+
+        results = {"csv": measure(_load_csv, csv_path), "columnar": measure(_load_columnar, ds_path)}
+        print(f"{'loader':<10} {'seconds':>10} {'private MB':>12}")
+        for name, r in results.items():
+            print(f"{name:<10} {r['seconds']:>10} {r['anon_mb']:>12}")
+
+        payload = {
+            "meta": run_metadata(rows=args.rows),
+            "convert_seconds": convert_s,
+            "mismatched_columns": mismatched,
+            "csv_bytes": os.path.getsize(csv_path),
+            "results": results,
+        }
+        print(f"📁 {write_results('dataset_load', payload, args.json)}")
+        if mismatched:
+            raise SystemExit(1)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
@@ -0,0 +1,163 @@
+"""
+Nurova 2.0 — Response encoding benchmark
+For each endpoint, one request per format through the in-process app, then:
+  bytes     on the wire: today's body (stdlib json via jsonify), JSON
+            (orjson) plain / gzip / brotli, MessagePack plain / brotli
+  encode µs stdlib json, orjson and msgpack on the endpoint's response
+            object, and gzip / brotli on the JSON body
+MessagePack responses must decode to the JSON ones (minus timestamps);
+/recommend_content items must be the compact subset of the JSON items.
+
+Run: python benchmarks/bench_encoding.py --batch 100
+"""
+
+import os
+import sys
+import json
+import time
+import argparse
+import tempfile
+import statistics
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import BACKEND_DIR, TREND_USERS, PayloadFactory, run_metadata, write_results  # noqa: E402
+
+warnings.filterwarnings("ignore")
+
+MSGPACK = {"Accept": "application/msgpack"}
+
+
+def specs(payloads, batch):
+    """name → (method, path, json_body); one fixed request per endpoint"""
+    return {
+        "health": ("GET", "/health", None),
+        "metrics": ("GET", "/metrics", None),
+        "predict_distraction": ("POST", "/predict_distraction", payloads.predict()),
+        f"predict_distraction_batch{batch}": ("POST", "/predict_distraction/batch", payloads.batch(batch)),
+        "get_personality": ("POST", "/get_personality", payloads.personality()),
+        "recommend_content": ("GET", "/recommend_content?query=DSA&risk_level=medium&cluster=StressScroller", None),
+        "analytics": ("GET", "/analytics?days=30", None),
+        "risk_trend": ("GET", f"/risk_trend?user_id={TREND_USERS[0]}", None),
+    }
+
+
+def per_call_us(fn, n=200, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        for _ in range(n):
+            fn()
+        runs.append(time.perf_counter() - t0)
+    return round(statistics.median(runs) / n * 1e6, 1)
+
+
+def stdlib_jsonify(obj):
+    # What jsonify produced before: DefaultJSONProvider, compact separators
+    return json.dumps(obj, ensure_ascii=True, sort_keys=True, separators=(",", ":")).encode()
+
+
+def without_timestamp(obj):
+    return {k: v for k, v in obj.items() if k != "timestamp"} if isinstance(obj, dict) else obj
+
+
+def check_compact(full, compact):
+    """Every compact item is a subset of its full item, and the duration string is recoverable"""
+    for f, c in zip(full, compact):
+        if any(f[k] != v for k, v in c.items()):
+            return False
+        if c.get("duration", f"{c.get('duration_mins')} min") != f["duration"]:
+            return False
+    return len(full) == len(compact)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--batch", type=int, default=100, help="rows in the /predict_distraction/batch request")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    os.environ["NUROVA_DB_PATH"] = db_path
+    os.environ["YOUTUBE_API_KEY"] = "YOUR_YOUTUBE_API_KEY_HERE"
+    os.chdir(BACKEND_DIR)
+    import app as nurova
+    import response_encoding as enc
+
+    if enc.orjson is None or enc.msgpack is None or enc.brotli is None:
+        raise SystemExit("bench_encoding needs orjson, msgpack and brotli (pip install -r requirements.txt)")
+
+    payloads = PayloadFactory()
+    client = nurova.app.test_client()
+    results, failures = [], []
+    try:
+        nurova.preload_models()
+        for user_id in TREND_USERS:
+            for _ in range(5):
+                client.post("/log_session?durable=1", json=payloads.session(user_id))
+
+        for name, (method, path, body) in specs(payloads, args.batch).items():
+            def fetch(headers, path=path, method=method, body=body):
+                return client.open(path, method=method, json=body, headers=headers)
+
+            as_json = fetch({})
+            as_msgpack = fetch(MSGPACK)
+            wire = {
+                "json": len(as_json.data),
+                "json_gzip": len(fetch({"Accept-Encoding": "gzip"}).data),
+                "json_br": len(fetch({"Accept-Encoding": "br"}).data),
+                "msgpack": len(as_msgpack.data),
+                "msgpack_br": len(fetch({**MSGPACK, "Accept-Encoding": "br"}).data),
+            }
+            obj = json.loads(as_json.data)
+            packed_obj = enc.decode(as_msgpack.data, "msgpack")
+            wire["today"] = len(stdlib_jsonify(obj))
+
+            if as_msgpack.mimetype != enc.MSGPACK_MIMETYPE:
+                failures.append(f"{name}: MessagePack not negotiated ({as_msgpack.mimetype})")
+            elif name == "recommend_content":
+                if not check_compact(obj, packed_obj):
+                    failures.append(f"{name}: compact items differ from the JSON items")
+            elif name not in ("health", "metrics") and without_timestamp(packed_obj) != without_timestamp(obj):
+                failures.append(f"{name}: MessagePack body differs from JSON")
+
+            json_body = as_json.data
+            encode_us = {
+                "stdlib": per_call_us(lambda obj=obj: stdlib_jsonify(obj)),
+                "orjson": per_call_us(lambda obj=obj: enc.encode(obj, "json")),
+                "msgpack": per_call_us(lambda packed_obj=packed_obj: enc.encode(packed_obj, "msgpack")),
+                "gzip": per_call_us(lambda json_body=json_body: enc.compress(json_body, "gzip"), n=50),
+                "br": per_call_us(lambda json_body=json_body: enc.compress(json_body, "br"), n=50),
+            }
+            results.append({"endpoint": name, "bytes": wire, "encode_us": encode_us})
+    finally:
+        nurova.store.close()
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    print(f"\n{'':>30} {'bytes on the wire':^47} {'encode µs':^39}")
+    print(f"{'endpoint':>30} {'today':>7} {'json':>7} {'gzip':>7} {'br':>7} {'mpack':>7} {'mp+br':>7} "
+          f"{'stdlib':>7} {'orjson':>7} {'mpack':>7} {'gzip':>7} {'br':>7}")
+    for r in results:
+        b, e = r["bytes"], r["encode_us"]
+        print(f"{r['endpoint']:>30} {b['today']:>7} {b['json']:>7} {b['json_gzip']:>7} {b['json_br']:>7} "
+              f"{b['msgpack']:>7} {b['msgpack_br']:>7} {e['stdlib']:>7} {e['orjson']:>7} {e['msgpack']:>7} "
+              f"{e['gzip']:>7} {e['br']:>7}")
+    print(f"(gzip / br only above NUROVA_COMPRESS_MIN_BYTES={enc.COMPRESS_MIN_BYTES})")
+    for failure in failures:
+        print(f"❌ {failure}")
+    if not failures:
+        print("✅ MessagePack bodies match the JSON ones")
+
+    path = write_results("encoding", {
+        "meta": run_metadata(batch=args.batch, compress_min_bytes=enc.COMPRESS_MIN_BYTES,
+                             gzip_level=enc.GZIP_LEVEL, brotli_quality=enc.BROTLI_QUALITY),
+        "results": results,
+        "failures": failures,
+    }, args.json)
+    print(f"📁 {path}")
+    if failures:
+        raise SystemExit(1)
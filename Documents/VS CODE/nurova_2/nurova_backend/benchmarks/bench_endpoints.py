@@ -0,0 +1,234 @@
+"""
+Nurova 2.0 — endpoint load test / micro-benchmark suite
+Drives every Flask endpoint with realistic payloads generated from
+dataset/synthetic_data.csv and reports p50/p95/p99 latency, throughput and
+(in-process only) per-request Python allocations, as JSON for comparison.
+
+  python benchmarks/bench_endpoints.py                       # in-process (Flask test client)
+  python benchmarks/bench_endpoints.py --mode gunicorn --workers 2
+  python benchmarks/bench_endpoints.py --mode gunicorn --threads 1 --concurrency 16   # sync workers
+  python benchmarks/bench_endpoints.py --compare benchmarks/results/endpoints-inprocess-<ts>.json
+
+Each run uses a scratch SQLite database and no YouTube key, so it is
+reproducible offline and never touches nurova.db.
+"""
+
+import os
+import sys
+import json
+import time
+import socket
+import tempfile
+import argparse
+import threading
+import subprocess
+import http.client
+import tracemalloc
+import warnings
+
+from common import BACKEND_DIR, TREND_USERS, PayloadFactory, latency_summary, run_metadata, write_results
+
+warnings.filterwarnings("ignore")
+
+
+def endpoint_specs(payloads):
+    """name → callable returning (method, path, json_body) for one request"""
+    return {
+        "health": lambda: ("GET", "/health", None),
+        "predict_distraction": lambda: ("POST", "/predict_distraction", payloads.predict()),
+        "predict_distraction_batch100": lambda: ("POST", "/predict_distraction/batch", payloads.batch(100)),
+        "get_personality": lambda: ("POST", "/get_personality", payloads.personality()),
+        "recommend_content": lambda: ("GET", "/recommend_content?" + payloads.recommend_query(), None),
+        "log_session": lambda: ("POST", "/log_session", payloads.session()),
+        "analytics": lambda: ("GET", "/analytics?days=7", None),
+        "risk_trend": lambda: ("GET", "/risk_trend?" + payloads.trend_query(), None),
+    }
+
+
+# ─────────────────────────────────────────────
+# Transports
+# ─────────────────────────────────────────────
+
+class InProcessTransport:
+    def __init__(self, flask_app):
+        self.client = flask_app.test_client()
+
+    def request(self, method, path, body):
+        resp = self.client.open(path, method=method, json=body)
+        return resp.status_code
+
+
+class HttpTransport:
+    def __init__(self, host, port):
+        self.host, self.port = host, port
+
+    def request(self, method, path, body):
+        conn = http.client.HTTPConnection(self.host, self.port, timeout=30)
+        try:
+            data = json.dumps(body).encode() if body is not None else None
+            headers = {"Content-Type": "application/json"} if data is not None else {}
+            conn.request(method, path, body=data, headers=headers)
+            resp = conn.getresponse()
+            resp.read()
+            return resp.status
+        finally:
+            conn.close()
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_gunicorn(db_path, workers, threads=4):
+    port = _free_port()
+    env = {**os.environ, "PORT": str(port), "NUROVA_DB_PATH": db_path,
+           "WEB_CONCURRENCY": str(workers), "GUNICORN_THREADS": str(threads),
+           "YOUTUBE_API_KEY": "YOUR_YOUTUBE_API_KEY_HERE", "PYTHONWARNINGS": "ignore"}
+    proc = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+        cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+    transport = HttpTransport("127.0.0.1", port)
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        try:
+            if transport.request("GET", "/health", None) == 200:
+                return proc, transport
+        except OSError:
+            time.sleep(0.1)
+    proc.terminate()
+    raise RuntimeError("gunicorn did not become healthy within 60 s")
+
+
+# ─────────────────────────────────────────────
+# Measurement
+# ─────────────────────────────────────────────
+
+def measure(transport, make_request, n, concurrency):
+    latencies, errors = [], 0
+    lock = threading.Lock()
+    per_thread = max(1, n // concurrency)
+
+    def worker():
+        nonlocal errors
+        local, local_err = [], 0
+        for _ in range(per_thread):
+            method, path, body = make_request()
+            t0 = time.perf_counter()
+            status = transport.request(method, path, body)
+            local.append(time.perf_counter() - t0)
+            local_err += status >= 400
+        with lock:
+            latencies.extend(local)
+            errors += local_err
+
+    threads = [threading.Thread(target=worker) for _ in range(concurrency)]
+    t0 = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    res = latency_summary(latencies, time.perf_counter() - t0)
+    res["errors"] = errors
+    return res
+
+
+def measure_allocations(transport, make_request, n):
+    """Mean peak traced bytes and net retained bytes per request (sequential)"""
+    reqs = [make_request() for _ in range(n)]
+    tracemalloc.start()
+    peaks, retained = [], []
+    for method, path, body in reqs:
+        tracemalloc.reset_peak()
+        before, _ = tracemalloc.get_traced_memory()
+        transport.request(method, path, body)
+        current, peak = tracemalloc.get_traced_memory()
+        peaks.append(peak - before)
+        retained.append(current - before)
+    tracemalloc.stop()
+    return {
+        "alloc_peak_kb": round(sum(peaks) / len(peaks) / 1024, 1),
+        "alloc_retained_bytes": round(sum(retained) / len(retained)),
+    }
+
+
+def compare(current, baseline_path):
+    with open(baseline_path) as f:
+        baseline = {r["endpoint"]: r for r in json.load(f)["results"]}
+    print(f"\nΔ vs {os.path.basename(baseline_path)}")
+    for r in current:
+        b = baseline.get(r["endpoint"])
+        if not b:
+            continue
+        deltas = []
+        for key in ("p50_ms", "p99_ms", "throughput_rps"):
+            if b.get(key):
+                deltas.append(f"{key} {100 * (r[key] - b[key]) / b[key]:+.1f}%")
+        print(f"  {r['endpoint']:>30}: " + " | ".join(deltas))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--mode", choices=("inprocess", "gunicorn"), default="inprocess")
+    parser.add_argument("--requests", type=int, default=500, help="measured requests per endpoint")
+    parser.add_argument("--warmup", type=int, default=50)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=2, help="gunicorn workers")
+    parser.add_argument("--threads", type=int, default=4, help="threads per gunicorn worker (1 = sync)")
+    parser.add_argument("--alloc-requests", type=int, default=50)
+    parser.add_argument("--endpoints", help="comma-separated subset")
+    parser.add_argument("--out", help="result JSON path (default benchmarks/results/…)")
+    parser.add_argument("--compare", help="earlier result JSON to diff against")
+    args = parser.parse_args()
+
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    payloads = PayloadFactory()
+    specs = endpoint_specs(payloads)
+    if args.endpoints:
+        specs = {k: v for k, v in specs.items() if k in args.endpoints.split(",")}
+
+    proc = None
+    if args.mode == "inprocess":
+        os.environ["NUROVA_DB_PATH"] = db_path
+        os.environ["YOUTUBE_API_KEY"] = "YOUR_YOUTUBE_API_KEY_HERE"
+        os.chdir(BACKEND_DIR)
+        import app as nurova
+        nurova.preload_models()
+        transport = InProcessTransport(nurova.app)
+    else:
+        proc, transport = start_gunicorn(db_path, args.workers, args.threads)
+
+    results = []
+    try:
+        if "risk_trend" in specs:
+            # /risk_trend 404s for unknown users: commit a session for each queried one
+            for user_id in TREND_USERS:
+                transport.request("POST", "/log_session?durable=1", payloads.session(user_id))
+        print(f"{'endpoint':>30} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9} {'req/s':>9} {'peak KB':>8}")
+        for name, make_request in specs.items():
+            for _ in range(args.warmup):
+                transport.request(*make_request())
+            res = {"endpoint": name, **measure(transport, make_request, args.requests, args.concurrency)}
+            if args.mode == "inprocess" and args.alloc_requests:
+                res.update(measure_allocations(transport, make_request, args.alloc_requests))
+            results.append(res)
+            print(f"{name:>30} {res['p50_ms']:>9} {res['p95_ms']:>9} {res['p99_ms']:>9} "
+                  f"{res['throughput_rps']:>9} {res.get('alloc_peak_kb', '-'):>8}")
+    finally:
+        if proc is not None:
+            proc.terminate()
+            proc.wait(10)
+        for suffix in ("", "-wal", "-shm"):
+            if os.path.exists(db_path + suffix):
+                os.remove(db_path + suffix)
+
+    meta = run_metadata(mode=args.mode, requests=args.requests, concurrency=args.concurrency,
+                        workers=args.workers if args.mode == "gunicorn" else None,
+                        threads=args.threads if args.mode == "gunicorn" else None)
+    path = write_results(f"endpoints-{args.mode}", {"meta": meta, "results": results}, args.out)
+    print(f"\n📁 {path}")
+    if args.compare:
+        compare(results, args.compare)
@@ -0,0 +1,141 @@
+"""
+Nurova 2.0 — Hot model reload under load
+Copies models/ to a temp dir, publishes two versions there, then hammers
+/predict_distraction and /get_personality from several threads while the
+active version is flipped every --interval seconds. Every response carries
+X-Model-Version, so the run checks that:
+  - no request fails or falls back to the heuristic during a swap
+  - every published version actually went live
+  - latency around each swap (±--window ms) matches steady state
+
+Run: python benchmarks/bench_model_reload.py --threads 8 --seconds 10 --interval 1
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import threading
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+from common import BACKEND_DIR, PayloadFactory, latency_summary, run_metadata, write_results  # noqa: E402
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--interval", type=float, default=1.0, help="seconds between version flips")
+    parser.add_argument("--poll", type=float, default=0.1, help="NUROVA_MODEL_POLL_SECONDS for the run")
+    parser.add_argument("--window", type=float, default=250.0, help="ms either side of a swap")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nurova-reload-")
+    models_dir = os.path.join(tmp, "models")
+    shutil.copytree(os.path.join(BACKEND_DIR, "models"), models_dir,
+                    ignore=shutil.ignore_patterns("versions", "manifest.json"))
+    os.environ["NUROVA_MODELS_DIR"] = models_dir
+    os.environ["NUROVA_MODEL_POLL_SECONDS"] = str(args.poll)
+    os.environ["NUROVA_DB_PATH"] = os.path.join(tmp, "bench.db")
+    os.environ.pop("NUROVA_METRICS_DIR", None)
+
+    import app as nurova
+    from model_registry import publish, write_manifest
+
+    versions = [publish(models_dir, "bench-a"), publish(models_dir, "bench-b", activate=False)]
+    nurova.preload_models()
+    client = nurova.app.test_client()
+    payloads = PayloadFactory()
+    fallbacks_before = nurova.runtime_metrics.collect()[0].get(("nurova_distraction_fallback_total", ()), 0)
+
+    records, swaps, errors = [], [], []
+    lock = threading.Lock()
+    stop = threading.Event()
+
+    def worker(i):
+        local = PayloadFactory(seed=100 + i, rows=payloads.rows)
+        while not stop.is_set():
+            if local.rng.random() < 0.7:
+                path, body = "/predict_distraction", local.predict()
+            else:
+                path, body = "/get_personality", local.personality()
+            t0 = time.perf_counter()
+            resp = client.post(path, json=body)
+            t1 = time.perf_counter()
+            with lock:
+                if resp.status_code != 200:
+                    errors.append(resp.status_code)
+                records.append((t0, t1, resp.headers.get("X-Model-Version")))
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(args.threads)]
+    for t in threads:
+        t.start()
+
+    flip = 0
+    while time.perf_counter() - started < args.seconds:
+        time.sleep(args.interval)
+        flip += 1
+        target = versions[flip % 2]
+        write_manifest(models_dir, target)
+        # The swap time is when the first response with the new version appears
+        swaps.append((time.perf_counter(), target))
+    stop.set()
+    for t in threads:
+        t.join()
+    wall = time.perf_counter() - started
+
+    window = args.window / 1000
+    seen_swaps = []
+    for t_flip, target in swaps:
+        first = min((t1 for t0, t1, v in records if v == target and t0 >= t_flip), default=None)
+        if first is not None:
+            seen_swaps.append(first)
+
+    near = [t1 - t0 for t0, t1, _ in records if any(abs(t0 - s) <= window for s in seen_swaps)]
+    steady = [t1 - t0 for t0, t1, _ in records if all(abs(t0 - s) > window for s in seen_swaps)]
+    by_version = {}
+    for _, _, v in records:
+        by_version[v] = by_version.get(v, 0) + 1
+
+    status = nurova.models.status()
+    fallbacks = nurova.runtime_metrics.collect()[0].get(("nurova_distraction_fallback_total", ()), 0) - fallbacks_before
+    result = {
+        "meta": run_metadata(threads=args.threads, seconds=args.seconds, interval=args.interval,
+                             poll=args.poll, window_ms=args.window),
+        "flips": len(swaps),
+        "swaps_observed": len(seen_swaps),
+        "reloads": status["reloads"],
+        "reload_failures": status["reload_failures"],
+        "errors": len(errors),
+        "distraction_fallbacks": fallbacks,
+        "responses_by_version": by_version,
+        "steady": latency_summary(steady, wall),
+        "near_swap": latency_summary(near, wall) if near else None,
+    }
+
+    print(f"flips {result['flips']} | swaps observed {result['swaps_observed']} | "
+          f"reloads {result['reloads']} (failed {result['reload_failures']}) | "
+          f"errors {result['errors']} | fallbacks {fallbacks}")
+    print(f"responses by version: {by_version}")
+    print(f"{'':<10} {'requests':>9} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8} {'max ms':>8}")
+    for name in ("steady", "near_swap"):
+        s = result[name]
+        if s:
+            print(f"{name:<10} {s['requests']:>9} {s['p50_ms']:>8} {s['p95_ms']:>8} {s['p99_ms']:>8} {s['max_ms']:>8}")
+    print(f"📁 {write_results('model_reload', result, args.json)}")
+
+    nurova.store.close()
+    shutil.rmtree(tmp, ignore_errors=True)
+    if errors or fallbacks or result["reload_failures"] or result["swaps_observed"] < len(swaps) - 1:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
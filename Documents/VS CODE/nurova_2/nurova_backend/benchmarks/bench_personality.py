@@ -0,0 +1,137 @@
+"""
+Nurova 2.0 — Batch personality benchmark
+Checks that ClusterEngine.predict (scaler folded into the KMeans centroids)
+returns exactly model.predict(scaler.transform(X)) on:
+  csv       dataset/synthetic_data.csv
+  jitter    --rows resampled dataset rows with Gaussian noise
+  ties      points equidistant from two centroids (midpoints), which only the
+            KMeans tie-breaker settles; "folded only" shows the mismatches
+            without it
+and that /get_personality/batch agrees with one /get_personality per row.
+Then reports rows/second for:
+  per-row   scaler.transform + model.predict per row (the old request path)
+  sklearn   one scaler.transform + model.predict over all rows
+  engine    ClusterEngine.predict over all rows (chunked)
+  endpoint  /get_personality per row vs one /get_personality/batch (items, and user ids)
+
+Run: python benchmarks/bench_personality.py --rows 1000000
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-personality-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "bench.db")
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+
+from common import DATASET_CSV, feature_payload, run_metadata, write_results  # noqa: E402
+from inference import ClusterEngine  # noqa: E402
+import app as nurova  # noqa: E402
+
+
+def midpoints(engine, n, rng):
+    """Raw-space midpoints of every centroid pair (ties in scaled space), with a
+    few ulps of noise so some land a hair either side"""
+    a = engine.arrays
+    centers = a["scaler_mean"] + a["scaler_scale"] * a["centers"]
+    k = len(centers)
+    pairs = [(i, j) for i in range(k) for j in range(i + 1, k)]
+    mids = np.array([(centers[i] + centers[j]) / 2 for i, j in pairs])
+    X = mids[rng.integers(0, len(mids), n)]
+    return X * (1 + rng.normal(0, 1e-15, X.shape) * rng.integers(0, 2, (n, 1)))
+
+
+def rows_per_s(fn, n):
+    t0 = time.perf_counter()
+    fn()
+    return round(n / (time.perf_counter() - t0), 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000, help="rows in the jitter set and the throughput runs")
+    parser.add_argument("--per-row", type=int, default=2000, help="rows timed through the per-row sklearn path")
+    parser.add_argument("--endpoint-rows", type=int, default=5000)
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    try:
+        rng = np.random.default_rng(5)
+        bundle = nurova.models.current()
+        pkg, engine = bundle.cluster_model, bundle.cluster_engine
+        model, scaler, features = pkg["model"], pkg["scaler"], pkg["features"]
+        folded_only = ClusterEngine(engine.meta, engine.arrays)
+
+        def reference(X):
+            return model.predict(scaler.transform(X))
+
+        csv_X = pd.read_csv(DATASET_CSV)[features].to_numpy(dtype=np.float64)
+        jitter_X = csv_X[rng.integers(0, len(csv_X), args.rows)] + rng.normal(0, 0.3, (args.rows, len(features)))
+        ties_X = midpoints(engine, 10_000, rng)
+
+        checks = {}
+        print(f"{'set':<8} {'rows':>9} {'mismatches':>11} {'folded only':>12}")
+        for name, X in (("csv", csv_X), ("jitter", jitter_X), ("ties", ties_X)):
+            ref = reference(X)
+            checks[name] = {"rows": len(X), "mismatches": int((engine.predict(X) != ref).sum()),
+                            "folded_only_mismatches": int((folded_only.predict(X) != ref).sum())}
+            c = checks[name]
+            print(f"{name:<8} {c['rows']:>9} {c['mismatches']:>11} {c['folded_only_mismatches']:>12}")
+
+        client = nurova.app.test_client()
+        payloads = [feature_payload(dict(zip(features + ["hour_of_session"], [*x, 1.0])))
+                    for x in jitter_X[:args.endpoint_rows]]
+        single = [client.post("/get_personality", json={"usage_history": [p]}).get_json()["cluster"]
+                  for p in payloads[:500]]
+        batch = client.post("/get_personality/batch", json={"items": payloads[:500]}).get_json()["results"]
+        endpoint_mismatches = sum(s != b["cluster"] for s, b in zip(single, batch))
+        print(f"/get_personality/batch vs /get_personality: {endpoint_mismatches} mismatches (500 rows)")
+
+        X = jitter_X
+        throughput = {
+            "per_row": rows_per_s(lambda: [reference(X[i:i + 1]) for i in range(args.per_row)], args.per_row),
+            "sklearn": rows_per_s(lambda: reference(X), len(X)),
+            "engine": rows_per_s(lambda: engine.predict(X), len(X)),
+        }
+        print(f"\n{'path':<10} {'rows/s':>14}")
+        for name, value in throughput.items():
+            print(f"{name:<10} {value:>14,.0f}")
+
+        users = [f"cohort-{i}" for i in range(args.endpoint_rows)]
+        with nurova.store.bulk_insert() as insert:
+            insert([{**p, "user_id": u, "risk_prob": 0.5} for p, u in zip(payloads, users)])
+        n = args.endpoint_rows
+        endpoint = {
+            "single_per_row": rows_per_s(
+                lambda: [client.post("/get_personality", json={"usage_history": [p]}) for p in payloads], n),
+            "batch_items": rows_per_s(lambda: client.post("/get_personality/batch", json={"items": payloads}), n),
+            "batch_user_ids": rows_per_s(lambda: client.post("/get_personality/batch", json={"user_ids": users}), n),
+        }
+        for name, value in endpoint.items():
+            print(f"{name:<16} {value:>14,.0f} rows/s")
+
+        path = write_results("personality", {
+            "meta": run_metadata(rows=args.rows, endpoint_rows=args.endpoint_rows),
+            "checks": checks,
+            "endpoint_mismatches": endpoint_mismatches,
+            "throughput_rows_per_s": throughput,
+            "endpoint_rows_per_s": endpoint,
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
+
+    if endpoint_mismatches or any(c["mismatches"] for c in checks.values()):
+        raise SystemExit(1)
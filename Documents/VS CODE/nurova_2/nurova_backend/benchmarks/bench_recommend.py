@@ -0,0 +1,115 @@
+"""
+Nurova 2.0 — recommendation ranking benchmark
+Checks CatalogIndex.recommend returns exactly what the reference per-item
+path (rank_items → score_content) returns, for the built-in catalog and a
+synthetic catalog, then times both. The index path is forced (min_items=0)
+so it is checked and timed even below INDEX_MIN_ITEMS. --sizes times both
+paths over catalog sizes to locate the crossover INDEX_MIN_ITEMS is set from.
+
+Run: python benchmarks/bench_recommend.py --items 5000 --sizes 8,16,32,64,128,256
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from recommender import CONTENT_CATALOG, CLUSTER_BOOSTS, INDEX_MIN_ITEMS, CatalogIndex, rank_items  # noqa: E402
+
+QUERIES = ["", "DSA", "dsa", "design", "a", "ml", "deep work", "python", "—", "zzz", "Productivity"]
+RISK_LEVELS = ["high", "medium", "low", "unknown"]
+CLUSTERS = list(CLUSTER_BOOSTS) + ["Unknown"]
+CATEGORIES = ["DSA", "System Design", "ML/AI", "Productivity", "Mindfulness", "Web Dev"]
+WORDS = ["python", "design", "deep", "work", "focus", "interview", "guide", "patterns",
+         "system", "api", "ml", "crash", "course", "music", "pomodoro", "dsa"]
+
+
+def synthetic_catalog(n, seed=7):
+    rng = random.Random(seed)
+    items = []
+    for i in range(n):
+        dur = rng.randint(3, 60)
+        items.append({
+            "title": " ".join(rng.choice(WORDS) for _ in range(rng.randint(2, 6))).title(),
+            "url": f"https://youtu.be/synthetic{i}",
+            "thumbnail": "", "channel": "Synthetic",
+            "duration": f"{dur} min", "duration_mins": dur,
+            "category": rng.choice(CATEGORIES),
+            "views": rng.choice([500, 5000, 50000, 500000]),
+            "goal_relevance": round(rng.uniform(0.5, 1.0), 2),
+            "user_interest": round(rng.uniform(0.5, 1.0), 2),
+        })
+    return items
+
+
+def check_equivalence(items, index):
+    mismatches = 0
+    for q in QUERIES:
+        for risk in RISK_LEVELS:
+            for cluster in CLUSTERS:
+                if index.recommend(risk, cluster, q, k=8) != rank_items(items, risk, cluster, q, k=8):
+                    mismatches += 1
+    return mismatches
+
+
+def per_request_us(fn, seconds=1.0):
+    n, t0 = 0, time.perf_counter()
+    while time.perf_counter() - t0 < seconds:
+        fn()
+        n += 1
+    return round((time.perf_counter() - t0) / n * 1e6, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", type=int, default=5000)
+    parser.add_argument("--sizes", default="8,16,32,64,128,256", help="catalog sizes for the crossover sweep")
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for name, items in (("builtin", CONTENT_CATALOG), ("synthetic", synthetic_catalog(args.items))):
+        index = CatalogIndex(items, min_items=0)
+        combos = len(QUERIES) * len(RISK_LEVELS) * len(CLUSTERS)
+        mismatches = check_equivalence(items, index)
+        res = {
+            "catalog": name,
+            "items": len(items),
+            "combinations_checked": combos,
+            "mismatches": mismatches,
+            "reference_us": per_request_us(
+                lambda items=items: rank_items(items, "medium", "StressScroller", "design")),
+            "index_us": per_request_us(lambda index=index: index.recommend("medium", "StressScroller", "design")),
+        }
+        results.append(res)
+        print(f"{name:>10} ({len(items):>6} items): {mismatches}/{combos} mismatches | "
+              f"reference {res['reference_us']:>9} µs | index {res['index_us']:>7} µs")
+
+    # Crossover: the index has a fixed NumPy cost, the per-item path grows with the catalog
+    sweep, crossover = [], None
+    print(f"\n{'items':>8} {'reference µs':>13} {'index µs':>9}")
+    for n in (int(x) for x in args.sizes.split(",")):
+        items = synthetic_catalog(n)
+        index = CatalogIndex(items, min_items=0)
+        row = {
+            "items": n,
+            "reference_us": per_request_us(
+                lambda items=items: rank_items(items, "medium", "StressScroller", "design"), 0.5),
+            "index_us": per_request_us(lambda index=index: index.recommend("medium", "StressScroller", "design"), 0.5),
+        }
+        if crossover is None and row["index_us"] < row["reference_us"]:
+            crossover = n
+        sweep.append(row)
+        print(f"{n:>8} {row['reference_us']:>13} {row['index_us']:>9}")
+    print(f"Index faster from {crossover} items" if crossover else "Index never faster in this sweep",
+          f"(INDEX_MIN_ITEMS={INDEX_MIN_ITEMS})")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump({"results": results, "sweep": sweep, "crossover_items": crossover}, f, indent=2)
+    if any(r["mismatches"] for r in results):
+        raise SystemExit(1)
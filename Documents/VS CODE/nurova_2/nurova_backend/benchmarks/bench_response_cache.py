@@ -0,0 +1,110 @@
+"""
+Nurova 2.0 — Response cache benchmark
+Replays the same pool of --distinct payloads per endpoint through the Flask
+test client with the response cache disabled and enabled, checks every cached
+answer matches the uncached one, and times:
+  /predict_distraction      (memoized risk result per feature vector)
+  /get_personality          (memoized cluster per feature vector)
+  /recommend_content        (memoized encoded body, catalog path)
+  /recommend_content 304    (If-None-Match revalidation)
+
+Run: python benchmarks/bench_response_cache.py --requests 5000 --distinct 200
+"""
+
+import os
+import sys
+import time
+import argparse
+import tempfile
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+os.environ.setdefault("NUROVA_DB_PATH", os.path.join(tempfile.mkdtemp(prefix="nurova-rc-"), "bench.db"))
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+from common import PayloadFactory, latency_summary, run_metadata, write_results  # noqa: E402
+import app as nurova  # noqa: E402
+from response_cache import ResponseCache  # noqa: E402
+
+
+def strip_timestamp(body):
+    return {k: v for k, v in body.items() if k != "timestamp"}
+
+
+def replay(client, calls):
+    latencies, answers = [], []
+    t_start = time.perf_counter()
+    for method, path, kwargs in calls:
+        t0 = time.perf_counter()
+        resp = getattr(client, method)(path, **kwargs)
+        latencies.append(time.perf_counter() - t0)
+        answers.append((resp.status_code, resp.get_json(silent=True)))
+    return latencies, answers, time.perf_counter() - t_start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--distinct", type=int, default=200, help="distinct payloads per endpoint")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    nurova.preload_models()
+    client = nurova.app.test_client()
+    payloads = PayloadFactory()
+    pools = {
+        "predict": [("post", "/predict_distraction", {"json": payloads.predict()}) for _ in range(args.distinct)],
+        "personality": [("post", "/get_personality",
+                         {"json": {"usage_history": [payloads.predict() for _ in range(7)]}})
+                        for _ in range(args.distinct)],
+        "recommend": [("get", "/recommend_content?" + payloads.recommend_query(), {})
+                      for _ in range(args.distinct)],
+    }
+
+    results, mismatches = {}, 0
+    print(f"{'endpoint':<14} {'mode':<9} {'p50 ms':>8} {'p99 ms':>8} {'req/s':>9}")
+    for name, pool in pools.items():
+        calls = [pool[payloads.rng.randrange(len(pool))] for _ in range(args.requests)]
+        runs = {}
+        for mode, size in (("uncached", 0), ("cached", 4096)):
+            nurova.response_cache = ResponseCache(maxsize=size, shared_db=None)
+            replay(client, pool)                       # warm-up (fills the cache when enabled)
+            lat, answers, wall = replay(client, calls)
+            runs[mode] = answers
+            results[f"{name}/{mode}"] = {**latency_summary(lat, wall), "cache": nurova.response_cache.stats()}
+            s = results[f"{name}/{mode}"]
+            print(f"{name:<14} {mode:<9} {s['p50_ms']:>8} {s['p99_ms']:>8} {s['throughput_rps']:>9}")
+        for (code_a, a), (code_b, b) in zip(runs["uncached"], runs["cached"]):
+            if code_a != code_b or (strip_timestamp(a) if isinstance(a, dict) else a) != \
+                    (strip_timestamp(b) if isinstance(b, dict) else b):
+                mismatches += 1
+
+    # Revalidation: every request carries the ETag from a previous response
+    etags = {}
+    for _, path, _ in pools["recommend"]:
+        etags[path] = client.get(path).headers["ETag"]
+    calls = [pools["recommend"][payloads.rng.randrange(args.distinct)] for _ in range(args.requests)]
+    lat, statuses = [], {}
+    t_start = time.perf_counter()
+    for _, path, _ in calls:
+        t0 = time.perf_counter()
+        resp = client.get(path, headers={"If-None-Match": etags[path]})
+        lat.append(time.perf_counter() - t0)
+        statuses[resp.status_code] = statuses.get(resp.status_code, 0) + 1
+    results["recommend/revalidate"] = {**latency_summary(lat, time.perf_counter() - t_start),
+                                       "statuses": statuses}
+    s = results["recommend/revalidate"]
+    print(f"{'recommend':<14} {'304':<9} {s['p50_ms']:>8} {s['p99_ms']:>8} {s['throughput_rps']:>9}   {statuses}")
+    print(f"Mismatches between cached and uncached answers: {mismatches}")
+
+    path = write_results("response_cache", {
+        "meta": run_metadata(requests=args.requests, distinct=args.distinct),
+        "mismatches": mismatches,
+        "results": results,
+    }, args.json)
+    print(f"📁 {path}")
+    nurova.store.close()
+    if mismatches or set(statuses) != {304}:
+        raise SystemExit(1)
@@ -0,0 +1,177 @@
+"""
+Nurova 2.0 — Partitioned storage and retention benchmark
+Builds a pre-partitioning database (one sessions table, JSON apps_used) with
+--rows sessions spread over the last --months months, then:
+  migrate     init_schema moves it into monthly partitions with apps_used
+              dictionary-encoded; every session must read back unchanged
+  compact     first compaction (a full VACUUM that switches on incremental vacuum)
+  retention   archives all but the last --keep months and compacts again;
+              archived + retained sessions must equal the originals, and the
+              rollups, user stats and trends must not change
+  late        a late upload into an archived month recreates its partition,
+              and the next retention run archives it to a second file
+File sizes are reported after each step.
+
+Run: python benchmarks/bench_retention.py --rows 1000000 --months 24 --keep 6
+"""
+
+import os
+import sys
+import json
+import time
+import shutil
+import random
+import sqlite3
+import argparse
+import tempfile
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import CLUSTERS, APPS, run_metadata, write_results  # noqa: E402
+from session_store import SESSION_COLUMNS, SessionStore, iter_sessions, query_daily_analytics  # noqa: E402
+import retention  # noqa: E402
+
+LEGACY_SCHEMA = f"""
+    CREATE TABLE sessions (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        {', '.join(f'{c} TEXT' if c in ('user_id', 'apps_used', 'personality_cluster', 'created_at')
+                   else f'{c} REAL' for c in SESSION_COLUMNS)}
+    );
+    CREATE INDEX idx_sessions_created_at ON sessions (created_at);
+    CREATE INDEX idx_sessions_user ON sessions (user_id, created_at);
+"""
+
+
+def legacy_db(path, n, months, now):
+    """Single-table database as written before partitioning; returns the sessions as read back"""
+    rng = random.Random(7)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.executescript(LEGACY_SCHEMA)
+    sessions = []
+    for start in range(0, n, 100_000):
+        rows = []
+        for _ in range(min(100_000, n - start)):
+            session = {
+                "user_id": f"user-{rng.randint(1, 2000)}",
+                "screen_time": round(rng.uniform(0.5, 12), 2),
+                "productive_mins": rng.randint(0, 240),
+                "apps_used": rng.sample(APPS, rng.randint(0, 4)),
+                "risk_prob": round(rng.random(), 4),
+                "personality_cluster": rng.choice(CLUSTERS),
+                "created_at": (now - timedelta(seconds=rng.randint(0, months * 30 * 86400))).isoformat(),
+                "distraction_freq": rng.randint(0, 30),
+                "mood_score": rng.randint(1, 10),
+                "goal_alignment_score": round(rng.random(), 3),
+                "task_completion_rate": round(rng.random(), 3),
+                "time_of_day": rng.randint(0, 23),
+            }
+            sessions.append(session)
+            rows.append(tuple(json.dumps(v) if c == "apps_used" else v for c, v in session.items()))
+        conn.executemany(f"INSERT INTO sessions ({', '.join(SESSION_COLUMNS)}) "
+                         f"VALUES ({', '.join('?' for _ in SESSION_COLUMNS)})", rows)
+        conn.commit()
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.close()
+    return [{"id": i + 1, **s} for i, s in enumerate(sessions)]
+
+
+def snapshot(conn):
+    """Everything the endpoints serve from aggregates"""
+    return {
+        "analytics": query_daily_analytics(conn, ""),
+        "user_stats": conn.execute("SELECT * FROM user_stats ORDER BY user_id, feature").fetchall(),
+        "user_trend": conn.execute("SELECT * FROM user_trend ORDER BY user_id").fetchall(),
+    }
+
+
+def mb(n):
+    return round(n / 1e6, 2)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--months", type=int, default=24, help="history spread over this many months")
+    parser.add_argument("--keep", type=int, default=6, help="months kept by the retention run")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nurova-retention-")
+    db_path, archive_dir = os.path.join(tmp, "bench.db"), os.path.join(tmp, "archives")
+    now = datetime.utcnow()
+    failures = []
+    try:
+        original = legacy_db(db_path, args.rows, args.months, now)
+        sizes = {"legacy": retention._file_bytes(db_path)}
+
+        t0 = time.perf_counter()
+        store = SessionStore(db_path)
+        store.init_schema()
+        migrate_s = round(time.perf_counter() - t0, 2)
+        with store.connection() as conn:
+            if list(iter_sessions(conn)) != original:
+                failures.append("migrated sessions differ from the originals")
+            before = snapshot(conn)
+
+        t0 = time.perf_counter()
+        first = retention.compact(db_path)
+        compact_s = round(time.perf_counter() - t0, 2)
+        sizes["migrated"] = first["bytes_after"]
+
+        t0 = time.perf_counter()
+        report = retention.apply_retention(db_path, args.keep, archive_dir, now=now)
+        archive_s = round(time.perf_counter() - t0, 2)
+        t0 = time.perf_counter()
+        second = retention.compact(db_path)
+        incremental_s = round(time.perf_counter() - t0, 3)
+        sizes["retained"] = second["bytes_after"]
+        sizes["archives"] = sum(a["bytes"] for a in report["archived"])
+
+        archived = [s for a in report["archived"] for s in retention.iter_archive(a["path"])]
+        with store.connection() as conn:
+            live = list(iter_sessions(conn))
+            if sorted(archived + live, key=lambda s: s["id"]) != original:
+                failures.append("archived + retained sessions differ from the originals")
+            if snapshot(conn) != before:
+                failures.append("aggregates changed by retention")
+
+        # A late upload for an archived month, then the next retention run
+        old = (now - timedelta(days=30 * (args.months - 1))).isoformat()
+        with store.bulk_insert() as insert:
+            insert([{"user_id": "late-user", "risk_prob": 0.5, "apps_used": ["Notion"], "created_at": old}])
+        late = retention.apply_retention(db_path, args.keep, archive_dir, now=now)["archived"]
+        if [a["rows"] for a in late] != [1] or not late[0]["path"].endswith(".2.ndjson.gz"):
+            failures.append(f"late upload not archived separately: {late}")
+        store.close()
+
+        print(f"{'step':<12} {'seconds':>9} {'db MB':>9}")
+        print(f"{'legacy':<12} {'-':>9} {mb(sizes['legacy']):>9}")
+        print(f"{'migrate':<12} {migrate_s:>9} {'':>9}")
+        print(f"{'compact':<12} {compact_s:>9} {mb(sizes['migrated']):>9}   ({first['method']})")
+        print(f"{'retention':<12} {archive_s:>9} {'':>9}   "
+              f"{len(report['archived'])} month(s), {len(archived):,} sessions → {mb(sizes['archives'])} MB gzip")
+        print(f"{'compact':<12} {incremental_s:>9} {mb(sizes['retained']):>9}   "
+              f"({second['method']}, {second['free_pages']:,} free pages)")
+        print(f"Retained: {len(live):,} sessions in {len(report['kept'])} partition(s)")
+        for failure in failures:
+            print(f"❌ {failure}")
+        if not failures:
+            print("✅ sessions, archives and aggregates all match")
+
+        path = write_results("retention", {
+            "meta": run_metadata(rows=args.rows, months=args.months, keep=args.keep),
+            "seconds": {"migrate": migrate_s, "compact": compact_s, "retention": archive_s,
+                        "incremental_vacuum": incremental_s},
+            "bytes": sizes,
+            "archived_sessions": len(archived),
+            "retained_sessions": len(live),
+            "failures": failures,
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if failures:
+        raise SystemExit(1)
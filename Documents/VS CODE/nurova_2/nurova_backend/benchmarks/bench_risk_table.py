@@ -0,0 +1,129 @@
+"""
+Nurova 2.0 — Risk lookup table benchmark
+Builds the risk table for each --grids configuration through the training
+code path (train_models.build_risk_table, into a temp dir) from the models in
+models/, and reports per configuration:
+  size        grid cells and MB, build seconds
+  held-out    max / mean / p99 |table - ensemble| on the training split's
+              held-out rows, and how many change risk level; whether the
+              default bounds accept the table
+  sampled     the same over --sample rows drawn uniformly from the grid box
+              (reference: the engine, equal to the ensemble to ~1e-16)
+  throughput  batch rows/s and single-row µs, table vs engine
+
+Run: python benchmarks/bench_risk_table.py --grids "default;daily_screen_time=16,hour_of_session=8"
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import BACKEND_DIR, DATASET_CSV, run_metadata, write_results  # noqa: E402
+import train_models  # noqa: E402
+from inference import RISK_TABLE_MAX_ERROR, RISK_TABLE_MEAN_ERROR, load_engine, load_risk_table  # noqa: E402
+import joblib  # noqa: E402
+import numpy as np  # noqa: E402
+import pandas as pd  # noqa: E402
+from sklearn.model_selection import train_test_split  # noqa: E402
+
+
+def parse_grid(spec):
+    if spec == "default":
+        return {}
+    return {f: int(n) for f, n in (item.split("=") for item in spec.split(","))}
+
+
+def grid_sample(n, seed=11):
+    """Rows drawn uniformly from the table's grid box (integers on the discrete axes)"""
+    rng = np.random.RandomState(seed)
+    cols = []
+    for f in train_models.DISTRACTION_FEATURES:
+        lo, hi, points = train_models.RISK_TABLE_RANGES[f]
+        cols.append(rng.randint(lo, hi + 1, n) if points else rng.uniform(lo, hi, n))
+    return np.column_stack(cols).astype(np.float64)
+
+
+def rows_per_s(fn, X, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn(X)
+        runs.append(time.perf_counter() - t0)
+    return round(len(X) / statistics.median(runs))
+
+
+def single_us(fn, X, n=2000):
+    t0 = time.perf_counter()
+    for i in range(n):
+        fn(X[i % len(X)][None, :])
+    return round((time.perf_counter() - t0) / n * 1e6, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--grids", default="default",
+                        help="';'-separated bin overrides (FEATURE=N,...), 'default' for the defaults")
+    parser.add_argument("--sample", type=int, default=100_000, help="uniform rows for the sampled error")
+    parser.add_argument("--rows", type=int, default=10_000, help="batch size for throughput")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    model_package = joblib.load(os.path.join(BACKEND_DIR, "models", "distraction_model.pkl"))
+    engine = load_engine(os.path.join(BACKEND_DIR, "models", "distraction_engine"))
+    df = pd.read_csv(DATASET_CSV)
+    _, X_test = train_test_split(df[train_models.DISTRACTION_FEATURES], test_size=0.2, random_state=42,
+                                 stratify=df[train_models.LABEL])
+    X_sample = grid_sample(args.sample)
+    expected_sample = engine.predict_risk(X_sample)
+    X_batch = X_sample[:args.rows]
+
+    engine_res = {"batch_rows_per_s": rows_per_s(engine.predict_risk, X_batch),
+                  "single_us": single_us(engine.predict_risk, X_batch)}
+    tmp = tempfile.mkdtemp(prefix="nurova-risk-table-")
+    results = []
+    try:
+        for spec in args.grids.split(";"):
+            out_dir = os.path.join(tmp, "risk_table")
+            report = train_models.build_risk_table(model_package, engine, X_test, bins=parse_grid(spec),
+                                                   max_error=float("inf"), mean_error=float("inf"),
+                                                   out_dir=out_dir)
+            table = load_risk_table(out_dir, exact=engine.predict_risk)
+            err = np.abs(table.predict_risk(X_sample) - expected_sample)
+            res = {
+                "grid": spec,
+                **{k: report[k] for k in ("cells", "bytes", "build_seconds", "max_abs_error", "mean_abs_error",
+                                          "p99_abs_error", "level_changes")},
+                "accepted": report["max_abs_error"] <= RISK_TABLE_MAX_ERROR
+                            and report["mean_abs_error"] <= RISK_TABLE_MEAN_ERROR,
+                "sampled_max_abs_error": round(float(err.max()), 6),
+                "sampled_mean_abs_error": round(float(err.mean()), 6),
+                "batch_rows_per_s": rows_per_s(table.predict_risk, X_batch),
+                "single_us": single_us(table.predict_risk, X_batch),
+            }
+            results.append(res)
+            shutil.rmtree(out_dir)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    print(f"\n{'grid':<40} {'MB':>6} {'build s':>8} {'max':>7} {'mean':>7} {'s.max':>7} {'s.mean':>7} "
+          f"{'rows/s':>9} {'µs/row':>7}")
+    for r in results:
+        print(f"{r['grid'][:40]:<40} {r['bytes'] / 1e6:>6.1f} {r['build_seconds']:>8} {r['max_abs_error']:>7.4f} "
+              f"{r['mean_abs_error']:>7.4f} {r['sampled_max_abs_error']:>7.4f} {r['sampled_mean_abs_error']:>7.4f} "
+              f"{r['batch_rows_per_s']:>9,} {r['single_us']:>7}  {'✅' if r['accepted'] else '❌ over bound'}")
+    print(f"{'engine':<40} {'':>6} {'':>8} {'':>7} {'':>7} {'':>7} {'':>7} "
+          f"{engine_res['batch_rows_per_s']:>9,} {engine_res['single_us']:>7}")
+
+    path = write_results("risk_table", {
+        "meta": run_metadata(sample=args.sample, rows=args.rows, max_error_bound=RISK_TABLE_MAX_ERROR,
+                             mean_error_bound=RISK_TABLE_MEAN_ERROR, default_bins=train_models.RISK_TABLE_BINS),
+        "engine": engine_res,
+        "results": results,
+    }, args.json)
+    print(f"📁 {path}")
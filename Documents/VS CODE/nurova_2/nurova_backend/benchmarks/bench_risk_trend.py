@@ -0,0 +1,147 @@
+"""
+Nurova 2.0 — Risk trend benchmark
+Loads users with --sizes sessions each (timestamps spread over weeks, some
+uploaded out of order) into a scratch database, then:
+  - checks the incrementally maintained user_trend against a brute-force
+    recomputation from raw sessions (EWMA, decayed mean, decayed slope),
+    and that rebuild_user_trend reproduces it
+  - times GET /risk_trend against that brute-force scan per history size
+  - reports the per-session cost of folding a batch into user_trend
+
+Run: python benchmarks/bench_risk_trend.py --sizes 10,100,1000,10000
+"""
+
+import os
+import sys
+import math
+import time
+import random
+import shutil
+import argparse
+import tempfile
+import warnings
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+warnings.filterwarnings("ignore")
+
+TMP = tempfile.mkdtemp(prefix="nurova-trend-")
+os.environ["NUROVA_DB_PATH"] = os.path.join(TMP, "bench.db")
+os.environ.pop("NUROVA_METRICS_DIR", None)
+
+import numpy as np  # noqa: E402
+
+from common import run_metadata, write_results  # noqa: E402
+import app as nurova  # noqa: E402
+from session_store import (  # noqa: E402
+    TREND_HALF_LIFE_HOURS, TREND_SESSIONS, _epoch_hours, query_user_trend, rebuild_user_trend, update_user_trend,
+)
+
+
+def history(user_id, n, rng):
+    start = datetime(2026, 1, 1) + timedelta(hours=rng.uniform(0, 1000))
+    rows, t, risk = [], start, rng.uniform(0.1, 0.9)
+    for _ in range(n):
+        t += timedelta(minutes=rng.expovariate(1 / 90))
+        risk = min(max(risk + rng.gauss(0, 0.05), 0.0), 1.0)
+        rows.append({"user_id": user_id, "risk_prob": risk, "screen_time": rng.uniform(5, 120),
+                     "created_at": t.isoformat()})
+    # ~5% arrive late, as an offline upload would
+    for i in rng.sample(range(n), n // 20):
+        rows.append(rows.pop(i))
+    return rows
+
+
+def brute_force(conn, user_id):
+    rows = conn.execute("SELECT risk_prob, screen_time, created_at FROM sessions "
+                        "WHERE user_id = ? ORDER BY id", (user_id,)).fetchall()
+    alpha = 2.0 / (TREND_SESSIONS + 1)
+    ewma = rows[0][0]
+    for risk, _, _ in rows[1:]:
+        ewma += alpha * (risk - ewma)
+    x = np.array([r[0] for r in rows])
+    ts = np.array([_epoch_hours(r[2]) for r in rows])
+    t = ts - ts.max()
+    w = np.exp(math.log(2) / TREND_HALF_LIFE_HOURS * t)
+    mean_t, mean_x = np.average(t, weights=w), np.average(x, weights=w)
+    slope = np.sum(w * (t - mean_t) * (x - mean_x)) / np.sum(w * (t - mean_t) ** 2)
+    return {"ewma_risk": ewma, "recent_risk": float(mean_x), "slope_per_hour": float(slope)}
+
+
+def max_rel_error(a, b):
+    return max(abs(a[k] - b[k]) / max(abs(b[k]), 1e-6) for k in b)
+
+
+def per_call_us(fn, repeat=200):
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        fn()
+    return round((time.perf_counter() - t0) / repeat * 1e6, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="10,100,1000,10000", help="sessions per benchmarked user")
+    parser.add_argument("--background", type=int, default=2000, help="other users with 20 sessions each")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    try:
+        rng = random.Random(11)
+        sizes = [int(x) for x in args.sizes.split(",")]
+        users = [history(f"bg{u}", 20, rng) for u in range(args.background)]
+        users += [history(f"user{n}", n, rng) for n in sizes]
+        # Interleave users while keeping each user's own arrival order
+        keyed = [((i + rng.random()) / len(h), r) for h in users for i, r in enumerate(h)]
+        rows = [r for _, r in sorted(keyed, key=lambda kr: kr[0])]
+        with nurova.store.bulk_insert() as insert:
+            for start in range(0, len(rows), 1000):
+                insert(rows[start:start + 1000])
+        print(f"Loaded {len(rows)} sessions for {args.background + len(sizes)} users")
+
+        client = nurova.app.test_client()
+        results, worst = [], 0.0
+        with nurova.store.connection() as conn:
+            incremental = {f"user{n}": query_user_trend(conn, f"user{n}") for n in sizes}
+            rebuild_user_trend(conn)
+            rebuilt = {u: query_user_trend(conn, u) for u in incremental}
+            conn.rollback()
+            rebuild_mismatch = sum(incremental[u] != rebuilt[u] for u in incremental)
+
+            print(f"{'sessions':>9} {'rel err':>9} {'/risk_trend µs':>15} {'scan µs':>10}")
+            for n in sizes:
+                user = f"user{n}"
+                err = max_rel_error(incremental[user], brute_force(conn, user))
+                worst = max(worst, err)
+                res = {
+                    "sessions": n,
+                    "max_rel_error": err,
+                    "endpoint_us": per_call_us(lambda user=user: client.get(f"/risk_trend?user_id={user}")),
+                    "scan_us": per_call_us(lambda user=user: brute_force(conn, user), repeat=max(3, 2000 // n)),
+                }
+                results.append(res)
+                print(f"{n:>9} {err:>9.1e} {res['endpoint_us']:>15} {res['scan_us']:>10}")
+
+        fold_rows = history("fold", 10000, rng)
+        with nurova.store.connection() as conn:
+            t0 = time.perf_counter()
+            for start in range(0, len(fold_rows), 256):
+                update_user_trend(conn.cursor(), fold_rows[start:start + 256])
+            fold_ns = round((time.perf_counter() - t0) / len(fold_rows) * 1e9, 1)
+            conn.rollback()
+        print(f"Fold cost: {fold_ns} ns/session (256-row batches) | rebuild mismatches: {rebuild_mismatch}")
+
+        path = write_results("risk_trend", {
+            "meta": run_metadata(sizes=sizes, background=args.background),
+            "max_rel_error": worst,
+            "rebuild_mismatches": rebuild_mismatch,
+            "fold_ns_per_session": fold_ns,
+            "results": results,
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        nurova.store.close()
+        shutil.rmtree(TMP, ignore_errors=True)
+
+    if worst > 1e-6 or rebuild_mismatch:
+        raise SystemExit(1)
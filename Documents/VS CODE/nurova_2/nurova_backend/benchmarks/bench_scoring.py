@@ -0,0 +1,112 @@
+"""
+Nurova 2.0 — Vectorized content scoring benchmark
+Checks that score_items (lookup tables + NumPy) returns exactly
+[score_content(item) ...] for every query × risk level × cluster, under the
+default and alternative weights, and that rank_candidates ranks like
+rank_items. Then reports per-item cost at each --items size for:
+  scalar   score_content in a Python loop
+  vector   score_items on the list of dicts (column extraction included)
+  columns  ScoringTables.score on pre-extracted columns (what CatalogIndex does)
+
+Run: python benchmarks/bench_scoring.py --items 10000,100000
+"""
+
+import os
+import sys
+import time
+import argparse
+import statistics
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import run_metadata, write_results  # noqa: E402
+from bench_recommend import CLUSTERS, QUERIES, RISK_LEVELS, synthetic_catalog  # noqa: E402
+from recommender import (  # noqa: E402
+    SCORE_WEIGHTS, ScoringTables, _py_round3, rank_candidates, rank_items, score_content, score_items,
+)
+import numpy as np  # noqa: E402
+
+ALT_WEIGHTS = [
+    {"goal_relevance": 0.5, "user_interest": 0.35, "mood_match": 0.15},
+    {"goal_relevance": 0.7, "user_interest": 0.2, "mood_match": 0.3},
+]
+
+
+def candidates(n, seed=7):
+    """Synthetic catalog plus YouTube-style items whose category is free text"""
+    items = synthetic_catalog(n, seed)
+    for i, it in enumerate(items[::10]):
+        it["category"] = ["Python", "rust", "deep work", ""][i % 4]
+    return items
+
+
+def check_equivalence(items):
+    mismatches = 0
+    for weights in [SCORE_WEIGHTS] + ALT_WEIGHTS:
+        tables = ScoringTables(weights)
+        for q in QUERIES:
+            for risk in RISK_LEVELS:
+                for cluster in CLUSTERS:
+                    vector = score_items(items, risk, cluster, q, tables).tolist()
+                    scalar = [score_content(it, risk, cluster, q, weights) for it in items]
+                    mismatches += vector != scalar
+                    if weights is SCORE_WEIGHTS:
+                        mismatches += (rank_candidates(items, risk, cluster, q, k=8)
+                                       != rank_items(items, risk, cluster, q, k=8))
+    return mismatches
+
+
+def per_item_ns(fn, n_items, repeat=5):
+    runs = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        runs.append(time.perf_counter() - t0)
+    return round(statistics.median(runs) / n_items * 1e9, 1)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--items", default="10000,100000", help="comma-separated candidate list sizes")
+    parser.add_argument("--check-items", type=int, default=2000, help="candidates in the equivalence check")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    mismatches = check_equivalence(candidates(args.check_items))
+    print(f"Equivalence: {mismatches} mismatches "
+          f"({len(QUERIES) * len(RISK_LEVELS) * len(CLUSTERS)} combinations × {1 + len(ALT_WEIGHTS)} weight sets)")
+
+    risk, cluster, query = "medium", "StressScroller", "design"
+    results = []
+    print(f"{'items':>8} {'scalar ns':>10} {'vector ns':>10} {'columns ns':>11} {'speedup':>8}")
+    for n in [int(x) for x in args.items.split(",")]:
+        items = candidates(n)
+        tables = ScoringTables()
+        goal = np.array([it["goal_relevance"] for it in items])
+        interest = np.array([it["user_interest"] for it in items])
+        codes = tables.codes([it["category"] for it in items])
+
+        res = {
+            "items": n,
+            "scalar_ns": per_item_ns(
+                lambda items=items: [score_content(it, risk, cluster, query) for it in items], n),
+            "vector_ns": per_item_ns(
+                lambda items=items, tables=tables: score_items(items, risk, cluster, query, tables), n),
+            "columns_ns": per_item_ns(
+                lambda tables=tables, goal=goal, interest=interest, codes=codes:
+                _py_round3(np.minimum(tables.score(goal, interest, codes, risk, cluster), 1.0)), n),
+        }
+        res["speedup_vector"] = round(res["scalar_ns"] / res["vector_ns"], 1)
+        res["speedup_columns"] = round(res["scalar_ns"] / res["columns_ns"], 1)
+        results.append(res)
+        print(f"{n:>8} {res['scalar_ns']:>10} {res['vector_ns']:>10} {res['columns_ns']:>11} "
+              f"{res['speedup_vector']:>7}x")
+
+    path = write_results("scoring", {
+        "meta": run_metadata(weights=SCORE_WEIGHTS, check_items=args.check_items),
+        "mismatches": mismatches,
+        "results": results,
+    }, args.json)
+    print(f"📁 {path}")
+    if mismatches:
+        raise SystemExit(1)
@@ -0,0 +1,135 @@
+"""
+Nurova 2.0 — /log_session write-path benchmark
+Sustained inserts/second from several concurrent processes (like gunicorn
+workers), comparing the old connect/insert/commit/close-per-call pattern
+with SessionStore (write-behind, and durable group commit).
+
+Run: python benchmarks/bench_session_store.py --workers 4 --seconds 5
+"""
+
+import os
+import sys
+import json
+import time
+import sqlite3
+import argparse
+import tempfile
+import multiprocessing as mp
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from session_store import SessionStore  # noqa: E402
+
+
+def _row():
+    return {
+        "screen_time": 5.5,
+        "productive_mins": 42,
+        "apps_used": json.dumps(["YouTube", "VS Code"]),
+        "risk_prob": 0.61,
+        "personality_cluster": "StressScroller",
+        "created_at": datetime.utcnow().isoformat(),
+    }
+
+
+def _legacy_worker(db_path, seconds, out):
+    n = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        r = _row()
+        try:
+            conn = sqlite3.connect(db_path)
+            c = conn.cursor()
+            c.execute("""
+                INSERT INTO sessions (screen_time, productive_mins, apps_used, risk_prob, personality_cluster, created_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+            """, (r["screen_time"], r["productive_mins"], r["apps_used"],
+                  r["risk_prob"], r["personality_cluster"], r["created_at"]))
+            conn.commit()
+            conn.close()
+            n += 1
+        except sqlite3.OperationalError:    # "database is locked"
+            errors += 1
+    out.put((n, errors))
+
+
+def _store_worker(db_path, seconds, out, durable):
+    store = SessionStore(db_path)
+    n = errors = 0
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        try:
+            store.log(_row(), durable=durable)
+            n += 1
+        except Exception:
+            errors += 1
+    store.close()
+    out.put((n, errors))
+
+
+def run(mode, workers, seconds):
+    fd, db_path = tempfile.mkstemp(suffix=".db")
+    os.close(fd)
+    if mode == "legacy":
+        # The old code: one sessions table in a rollback-journal (non-WAL) database
+        conn = sqlite3.connect(db_path)
+        conn.execute("""
+            CREATE TABLE sessions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                screen_time REAL, productive_mins INTEGER, apps_used TEXT,
+                risk_prob REAL, personality_cluster TEXT, created_at TEXT
+            )
+        """)
+        conn.close()
+    else:
+        SessionStore(db_path).init_schema()
+
+    out = mp.Queue()
+    if mode == "legacy":
+        procs = [mp.Process(target=_legacy_worker, args=(db_path, seconds, out)) for _ in range(workers)]
+    else:
+        procs = [mp.Process(target=_store_worker, args=(db_path, seconds, out, mode == "store-durable"))
+                 for _ in range(workers)]
+
+    t0 = time.perf_counter()
+    for p in procs:
+        p.start()
+    results = [out.get() for _ in procs]
+    for p in procs:
+        p.join()
+    elapsed = time.perf_counter() - t0
+
+    conn = sqlite3.connect(db_path)
+    rows = conn.execute("SELECT COUNT(*) FROM sessions").fetchone()[0]
+    conn.close()
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(db_path + suffix):
+            os.remove(db_path + suffix)
+
+    return {
+        "mode": mode,
+        "workers": workers,
+        "rows_committed": rows,
+        "errors": sum(e for _, e in results),
+        "inserts_per_sec": round(rows / elapsed, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("legacy", "store-durable", "store"):
+        res = run(mode, args.workers, args.seconds)
+        results.append(res)
+        print(f"{mode:>14}: {res['inserts_per_sec']:>10,.1f} inserts/s  "
+              f"({res['rows_committed']} rows, {res['errors']} errors, {args.workers} workers)")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
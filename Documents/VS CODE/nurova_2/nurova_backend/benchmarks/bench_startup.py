@@ -0,0 +1,181 @@
+"""
+Nurova 2.0 — Cold-start benchmark
+  import profile  python -X importtime -c "import app": what `import app`
+                  costs, the heaviest modules (cumulative) and a per-package
+                  rollup of self time
+  inprocess       fresh interpreter → import app → first GET /health through
+                  the test client, wall time from spawn (median of --runs)
+  gunicorn        spawn gunicorn → first 200 from /health (includes the master
+                  preloading the models before forking), with --gunicorn
+
+Exits 1 when the median in-process cold start exceeds --budget-ms or when
+`import app` pulls in any module listed in --forbid, so it can gate changes
+locally the way a CI check would.
+
+Run: python benchmarks/bench_startup.py --runs 5 --gunicorn
+"""
+
+import os
+import sys
+import time
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import http.client
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from common import BACKEND_DIR, run_metadata, write_results  # noqa: E402
+from bench_endpoints import _free_port  # noqa: E402
+
+# Measured at ~250 ms median on a single-core dev container after deferring the heavy
+# imports (~380 ms before); the margin absorbs machine-to-machine noise
+BUDGET_MS = 350.0
+FORBID = "numpy,joblib,sklearn,scipy,pandas"
+
+CHILD = """
+import time
+t0 = time.perf_counter()
+import app
+t1 = time.perf_counter()
+status = app.app.test_client().get("/health").status_code
+t2 = time.perf_counter()
+print(status, t1 - t0, t2 - t1, flush=True)
+"""
+
+
+def child_env(tmp):
+    env = {**os.environ, "NUROVA_DB_PATH": os.path.join(tmp, "startup.db"),
+           "YOUTUBE_API_KEY": "YOUR_YOUTUBE_API_KEY_HERE", "PYTHONWARNINGS": "ignore"}
+    env.pop("NUROVA_METRICS_DIR", None)
+    return env
+
+
+# ─────────────────────────────────────────────
+# Import profile
+# ─────────────────────────────────────────────
+
+def import_profile(env):
+    """[(module, self_us, cumulative_us, depth)] for one `import app`, in -X importtime order"""
+    proc = subprocess.run([sys.executable, "-X", "importtime", "-c", "import app"],
+                          cwd=BACKEND_DIR, env=env, capture_output=True, text=True, check=True)
+    entries = []
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cum_us, name = line[len("import time:"):].split("|")
+        depth = (len(name) - len(name.lstrip())) // 2
+        entries.append((name.strip(), int(self_us), int(cum_us), depth))
+    # Children print before their parent, so app's imports are the block between
+    # the previous top-level line (interpreter startup: site, encodings, ...) and "app"
+    end = max(i for i, e in enumerate(entries) if e[0] == "app" and e[3] == 0)
+    start = max((i for i, e in enumerate(entries[:end]) if e[3] == 0), default=-1) + 1
+    return entries[start:end + 1]
+
+
+def package_rollup(entries):
+    totals = {}
+    for name, self_us, _, _ in entries:
+        pkg = name.split(".")[0]
+        totals[pkg] = totals.get(pkg, 0) + self_us
+    return sorted(totals.items(), key=lambda kv: -kv[1])
+
+
+# ─────────────────────────────────────────────
+# Cold start
+# ─────────────────────────────────────────────
+
+def inprocess_cold_start(env):
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-c", CHILD], cwd=BACKEND_DIR, env=env,
+                            stdout=subprocess.PIPE, stderr=subprocess.DEVNULL, text=True)
+    line = proc.stdout.readline()
+    wall = time.perf_counter() - t0
+    proc.wait(30)
+    status, import_s, health_s = line.split()
+    if status != "200":
+        raise RuntimeError(f"/health returned {status}")
+    return {"wall_ms": wall * 1000, "import_ms": float(import_s) * 1000, "first_health_ms": float(health_s) * 1000}
+
+
+def gunicorn_cold_start(env, workers=2, timeout=60):
+    port = _free_port()
+    env = {**env, "PORT": str(port), "WEB_CONCURRENCY": str(workers)}
+    t0 = time.perf_counter()
+    proc = subprocess.Popen([sys.executable, "-m", "gunicorn", "app:app", "-c", "gunicorn.conf.py"],
+                            cwd=BACKEND_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        while time.perf_counter() - t0 < timeout:
+            try:
+                conn = http.client.HTTPConnection("127.0.0.1", port, timeout=5)
+                conn.request("GET", "/health")
+                if conn.getresponse().status == 200:
+                    return {"wall_ms": (time.perf_counter() - t0) * 1000}
+            except OSError:
+                time.sleep(0.01)
+        raise RuntimeError(f"gunicorn did not answer /health within {timeout} s")
+    finally:
+        proc.terminate()
+        proc.wait(10)
+
+
+def summarize(runs):
+    return {key: round(statistics.median(r[key] for r in runs), 1) for key in runs[0]}
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--budget-ms", type=float, default=BUDGET_MS,
+                        help="max median wall time from spawn to the first /health response (in-process)")
+    parser.add_argument("--forbid", default=FORBID, help="comma-separated modules `import app` must not load")
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument("--gunicorn", action="store_true", help="also time a gunicorn cold start")
+    parser.add_argument("--json", help="write results here instead of benchmarks/results/")
+    args = parser.parse_args()
+
+    tmp = tempfile.mkdtemp(prefix="nurova-startup-")
+    try:
+        env = child_env(tmp)
+        entries = import_profile(env)
+        app_total = next(cum for name, _, cum, depth in entries if name == "app" and depth == 0)
+        loaded = {name.split(".")[0] for name, _, _, _ in entries}
+        forbidden = sorted(m for m in args.forbid.split(",") if m and m in loaded)
+
+        print(f"import app: {app_total / 1000:.1f} ms, {len(entries)} modules")
+        print(f"\n{'heaviest imports (cumulative)':<44} {'cum ms':>8} {'self ms':>8}")
+        for name, self_us, cum_us, depth in sorted(entries, key=lambda e: -e[2])[:args.top]:
+            print(f"{'  ' * min(depth, 4) + name:<44} {cum_us / 1000:>8.1f} {self_us / 1000:>8.1f}")
+        print(f"\n{'package (self time)':<44} {'ms':>8}")
+        for pkg, self_us in package_rollup(entries)[:args.top]:
+            print(f"{pkg:<44} {self_us / 1000:>8.1f}")
+
+        inprocess = summarize([inprocess_cold_start(env) for _ in range(args.runs)])
+        print(f"\nCold start to first /health (in-process, median of {args.runs}): {inprocess['wall_ms']} ms "
+              f"(import app {inprocess['import_ms']} ms, first request {inprocess['first_health_ms']} ms)"
+              f" | budget {args.budget_ms:.0f} ms")
+        gunicorn = None
+        if args.gunicorn:
+            gunicorn = summarize([gunicorn_cold_start(env) for _ in range(args.runs)])
+            print(f"Cold start to first /health (gunicorn): {gunicorn['wall_ms']} ms")
+        if forbidden:
+            print(f"❌ import app loaded {', '.join(forbidden)}")
+
+        path = write_results("startup", {
+            "meta": run_metadata(runs=args.runs, budget_ms=args.budget_ms),
+            "import_app_ms": round(app_total / 1000, 1),
+            "heaviest": [{"module": n, "cumulative_ms": round(c / 1000, 2), "self_ms": round(s / 1000, 2)}
+                         for n, s, c, _ in sorted(entries, key=lambda e: -e[2])[:args.top]],
+            "packages": [{"package": p, "self_ms": round(s / 1000, 2)} for p, s in package_rollup(entries)],
+            "forbidden_loaded": forbidden,
+            "inprocess": inprocess,
+            "gunicorn": gunicorn,
+        }, args.json)
+        print(f"📁 {path}")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    if forbidden or inprocess["wall_ms"] > args.budget_ms:
+        raise SystemExit(1)
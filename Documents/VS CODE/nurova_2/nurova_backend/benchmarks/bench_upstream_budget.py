@@ -0,0 +1,106 @@
+"""
+Nurova 2.0 — /recommend_content tail latency under a slow upstream
+Swaps the YouTube backend for a local FakeSearchBackend with injected
+delays / failures, hammers /recommend_content from many threads through the
+Flask test client and checks that p99 latency stays within the budget
+(YOUTUBE_BUDGET_MS) plus a small slack, whatever the upstream does.
+
+Run: python benchmarks/bench_upstream_budget.py --threads 16 --requests 400
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import argparse
+import threading
+import warnings
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+warnings.filterwarnings("ignore")
+
+import app as nurova  # noqa: E402
+from youtube_client import FakeSearchBackend, SearchCache  # noqa: E402
+
+QUERIES = ["DSA", "System Design", "Python", "React", "Rust", "SQL", "Kubernetes", "ML"]
+RISKS = ["high", "medium", "low"]
+
+SCENARIOS = {
+    "fast": lambda: FakeSearchBackend(delay=0.01),
+    "slow": lambda: FakeSearchBackend(delay=2.0),
+    "jitter": lambda: FakeSearchBackend(delay=lambda: random.choice([0.01, 0.05, 0.2, 1.0, 3.0])),
+    "failing": lambda: FakeSearchBackend(delay=0.05, fail=True),
+}
+
+
+def percentile(sorted_vals, p):
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))]
+
+
+def run(scenario, threads, requests):
+    # Fresh cache per scenario so background fetches from the previous one can't leak in
+    nurova.youtube = SearchCache(SCENARIOS[scenario]())
+    client = nurova.app.test_client()
+    latencies, sources = [], {}
+    lock = threading.Lock()
+    per_thread = requests // threads
+
+    def worker(seed):
+        rng = random.Random(seed)
+        for _ in range(per_thread):
+            url = (f"/recommend_content?query={rng.choice(QUERIES)}"
+                   f"&risk_level={rng.choice(RISKS)}&cluster=StressScroller")
+            t0 = time.perf_counter()
+            resp = client.get(url)
+            elapsed = (time.perf_counter() - t0) * 1000
+            with lock:
+                latencies.append(elapsed)
+                src = resp.headers.get("X-Content-Source", "?")
+                sources[src] = sources.get(src, 0) + 1
+
+    ts = [threading.Thread(target=worker, args=(i,)) for i in range(threads)]
+    for t in ts:
+        t.start()
+    for t in ts:
+        t.join()
+
+    latencies.sort()
+    return {
+        "scenario": scenario,
+        "requests": len(latencies),
+        "p50_ms": round(percentile(latencies, 50), 1),
+        "p95_ms": round(percentile(latencies, 95), 1),
+        "p99_ms": round(percentile(latencies, 99), 1),
+        "max_ms": round(latencies[-1], 1),
+        "sources": sources,
+        "upstream_calls": nurova.youtube.stats()["upstream_calls"],
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--threads", type=int, default=16)
+    parser.add_argument("--requests", type=int, default=400)
+    parser.add_argument("--slack-ms", type=float, default=150.0)
+    parser.add_argument("--json", help="also write results to this file")
+    args = parser.parse_args()
+
+    nurova.YOUTUBE_API_KEY = "fake-upstream"
+    budget = nurova.YOUTUBE_BUDGET_MS
+    print(f"Budget: {budget:.0f} ms (+{args.slack_ms:.0f} ms slack)")
+
+    results, failed = [], False
+    for scenario in SCENARIOS:
+        res = run(scenario, args.threads, args.requests)
+        ok = res["p99_ms"] <= budget + args.slack_ms
+        failed |= not ok
+        results.append(res)
+        print(f"{'✅' if ok else '❌'} {scenario:>8}: p50 {res['p50_ms']:>7} ms | p95 {res['p95_ms']:>7} ms | "
+              f"p99 {res['p99_ms']:>7} ms | max {res['max_ms']:>7} ms | {res['sources']}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+    if failed:
+        raise SystemExit(1)
@@ -0,0 +1,151 @@
+"""
+Shared helpers for the Nurova benchmark scripts: import path setup, payload
+generation from dataset/synthetic/ (or synthetic_data.csv), percentiles and
+result files.
+"""
+
+import os
+import sys
+import csv
+import json
+import time
+import random
+import platform
+import subprocess
+from datetime import datetime
+from urllib.parse import urlencode
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+DATASET_CSV = os.path.join(BACKEND_DIR, "dataset", "synthetic_data.csv")
+DATASET_DIR = os.path.join(BACKEND_DIR, "dataset", "synthetic")
+
+if BACKEND_DIR not in sys.path:
+    sys.path.insert(0, BACKEND_DIR)
+
+CLUSTERS = ["NightScrollAddict", "StressScroller", "ProcrastinationBinger", "ProductiveSprinter"]
+QUERIES = ["DSA", "System Design", "Python", "ML", "Productivity", "deep work", "API"]
+RISK_LEVELS = ["high", "medium", "low"]
+TREND_USERS = [f"user-{i}" for i in range(1, 21)]
+APPS = ["YouTube", "Instagram", "VS Code", "Chrome", "Slack", "Notion", "TikTok"]
+
+
+# ─────────────────────────────────────────────
+# Payloads
+# ─────────────────────────────────────────────
+
+def load_dataset_rows(path=None):
+    """Dataset rows as dicts of floats, from a columnar dataset dir or a CSV"""
+    from columnar import is_dataset, load_dataset
+    path = path or (DATASET_DIR if is_dataset(DATASET_DIR) else DATASET_CSV)
+    if is_dataset(path):
+        ds = load_dataset(path)
+        cols = {c: ds[c].astype(float).tolist() for c in ds.columns}
+        return [dict(zip(cols, values)) for values in zip(*cols.values())]
+    with open(path, newline="") as f:
+        return [{k: float(v) for k, v in row.items()} for row in csv.DictReader(f)]
+
+
+def feature_payload(row):
+    """Dataset row → /predict_distraction request body"""
+    return {
+        "screen_time": row["daily_screen_time"],
+        "distraction_freq": row["distraction_frequency"],
+        "mood_score": row["mood_score"],
+        "goal_alignment_score": row["goal_alignment_score"],
+        "task_completion_rate": row["task_completion_rate"],
+        "time_of_day": row["time_of_day"],
+        "hour_of_session": row["hour_of_session"],
+    }
+
+
+def session_payload(row, rng, user_id=None):
+    """Dataset row → /log_session request body"""
+    return {
+        **feature_payload(row),
+        "user_id": user_id or f"user-{rng.randint(1, 500)}",
+        "productive_mins": rng.randint(0, 240),
+        "apps_used": rng.sample(APPS, rng.randint(1, 4)),
+        "risk_prob": round(rng.random(), 4),
+        "personality_cluster": rng.choice(CLUSTERS),
+    }
+
+
+class PayloadFactory:
+    """Deterministic stream of realistic request payloads per endpoint"""
+
+    def __init__(self, seed=42, rows=None):
+        self.rng = random.Random(seed)
+        self.rows = rows if rows is not None else load_dataset_rows()
+
+    def row(self):
+        return self.rng.choice(self.rows)
+
+    def predict(self):
+        return feature_payload(self.row())
+
+    def batch(self, n=100):
+        return [feature_payload(self.row()) for _ in range(n)]
+
+    def personality(self):
+        if self.rng.random() < 0.5:
+            return {"user_id": f"user-{self.rng.randint(1, 500)}"}
+        return {"usage_history": [feature_payload(self.row()) for _ in range(self.rng.randint(1, 14))]}
+
+    def recommend_query(self):
+        return urlencode({"query": self.rng.choice(QUERIES), "risk_level": self.rng.choice(RISK_LEVELS),
+                          "cluster": self.rng.choice(CLUSTERS)})
+
+    def session(self, user_id=None):
+        return session_payload(self.row(), self.rng, user_id)
+
+    def trend_query(self):
+        """/risk_trend query for one of TREND_USERS (log sessions for them first)"""
+        return urlencode({"user_id": self.rng.choice(TREND_USERS)})
+
+
+# ─────────────────────────────────────────────
+# Stats / results
+# ─────────────────────────────────────────────
+
+def percentile(sorted_vals, p):
+    if not sorted_vals:
+        return None
+    return sorted_vals[min(len(sorted_vals) - 1, int(round(p / 100 * (len(sorted_vals) - 1))))]
+
+
+def latency_summary(latencies_s, wall_s):
+    vals = sorted(v * 1000 for v in latencies_s)
+    return {
+        "requests": len(vals),
+        "p50_ms": round(percentile(vals, 50), 3),
+        "p95_ms": round(percentile(vals, 95), 3),
+        "p99_ms": round(percentile(vals, 99), 3),
+        "max_ms": round(vals[-1], 3),
+        "throughput_rps": round(len(vals) / wall_s, 1) if wall_s else None,
+    }
+
+
+def run_metadata(**extra):
+    try:
+        rev = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR,
+                             capture_output=True, text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        rev = None
+    return {
+        "timestamp": datetime.utcnow().isoformat(),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        **extra,
+    }
+
+
+def write_results(name, payload, path=None):
+    if path is None:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        path = os.path.join(RESULTS_DIR, f"{name}-{time.strftime('%Y%m%d-%H%M%S')}.json")
+    with open(path, "w") as f:
+        json.dump(payload, f, indent=2)
+    return path
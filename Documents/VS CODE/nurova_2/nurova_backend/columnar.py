@@ -0,0 +1,241 @@
+"""
+Nurova 2.0 — Columnar datasets
+Binary, memory-mappable training data: one .npy file per column plus a small
+JSON schema sidecar. Loading maps the files instead of parsing text, so a
+multi-million-row dataset opens instantly and pages are shared with the OS
+cache rather than copied.
+
+Layout:  dataset/synthetic/
+           schema.json        row count, column order and dtypes
+           <column>.npy       one flat array per column
+
+  python columnar.py csv dataset/synthetic_data.csv dataset/synthetic
+  python columnar.py sessions nurova.db dataset/sessions
+
+  ds = load_dataset("dataset/synthetic")   # read-only memmaps
+  ds["mood_score"][:10]
+  for chunk in ds.iter_frames(100_000): ...
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+import numpy as np
+
+FORMAT = "nurova-columnar"
+VERSION = 1
+SCHEMA_FILE = "schema.json"
+
+
+# ─────────────────────────────────────────────
+# Dataset
+# ─────────────────────────────────────────────
+
+class ColumnarDataset:
+    """Column name → array mapping over a dataset directory"""
+
+    def __init__(self, path, schema, arrays):
+        self.path = path
+        self.schema = schema
+        self.arrays = arrays
+        self.columns = [c["name"] for c in schema["columns"]]
+        self.rows = schema["rows"]
+
+    def __len__(self):
+        return self.rows
+
+    def __getitem__(self, name):
+        return self.arrays[name]
+
+    def __contains__(self, name):
+        return name in self.arrays
+
+    def matrix(self, columns, dtype=np.float64, start=0, stop=None):
+        """Row-major copy of the selected columns (one chunk of them, with start/stop)"""
+        stop = self.rows if stop is None else min(stop, self.rows)
+        out = np.empty((max(stop - start, 0), len(columns)), dtype=dtype)
+        for j, name in enumerate(columns):
+            out[:, j] = self.arrays[name][start:stop]
+        return out
+
+    def iter_frames(self, chunksize, columns=None):
+        """DataFrames of at most `chunksize` rows; each column is a view of the memmap"""
+        import pandas as pd
+        columns = columns or self.columns
+        for start in range(0, self.rows, chunksize):
+            yield pd.DataFrame({c: self.arrays[c][start:start + chunksize] for c in columns}, copy=False)
+
+
+def is_dataset(path):
+    return os.path.isfile(os.path.join(path, SCHEMA_FILE))
+
+
+def load_dataset(path, mmap_mode="r"):
+    with open(os.path.join(path, SCHEMA_FILE)) as f:
+        schema = json.load(f)
+    if schema.get("format") != FORMAT or schema.get("version") != VERSION:
+        raise ValueError(f"{path} is not a {FORMAT} v{VERSION} dataset")
+    arrays = {}
+    for col in schema["columns"]:
+        arr = np.load(os.path.join(path, col["file"]), mmap_mode=mmap_mode)
+        if arr.shape != (schema["rows"],) or arr.dtype != np.dtype(col["dtype"]):
+            raise ValueError(f"{col['file']} does not match {SCHEMA_FILE} "
+                             f"({arr.dtype}{arr.shape} vs {col['dtype']}({schema['rows']},))")
+        arrays[col["name"]] = arr
+    return ColumnarDataset(path, schema, arrays)
+
+
+def save_dataset(path, columns, source=None):
+    """Write in-memory arrays ({name: 1-D array}) as a dataset directory"""
+    names = list(columns)
+    rows = len(columns[names[0]]) if names else 0
+    with DatasetWriter(path, rows, {n: np.asarray(columns[n]).dtype for n in names}, source) as w:
+        w.append({n: np.asarray(columns[n]) for n in names})
+    return load_dataset(path)
+
+
+# ─────────────────────────────────────────────
+# Writer
+# ─────────────────────────────────────────────
+
+class DatasetWriter:
+    """Fill preallocated .npy memmaps chunk by chunk; the schema is written last.
+
+    The row count must be known up front (the converters count first), so
+    memory stays at one chunk however large the dataset is.
+    """
+
+    def __init__(self, path, rows, dtypes, source=None):
+        self.path = path
+        self.rows = rows
+        self.source = source
+        self.dtypes = {name: np.dtype(dt) for name, dt in dtypes.items()}
+        for name, dt in self.dtypes.items():
+            if dt.kind not in "biuf":
+                raise ValueError(f"Column {name!r} has non-numeric dtype {dt}; select numeric columns only")
+        os.makedirs(path, exist_ok=True)
+        # Drop the schema first so a half-written directory never loads
+        if os.path.exists(os.path.join(path, SCHEMA_FILE)):
+            os.remove(os.path.join(path, SCHEMA_FILE))
+        self._arrays = {
+            name: np.lib.format.open_memmap(os.path.join(path, f"{name}.npy"), mode="w+",
+                                            dtype=dt, shape=(rows,))
+            for name, dt in self.dtypes.items()
+        }
+        self.written = 0
+
+    def append(self, chunk):
+        """chunk: DataFrame or {name: array} with every column"""
+        n = len(chunk[next(iter(self.dtypes))])
+        if self.written + n > self.rows:
+            raise ValueError(f"More rows than the {self.rows} announced")
+        for name, dt in self.dtypes.items():
+            values = np.asarray(chunk[name])
+            if values.dtype != dt and not np.can_cast(values.dtype, dt, casting="same_kind"):
+                raise ValueError(f"Column {name!r}: cannot store {values.dtype} as {dt}")
+            self._arrays[name][self.written:self.written + n] = values
+        self.written += n
+
+    def close(self):
+        for arr in self._arrays.values():
+            arr.flush()
+        self._arrays = {}
+        if self.written != self.rows:
+            raise ValueError(f"Wrote {self.written} rows, expected {self.rows}")
+        schema = {
+            "format": FORMAT,
+            "version": VERSION,
+            "rows": self.rows,
+            "columns": [{"name": n, "dtype": dt.str, "file": f"{n}.npy"} for n, dt in self.dtypes.items()],
+            "source": self.source,
+        }
+        tmp = os.path.join(self.path, SCHEMA_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump(schema, f, indent=2)
+        os.replace(tmp, os.path.join(self.path, SCHEMA_FILE))
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is None:
+            self.close()
+        else:
+            self._arrays = {}
+
+
+# ─────────────────────────────────────────────
+# Converters
+# ─────────────────────────────────────────────
+
+def _count_csv_rows(path):
+    """Data rows in a CSV with a header line (handles a missing final newline)"""
+    lines, last = 0, b"\n"
+    with open(path, "rb") as f:
+        while True:
+            block = f.read(1 << 20)
+            if not block:
+                break
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return max(lines - 1, 0)
+
+
+def csv_to_dataset(csv_path, out_path, chunksize=200_000, columns=None):
+    """Convert a CSV; dtypes come from the first chunk (int columns must stay int)"""
+    import pandas as pd
+    rows = _count_csv_rows(csv_path)
+    # round_trip: bit-exact with float(text); the default fast parser can be 1 ulp off
+    reader = pd.read_csv(csv_path, usecols=columns, chunksize=chunksize, float_precision="round_trip")
+    first = next(reader)
+    names = columns or list(first.columns)
+    with DatasetWriter(out_path, rows, {n: first[n].dtype for n in names}, source=csv_path) as w:
+        w.append(first)
+        for chunk in reader:
+            w.append(chunk)
+    return load_dataset(out_path)
+
+
+def sql_to_dataset(db_path, query, out_path, chunksize=200_000, dtypes=None):
+    """Convert the result of a SQL query; NULLs become NaN (columns are float64 by default)"""
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(f"SELECT COUNT(*) FROM ({query})").fetchone()[0]
+        cur = conn.execute(query)
+        names = [d[0] for d in cur.description]
+        dtypes = {n: (dtypes or {}).get(n, np.float64) for n in names}
+        with DatasetWriter(out_path, rows, dtypes, source=db_path) as w:
+            while True:
+                batch = cur.fetchmany(chunksize)
+                if not batch:
+                    break
+                block = np.array(batch, dtype=np.float64).reshape(len(batch), len(names))
+                w.append({n: block[:, j].astype(dtypes[n], copy=False) for j, n in enumerate(names)})
+    finally:
+        conn.close()
+    return load_dataset(out_path)
+
+
+def sessions_to_dataset(db_path, out_path, chunksize=200_000):
+    """Convert logged sessions into the training-feature layout"""
+    from session_store import TRAINING_QUERY
+    return sql_to_dataset(db_path, TRAINING_QUERY, out_path, chunksize,
+                          dtypes={"distraction_risk": np.int64})
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Convert training data to the columnar format")
+    parser.add_argument("kind", choices=["csv", "sessions"])
+    parser.add_argument("source", help="CSV file, or SQLite db with a sessions table")
+    parser.add_argument("out", help="output dataset directory")
+    parser.add_argument("--chunksize", type=int, default=200_000)
+    args = parser.parse_args()
+
+    if args.kind == "csv":
+        ds = csv_to_dataset(args.source, args.out, args.chunksize)
+    else:
+        ds = sessions_to_dataset(args.source, args.out, args.chunksize)
+    print(f"✅ {ds.rows:,} rows × {len(ds.columns)} columns → {args.out}/")
@@ -0,0 +1,63 @@
+"""
+Nurova 2.0 — Gunicorn config
+Run: gunicorn app:app -c gunicorn.conf.py
+
+preload_app imports app.py once in the master; when_ready then loads and
+warms both models there, so every forked worker starts hot and shares the
+(memory-mapped) model pages instead of unpickling its own copy. Newly
+published model versions are hot-swapped inside each worker (model_registry.py).
+
+Workers are threaded (gthread, GUNICORN_THREADS per worker): while one
+request waits on SQLite or the YouTube API the others keep the CPU busy, so a
+box serves more concurrent requests without more model-holding processes.
+Shared state is safe for this: models load once under a lock and are read-only
+afterwards, every pooled SQLite connection is used by one thread at a time,
+and the caches and metrics registry are locked. GUNICORN_THREADS=1 gives the
+old one-request-per-process sync workers.
+"""
+
+import os
+import glob
+import shutil
+import tempfile
+
+# Workers snapshot their runtime metrics here; /metrics/prometheus sums them.
+# Set at config load so it is in the environment before the app is preloaded.
+_own_metrics_dir = "NUROVA_METRICS_DIR" not in os.environ
+if _own_metrics_dir:
+    os.environ["NUROVA_METRICS_DIR"] = tempfile.mkdtemp(prefix="nurova-metrics-")
+
+bind = f"0.0.0.0:{os.getenv('PORT', '5000')}"
+workers = int(os.getenv("WEB_CONCURRENCY", "2"))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+worker_class = "gthread" if threads > 1 else "sync"
+timeout = 120
+preload_app = True
+
+
+def on_starting(server):
+    # Counters restart with the server: drop snapshots left by a previous run
+    for path in glob.glob(os.path.join(os.environ["NUROVA_METRICS_DIR"], "*.json")):
+        os.remove(path)
+
+
+def on_exit(server):
+    if _own_metrics_dir:
+        shutil.rmtree(os.environ["NUROVA_METRICS_DIR"], ignore_errors=True)
+
+
+def when_ready(server):
+    import app
+
+    startup = app.preload_models()
+    server.log.info(
+        "Models (version %s) preloaded in master pid %s: load %.1f ms, warm-up %.1f ms",
+        startup["model_version"], startup["preload_pid"], startup["load_ms"], startup["warmup_ms"],
+    )
+
+
+def worker_exit(server, worker):
+    # Commit any sessions still sitting in the write-behind queue
+    import app
+
+    app.store.close()
@@ -0,0 +1,397 @@
+"""
+Nurova 2.0 — Lightweight inference engine
+Scores the distraction ensemble (StandardScaler → LogReg + RandomForest, soft
+voting) from flat NumPy arrays, without going through sklearn at serve time,
+and assigns personality clusters (StandardScaler → KMeans) with one
+vectorized nearest-centroid pass (ClusterEngine, compiled at load time).
+Optionally, RiskTable answers from the ensemble precomputed over a quantized
+feature grid (O(1) lookup plus interpolation, within a measured error bound).
+
+Export:  python train_models.py --export-engine [--risk-table]
+Layout:  models/distraction_engine/
+           engine.json        feature order, tree count, max depth
+           <name>.npy         one flat array per field (mmap-friendly)
+         models/risk_table/
+           table.json         grid axes, engine fingerprint, held-out error
+           risk_table.npy     uint16 risk per grid point (C order)
+"""
+
+import os
+import json
+import hashlib
+import numpy as np
+
+ENGINE_DIR = os.path.join("models", "distraction_engine")
+
+ENGINE_ARRAYS = (
+    "scaler_mean", "scaler_scale",
+    "lr_coef", "lr_intercept",
+    "tree_roots", "tree_feature", "tree_threshold",
+    "tree_left", "tree_right", "tree_value",
+)
+
+# Rows whose two nearest centroids are within this (relative) distance of each
+# other are re-assigned by KMeans.predict itself, so rounding differences in
+# the folded arithmetic can never flip a label
+CLUSTER_TIE_TOLERANCE = 1e-9
+CLUSTER_CHUNK_ROWS = 16384
+
+RISK_TABLE_DIR = os.path.join("models", "risk_table")
+# Risk table values are stored as round(p * RISK_TABLE_SCALE) in uint16
+RISK_TABLE_SCALE = 65535
+# Held-out |table - ensemble| above either bound: not saved, not served
+RISK_TABLE_MAX_ERROR = float(os.getenv("NUROVA_RISK_TABLE_MAX_ERROR", "0.10"))
+RISK_TABLE_MEAN_ERROR = float(os.getenv("NUROVA_RISK_TABLE_MEAN_ERROR", "0.02"))
+RISK_TABLE_SLAB_CELLS = 4_000_000
+
+
+# ─────────────────────────────────────────────
+# Export (needs the fitted sklearn objects)
+# ─────────────────────────────────────────────
+
+def compile_distraction_model(pkg):
+    """Flatten a distraction model package into plain arrays.
+
+    Every tree's nodes are concatenated into one set of arrays; child indices
+    are rewritten to global offsets and leaves point at themselves so the
+    traversal can run a fixed number of steps without branching on leaves.
+    """
+    ensemble = pkg["model"]
+    scaler = pkg["scaler"]
+    lr, rf = ensemble.named_estimators_["lr"], ensemble.named_estimators_["rf"]
+
+    roots, feature, threshold, left, right, value = [], [], [], [], [], []
+    offset = 0
+    max_depth = 0
+    for est in rf.estimators_:
+        tree = est.tree_
+        n = tree.node_count
+        idx = np.arange(n)
+        is_leaf = tree.children_left == -1
+
+        # Leaf probability of the positive class, normalized the same way
+        # DecisionTreeClassifier.predict_proba does
+        counts = tree.value[:, 0, :].astype(np.float64)
+        norm = counts.sum(axis=1)
+        norm[norm == 0.0] = 1.0
+        proba = counts / norm[:, None]
+
+        roots.append(offset)
+        feature.append(np.where(is_leaf, 0, tree.feature))
+        threshold.append(np.where(is_leaf, 0.0, tree.threshold))
+        left.append(np.where(is_leaf, idx, tree.children_left) + offset)
+        right.append(np.where(is_leaf, idx, tree.children_right) + offset)
+        value.append(proba[:, 1])
+        offset += n
+        max_depth = max(max_depth, int(tree.max_depth))
+
+    arrays = {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "lr_coef": np.asarray(lr.coef_[0], dtype=np.float64),
+        "lr_intercept": np.asarray(lr.intercept_, dtype=np.float64),
+        "tree_roots": np.asarray(roots, dtype=np.int32),
+        "tree_feature": np.concatenate(feature).astype(np.int32),
+        "tree_threshold": np.concatenate(threshold).astype(np.float64),
+        "tree_left": np.concatenate(left).astype(np.int32),
+        "tree_right": np.concatenate(right).astype(np.int32),
+        "tree_value": np.concatenate(value).astype(np.float64),
+    }
+    meta = {
+        "features": list(pkg["features"]),
+        "n_trees": len(rf.estimators_),
+        "n_nodes": int(offset),
+        "max_depth": max_depth,
+    }
+    return DistractionEngine(meta, arrays)
+
+
+def compile_cluster_model(pkg):
+    """Nearest-centroid evaluator for a cluster package (StandardScaler + KMeans).
+
+    The fitted objects are kept only to settle near-ties exactly the way
+    model.predict would.
+    """
+    model, scaler = pkg["model"], pkg["scaler"]
+    arrays = {
+        "scaler_mean": np.asarray(scaler.mean_, dtype=np.float64),
+        "scaler_scale": np.asarray(scaler.scale_, dtype=np.float64),
+        "centers": np.asarray(model.cluster_centers_, dtype=np.float64),
+    }
+    meta = {"features": list(pkg["features"]), "n_clusters": int(model.n_clusters)}
+    return ClusterEngine(meta, arrays, exact=lambda X: model.predict(scaler.transform(X)))
+
+
+def compile_risk_table(engine, axes, exact=None):
+    """Tabulate engine.predict_risk on a uniform grid.
+
+    axes: [(feature, min, max, points)] in engine feature order. Discrete
+    features should use one point per value, so integer inputs are exact.
+    """
+    if [a[0] for a in axes] != list(engine.features):
+        raise ValueError("risk table axes must follow the engine's feature order")
+    grids = [np.linspace(lo, hi, int(points)) for _, lo, hi, points in axes]
+    values = np.empty(tuple(len(g) for g in grids), dtype=np.uint16)
+    # Built in slabs along the first axis to bound the float64 working set
+    step = max(1, RISK_TABLE_SLAB_CELLS // (values.size // len(grids[0])))
+    for start in range(0, len(grids[0]), step):
+        slab = engine.grid_risk([grids[0][start:start + step], *grids[1:]])
+        values[start:start + step] = np.rint(slab * RISK_TABLE_SCALE)
+    meta = {
+        "features": list(engine.features),
+        "axes": [{"feature": f, "min": float(lo), "max": float(hi), "points": int(points)}
+                 for f, lo, hi, points in axes],
+        "engine_fingerprint": engine_fingerprint(engine),
+        "cells": int(values.size),
+        "bytes": int(values.nbytes),
+    }
+    return RiskTable(meta, {"risk_table": values.ravel()}, exact)
+
+
+def engine_fingerprint(engine):
+    """Hash of the engine arrays; a risk table is only served with the engine it was built from"""
+    digest = hashlib.sha1()
+    for name in ENGINE_ARRAYS:
+        digest.update(np.ascontiguousarray(engine.arrays[name]).tobytes())
+    return digest.hexdigest()
+
+
+def replace_file(path, write, mode="wb"):
+    """write(f) into a temp file next to path, then os.replace it over path.
+
+    Serving workers memory-map model files in place (mmap_mode="r"); writing
+    over them in place truncates the mapped file and the workers die with
+    SIGBUS on their next access. A replaced file keeps the old inode alive
+    for whoever still maps it.
+    """
+    tmp = f"{path}.tmp-{os.getpid()}"
+    try:
+        with open(tmp, mode) as f:
+            write(f)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def save_risk_table(table, path=RISK_TABLE_DIR):
+    os.makedirs(path, exist_ok=True)
+    replace_file(os.path.join(path, "risk_table.npy"), lambda f: np.save(f, table.arrays["risk_table"]))
+    replace_file(os.path.join(path, "table.json"), lambda f: json.dump(table.meta, f, indent=2), mode="w")
+
+
+def load_risk_table(path=RISK_TABLE_DIR, exact=None, mmap_mode=None):
+    with open(os.path.join(path, "table.json")) as f:
+        meta = json.load(f)
+    arrays = {"risk_table": np.load(os.path.join(path, "risk_table.npy"), mmap_mode=mmap_mode)}
+    return RiskTable(meta, arrays, exact)
+
+
+def save_engine(engine, path=ENGINE_DIR):
+    os.makedirs(path, exist_ok=True)
+    for name in ENGINE_ARRAYS:
+        replace_file(os.path.join(path, f"{name}.npy"), lambda f, name=name: np.save(f, engine.arrays[name]))
+    replace_file(os.path.join(path, "engine.json"), lambda f: json.dump(engine.meta, f, indent=2), mode="w")
+
+
+def load_engine(path=ENGINE_DIR, mmap_mode=None):
+    with open(os.path.join(path, "engine.json")) as f:
+        meta = json.load(f)
+    arrays = {
+        name: np.load(os.path.join(path, f"{name}.npy"), mmap_mode=mmap_mode)
+        for name in ENGINE_ARRAYS
+    }
+    return DistractionEngine(meta, arrays)
+
+
+# ─────────────────────────────────────────────
+# Evaluator
+# ─────────────────────────────────────────────
+
+class DistractionEngine:
+    """Array-backed equivalent of VotingClassifier(LogReg + RF).predict_proba"""
+
+    def __init__(self, meta, arrays):
+        self.meta = meta
+        self.arrays = arrays
+        self.features = meta["features"]
+        self.max_depth = meta["max_depth"]
+
+        mean, scale = arrays["scaler_mean"], arrays["scaler_scale"]
+        coef = arrays["lr_coef"]
+
+        # Fold the scaler into the LogReg weights: w·((x-μ)/σ)+b = (w/σ)·x + (b - Σ wμ/σ)
+        self._lr_w = coef / scale
+        self._lr_b = float(arrays["lr_intercept"][0] - np.dot(coef, mean / scale))
+        self._mean = mean
+        self._scale = scale
+
+        self._roots = arrays["tree_roots"]
+        self._feature = arrays["tree_feature"]
+        self._threshold = arrays["tree_threshold"]
+        self._left = arrays["tree_left"]
+        self._right = arrays["tree_right"]
+        self._value = arrays["tree_value"]
+
+    def predict_risk(self, X):
+        """Positive-class probability for raw (unscaled) feature rows"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+
+        z = X @ self._lr_w + self._lr_b
+        p_lr = 1.0 / (1.0 + np.exp(-z))
+
+        # sklearn trees compare float32 inputs against float64 thresholds
+        X_tree = ((X - self._mean) / self._scale).astype(np.float32)
+
+        n = X.shape[0]
+        rows = np.repeat(np.arange(n), len(self._roots))
+        node = np.tile(self._roots, n)
+        for _ in range(self.max_depth):
+            go_left = X_tree[rows, self._feature[node]] <= self._threshold[node]
+            node = np.where(go_left, self._left[node], self._right[node])
+        p_rf = self._value[node].reshape(n, -1).mean(axis=1)
+
+        return (p_lr + p_rf) / 2.0
+
+    def grid_risk(self, grids):
+        """predict_risk at every point of the Cartesian product of grids (one
+        ascending 1-D array per feature), as an array of that shape.
+
+        The LogReg term is a separable sum; each tree is walked once over
+        sub-boxes of the grid (a split cuts one axis into a prefix and a
+        suffix), so the cost is nodes + grid size per tree rather than a
+        traversal per grid point.
+        """
+        shape = tuple(len(g) for g in grids)
+        z = np.full(shape, self._lr_b)
+        for d, g in enumerate(grids):
+            z += (self._lr_w[d] * np.asarray(g, dtype=np.float64)).reshape(
+                [-1 if i == d else 1 for i in range(len(shape))])
+        p_lr = 1.0 / (1.0 + np.exp(-z))
+        del z
+
+        # Same float32 comparison as predict_risk, as sorted float64 per axis
+        scaled = [((np.asarray(g, dtype=np.float64) - self._mean[d]) / self._scale[d])
+                  .astype(np.float32).astype(np.float64) for d, g in enumerate(grids)]
+        p_rf = np.zeros(shape)
+        for root in self._roots:
+            stack = [(int(root), ((0, n) for n in shape))]
+            while stack:
+                node, box = stack.pop()
+                box = tuple(box)
+                if self._left[node] == node:
+                    p_rf[tuple(slice(a, b) for a, b in box)] += self._value[node]
+                    continue
+                f = int(self._feature[node])
+                a, b = box[f]
+                cut = min(max(int(np.searchsorted(scaled[f], self._threshold[node], side="right")), a), b)
+                if cut > a:
+                    stack.append((int(self._left[node]), box[:f] + ((a, cut),) + box[f + 1:]))
+                if cut < b:
+                    stack.append((int(self._right[node]), box[:f] + ((cut, b),) + box[f + 1:]))
+        p_rf /= len(self._roots)
+
+        p_lr += p_rf
+        p_lr /= 2.0
+        return p_lr
+
+
+class ClusterEngine:
+    """Array-backed equivalent of KMeans.predict(StandardScaler.transform(X))"""
+
+    def __init__(self, meta, arrays, exact=None):
+        self.meta = meta
+        self.arrays = arrays
+        self.features = meta["features"]
+        self._exact = exact
+
+        mean, scale = arrays["scaler_mean"], arrays["scaler_scale"]
+        # Fold the scaler into the centroids: ‖(x-μ)/σ - c‖² = Σ w(x - c')² with
+        # c' = μ + σc and w = 1/σ². Expanded, Σ wx² is the same for every
+        # centroid, so the argmin only needs x·(-2wc') + Σ wc'²
+        centers = mean + scale * arrays["centers"]
+        self._w = 1.0 / (scale * scale)
+        self._cross = (-2.0 * self._w * centers).T
+        self._bias = (self._w * centers * centers).sum(axis=1)
+
+    def predict(self, X, chunk_rows=CLUSTER_CHUNK_ROWS):
+        """Cluster id per raw (unscaled) feature row, chunk_rows rows at a time"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        labels = np.empty(len(X), dtype=np.int64)
+        for start in range(0, len(X), chunk_rows):
+            chunk = X[start:start + chunk_rows]
+            labels[start:start + len(chunk)] = self._assign(chunk)
+        return labels
+
+    def _assign(self, X):
+        dist = X @ self._cross + self._bias
+        labels = dist.argmin(axis=1)
+        if self._exact is None or dist.shape[1] < 2:
+            return labels
+        nearest = np.partition(dist, 1, axis=1)
+        magnitude = (X * X) @ self._w + np.abs(nearest[:, 0]) + 1.0
+        near_tie = nearest[:, 1] - nearest[:, 0] <= CLUSTER_TIE_TOLERANCE * magnitude
+        if near_tie.any():
+            labels[near_tie] = self._exact(X[near_tie])
+        return labels
+
+
+class RiskTable:
+    """Quantized DistractionEngine.predict_risk over a uniform feature grid.
+
+    A row's grid cell is found by arithmetic (O(1)) and its risk is the
+    multilinear interpolation of the cell's corners; only axes where some row
+    falls between grid points are interpolated, so integer inputs on the
+    discrete axes cost nothing. Rows outside the grid go to `exact`.
+    """
+
+    def __init__(self, meta, arrays, exact=None):
+        self.meta = meta
+        self.arrays = arrays
+        self.features = meta["features"]
+        self._exact = exact
+
+        axes = meta["axes"]
+        self._lo = np.array([a["min"] for a in axes], dtype=np.float64)
+        self._hi = np.array([a["max"] for a in axes], dtype=np.float64)
+        points = np.array([a["points"] for a in axes], dtype=np.int64)
+        self._step = (self._hi - self._lo) / (points - 1)
+        self._last = points - 2
+        self._strides = np.cumprod(np.r_[points[1:], 1][::-1])[::-1].astype(np.int64)
+        self._values = arrays["risk_table"]
+
+    def predict_risk(self, X):
+        """Positive-class probability for raw (unscaled) feature rows"""
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X[None, :]
+        inside = self.covers(X)
+        if not inside.all():
+            out = np.empty(len(X))
+            outside = ~inside
+            out[outside] = self._exact(X[outside]) if self._exact is not None else \
+                self._lookup(np.clip(X[outside], self._lo, self._hi))
+            out[inside] = self._lookup(X[inside])
+            return out
+        return self._lookup(X)
+
+    def covers(self, X):
+        """Mask of the rows inside the grid"""
+        return ((X >= self._lo) & (X <= self._hi)).all(axis=1)
+
+    def _lookup(self, X):
+        t = (X - self._lo) / self._step
+        cell = np.minimum(t.astype(np.int64), self._last)
+        frac = t - cell
+        base = cell @ self._strides
+        active = np.flatnonzero((frac != 0.0).any(axis=0))
+        # One column per cell corner over the active axes
+        bits = (np.arange(1 << len(active))[:, None] >> np.arange(len(active))) & 1
+        f = frac[:, active][:, None, :]
+        weights = np.where(bits[None, :, :] == 1, f, 1.0 - f).prod(axis=2)
+        corners = self._values[base[:, None] + bits @ self._strides[active]]
+        return (weights * corners).sum(axis=1) / RISK_TABLE_SCALE
@@ -0,0 +1,197 @@
+"""
+Nurova 2.0 — Runtime instrumentation
+In-process counters and latency histograms rendered in Prometheus text
+format. Under gunicorn every worker snapshots its registry to
+$NUROVA_METRICS_DIR/<pid>.json (at most once per FLUSH_INTERVAL, and on
+demand), and the scrape endpoint sums all snapshots, so numbers are
+aggregated across workers — including workers that have since exited.
+Without NUROVA_METRICS_DIR (python app.py) only the local registry is used.
+
+  metrics.inc("nurova_distraction_fallback_total")
+  with metrics.time("predict_proba"):
+      ...
+  metrics.render()       # Prometheus exposition text
+"""
+
+import os
+import json
+import time
+import glob
+import threading
+from contextlib import contextmanager
+
+METRICS_DIR = os.getenv("NUROVA_METRICS_DIR") or None
+FLUSH_INTERVAL = float(os.getenv("NUROVA_METRICS_FLUSH_INTERVAL", "1.0"))
+
+# Seconds; covers sub-millisecond model calls up to slow upstream requests
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+HELP = {
+    "nurova_http_requests_total": ("counter", "HTTP requests by route, method and status"),
+    "nurova_http_request_duration_seconds": ("histogram", "End-to-end request latency by route"),
+    "nurova_stage_duration_seconds": ("histogram", "Time spent in one processing stage"),
+    "nurova_distraction_fallback_total": ("counter", "Rows scored by the heuristic because the model failed"),
+    "nurova_personality_fallback_total": ("counter", "Personality requests answered with the default cluster"),
+    "nurova_model_reloads_total": ("counter", "Background model version reloads by result"),
+}
+
+
+def _label_str(labels):
+    if not labels:
+        return ""
+    body = ",".join(
+        '{}="{}"'.format(k, str(v).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"'))
+        for k, v in labels
+    )
+    return "{" + body + "}"
+
+
+class Registry:
+    def __init__(self, metrics_dir=METRICS_DIR, flush_interval=FLUSH_INTERVAL):
+        self.metrics_dir = metrics_dir
+        self.flush_interval = flush_interval
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()     # one snapshot write at a time per process
+        self._counters = {}     # (name, labels) → float
+        self._histograms = {}   # (name, labels) → [bucket counts..., +Inf count, sum]
+        self._pid = os.getpid()
+        self._last_flush = 0.0
+        self._trailing = None
+        self._trailing_pid = None
+
+    def _trailing_flush(self):
+        with self._lock:
+            self._trailing = None
+        self.flush(force=True)
+
+    def _check_fork(self):
+        # A forked worker starts from zero: the parent's counts live in the parent's file
+        if self._pid != os.getpid():
+            self._counters, self._histograms = {}, {}
+            self._pid = os.getpid()
+            self._last_flush = 0.0
+
+    # ── recording ───────────────────────────────
+
+    def inc(self, name, amount=1, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            self._counters[key] = self._counters.get(key, 0) + amount
+
+    def observe(self, name, seconds, **labels):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self._check_fork()
+            h = self._histograms.get(key)
+            if h is None:
+                h = self._histograms[key] = [0] * (len(BUCKETS) + 1) + [0.0]
+            for i, bound in enumerate(BUCKETS):
+                if seconds <= bound:
+                    h[i] += 1
+                    break
+            else:
+                h[len(BUCKETS)] += 1
+            h[-1] += seconds
+
+    @contextmanager
+    def time(self, stage):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe("nurova_stage_duration_seconds", time.perf_counter() - t0, stage=stage)
+
+    # ── cross-process snapshots ─────────────────
+
+    def _snapshot(self):
+        with self._lock:
+            self._check_fork()
+            return {
+                "counters": [[n, list(map(list, l)), v] for (n, l), v in self._counters.items()],
+                "histograms": [[n, list(map(list, l)), list(h)] for (n, l), h in self._histograms.items()],
+            }
+
+    def flush(self, force=False):
+        """Write this process's snapshot for the aggregating scrape.
+
+        Throttled to one write per flush_interval; a skipped flush schedules a
+        trailing one so an idle worker's last requests still get published.
+        """
+        if not self.metrics_dir:
+            return
+        now = time.monotonic()
+        wait = self.flush_interval - (now - self._last_flush)
+        if not force and wait > 0:
+            with self._lock:
+                if self._trailing is None or self._trailing_pid != os.getpid():
+                    self._trailing = threading.Timer(wait, self._trailing_flush)
+                    self._trailing.daemon = True
+                    self._trailing_pid = os.getpid()
+                    self._trailing.start()
+            return
+        # Threads of one worker share the snapshot file (and its .tmp)
+        with self._flush_lock:
+            self._last_flush = now
+            os.makedirs(self.metrics_dir, exist_ok=True)
+            path = os.path.join(self.metrics_dir, f"{os.getpid()}.json")
+            tmp = path + ".tmp"
+            with open(tmp, "w") as f:
+                json.dump(self._snapshot(), f)
+            os.replace(tmp, path)
+
+    def collect(self):
+        """(counters, histograms) summed over every process's snapshot"""
+        snapshots = []
+        if self.metrics_dir:
+            self.flush(force=True)
+            for path in glob.glob(os.path.join(self.metrics_dir, "*.json")):
+                try:
+                    with open(path) as f:
+                        snapshots.append(json.load(f))
+                except (OSError, ValueError):
+                    continue
+        else:
+            snapshots.append(self._snapshot())
+
+        counters, histograms = {}, {}
+        for snap in snapshots:
+            for name, labels, value in snap["counters"]:
+                key = (name, tuple(map(tuple, labels)))
+                counters[key] = counters.get(key, 0) + value
+            for name, labels, h in snap["histograms"]:
+                key = (name, tuple(map(tuple, labels)))
+                acc = histograms.setdefault(key, [0] * len(h))
+                for i, v in enumerate(h):
+                    acc[i] += v
+        return counters, histograms
+
+    # ── exposition ──────────────────────────────
+
+    def render(self, extra_lines=()):
+        counters, histograms = self.collect()
+        lines = []
+        names = sorted({n for n, _ in counters} | {n for n, _ in histograms})
+        for name in names:
+            kind, help_text = HELP.get(name, ("untyped", name))
+            lines.append(f"# HELP {name} {help_text}")
+            lines.append(f"# TYPE {name} {kind}")
+            for (n, labels), value in sorted(counters.items()):
+                if n == name:
+                    lines.append(f"{name}{_label_str(labels)} {value}")
+            for (n, labels), h in sorted(histograms.items()):
+                if n != name:
+                    continue
+                cumulative = 0
+                for bound, count in zip(BUCKETS, h):
+                    cumulative += count
+                    lines.append(f"{name}_bucket{_label_str(labels + (('le', bound),))} {cumulative}")
+                cumulative += h[len(BUCKETS)]
+                lines.append(f"{name}_bucket{_label_str(labels + (('le', '+Inf'),))} {cumulative}")
+                lines.append(f"{name}_sum{_label_str(labels)} {h[-1]}")
+                lines.append(f"{name}_count{_label_str(labels)} {cumulative}")
+        lines.extend(extra_lines)
+        return "\n".join(lines) + "\n"
+
+
+metrics = Registry()
@@ -0,0 +1,348 @@
+"""
+Nurova 2.0 — Versioned models with hot reload
+Each published model set lives in its own directory; models/manifest.json
+names the active one. Workers stat the manifest (at most every
+NUROVA_MODEL_POLL_SECONDS), load a new version on a background thread,
+smoke-test it, and only then swap it in. A request keeps the bundle it
+started with, so in-flight requests never see a half-switched model.
+
+Layout:  models/manifest.json             {"version": ..., "path": "versions/<version>"}
+         models/versions/<version>/       distraction_model.pkl, cluster_model.pkl,
+                                          distraction_engine/, risk_table/, *_metrics.json
+Without a manifest the flat files in models/ are served as version "unversioned".
+
+  python model_registry.py publish            # snapshot models/*.pkl as a new version
+  publish_derived("models", {"cluster_model.pkl": write})  # active version with artifacts replaced
+  python model_registry.py activate <version> # roll forward / back
+  python model_registry.py list
+"""
+
+import os
+import json
+import time
+import shutil
+import argparse
+import threading
+from datetime import datetime
+
+# joblib / numpy (and, through the pickles, sklearn) are imported when a
+# bundle is first loaded, not when the app or the CLI imports this module
+
+MANIFEST = "manifest.json"
+VERSIONS_DIR = "versions"
+UNVERSIONED = "unversioned"
+POLL_SECONDS = float(os.getenv("NUROVA_MODEL_POLL_SECONDS", "5"))
+# Serve distraction risk from the version's risk_table/ when it is usable
+RISK_TABLE_MODE = os.getenv("NUROVA_RISK_TABLE", "0").lower() in ("1", "true", "yes")
+
+ARTIFACTS = (
+    "distraction_model.pkl", "cluster_model.pkl", "distraction_engine",
+    "distraction_metrics.json", "cluster_metrics.json", "cluster_update.json", "risk_table",
+)
+
+
+# ─────────────────────────────────────────────
+# Bundle
+# ─────────────────────────────────────────────
+
+class ModelBundle:
+    """One loaded, validated model set. Never mutated after it goes live,
+    except for the lazily unpickled sklearn distraction package."""
+
+    def __init__(self, version, path):
+        self.version = version
+        self.path = path
+        self.engine = None
+        self.scorer = None          # risk scorer: the risk table if enabled and usable, else the engine
+        self.risk_table = "disabled"
+        self.cluster_model = None
+        self.cluster_engine = None
+        self._distraction_model = None
+        self._lock = threading.Lock()
+        self.loaded_at = None
+        self.load_ms = None
+        self.validate_ms = None
+
+    def distraction_model(self):
+        """sklearn package; only unpickled when something needs it"""
+        if self._distraction_model is None:
+            import joblib
+
+            with self._lock:
+                if self._distraction_model is None:
+                    path = os.path.join(self.path, "distraction_model.pkl")
+                    if not os.path.exists(path):
+                        raise FileNotFoundError("distraction_model.pkl not found. Run train_models.py first.")
+                    self._distraction_model = joblib.load(path, mmap_mode="r")
+        return self._distraction_model
+
+    def load(self):
+        import joblib
+        from inference import compile_cluster_model, compile_distraction_model, load_engine
+
+        t0 = time.perf_counter()
+        engine_dir = os.path.join(self.path, "distraction_engine")
+        if os.path.exists(os.path.join(engine_dir, "engine.json")):
+            self.engine = load_engine(engine_dir, mmap_mode="r")
+        else:
+            self.engine = compile_distraction_model(self.distraction_model())
+        self.scorer = self.engine
+        if RISK_TABLE_MODE:
+            table, self.risk_table = self._load_risk_table()
+            if table is not None:
+                self.scorer = table
+        path = os.path.join(self.path, "cluster_model.pkl")
+        if not os.path.exists(path):
+            raise FileNotFoundError("cluster_model.pkl not found. Run train_models.py first.")
+        self.cluster_model = joblib.load(path, mmap_mode="r")
+        self.cluster_engine = compile_cluster_model(self.cluster_model)
+        self.load_ms = round((time.perf_counter() - t0) * 1000, 2)
+        return self
+
+    def _load_risk_table(self):
+        """(table or None, status); a table is refused unless it was built from
+        this engine and its held-out error is within the configured bounds"""
+        from inference import RISK_TABLE_MAX_ERROR, RISK_TABLE_MEAN_ERROR, engine_fingerprint, load_risk_table
+
+        path = os.path.join(self.path, "risk_table")
+        if not os.path.exists(os.path.join(path, "table.json")):
+            return None, "missing"
+        table = load_risk_table(path, exact=self.engine.predict_risk, mmap_mode="r")
+        if table.meta["engine_fingerprint"] != engine_fingerprint(self.engine):
+            return None, "stale"
+        error = table.meta.get("error", {})
+        if error.get("max_abs_error", 1.0) > RISK_TABLE_MAX_ERROR or \
+                error.get("mean_abs_error", 1.0) > RISK_TABLE_MEAN_ERROR:
+            return None, "over_error_bound"
+        return table, "active"
+
+    def info(self):
+        return {
+            "version": self.version,
+            "risk_table": self.risk_table,
+            "loaded_at": self.loaded_at,
+            "load_ms": self.load_ms,
+            "validate_ms": self.validate_ms,
+        }
+
+
+# ─────────────────────────────────────────────
+# Registry
+# ─────────────────────────────────────────────
+
+def read_manifest(models_dir):
+    try:
+        with open(os.path.join(models_dir, MANIFEST)) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def active_version(models_dir):
+    """(version, directory) the manifest points at, or the flat files in models_dir"""
+    manifest = read_manifest(models_dir)
+    if manifest is None:
+        return UNVERSIONED, models_dir
+    return manifest["version"], os.path.join(models_dir, manifest["path"])
+
+
+class ModelRegistry:
+    def __init__(self, models_dir, smoke_test=None, poll_seconds=POLL_SECONDS, on_reload=None):
+        self.models_dir = models_dir
+        self.smoke_test = smoke_test        # bundle → None, raises if the bundle is unusable
+        self.poll_seconds = poll_seconds
+        self.on_reload = on_reload          # (version, ok, seconds) after every background reload
+        self._current = None
+        self._lock = threading.Lock()
+        self._loading = False
+        self._next_poll = 0.0
+        self._manifest_stamp = None
+        self._peeked = (None, None)         # (stamp, version) read by version() before the first load
+        self.reloads = 0
+        self.reload_failures = 0
+        self.last_error = None
+
+    def _stamp(self):
+        try:
+            st = os.stat(os.path.join(self.models_dir, MANIFEST))
+            return (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            return None
+
+    def _target(self):
+        return active_version(self.models_dir)
+
+    def _build(self, version, path):
+        bundle = ModelBundle(version, path).load()
+        t0 = time.perf_counter()
+        if self.smoke_test is not None:
+            self.smoke_test(bundle)
+        bundle.validate_ms = round((time.perf_counter() - t0) * 1000, 2)
+        bundle.loaded_at = datetime.utcnow().isoformat()
+        return bundle
+
+    def current(self):
+        """The live bundle; loaded synchronously the first time (or until it first succeeds)"""
+        bundle = self._current
+        if bundle is None:
+            with self._lock:
+                if self._current is None:
+                    self._manifest_stamp = self._stamp()
+                    self._current = self._build(*self._target())
+                    self._next_poll = time.monotonic() + self.poll_seconds
+                bundle = self._current
+        return bundle
+
+    def version(self):
+        """Active version string without loading anything: the live bundle's,
+        or before the first load the manifest's (re-read only when it changes)"""
+        bundle = self._current
+        if bundle is not None:
+            return bundle.version
+        stamp = self._stamp()
+        if self._peeked[0] != stamp or self._peeked[1] is None:
+            self._peeked = (stamp, self._target()[0])
+        return self._peeked[1]
+
+    def poll(self):
+        """Cheap per-request check; starts a background reload when the manifest changed"""
+        now = time.monotonic()
+        if now < self._next_poll or self._current is None:
+            return
+        self._next_poll = now + self.poll_seconds
+        stamp = self._stamp()
+        if stamp == self._manifest_stamp:
+            return
+        with self._lock:
+            if self._loading:
+                return
+            self._loading = True
+        threading.Thread(target=self._reload, args=(stamp,), name="nurova-model-reload", daemon=True).start()
+
+    def _reload(self, stamp):
+        t0 = time.perf_counter()
+        version = None
+        try:
+            version, path = self._target()
+            if version != self._current.version:
+                bundle = self._build(version, path)
+                self._current = bundle       # atomic reference swap
+                self.reloads += 1
+                self.last_error = None
+                if self.on_reload:
+                    self.on_reload(version, True, time.perf_counter() - t0)
+            self._manifest_stamp = stamp
+        except Exception as e:
+            # Keep serving the old bundle; retry only once the manifest changes again
+            self._manifest_stamp = stamp
+            self.reload_failures += 1
+            self.last_error = f"{version}: {type(e).__name__}: {e}"
+            if self.on_reload:
+                self.on_reload(version, False, time.perf_counter() - t0)
+        finally:
+            with self._lock:
+                self._loading = False
+
+    def reload_now(self):
+        """Synchronous check-and-swap (tests, benchmarks, admin tooling)"""
+        with self._lock:
+            if self._loading:
+                return self._current
+            self._loading = True
+        self._reload(self._stamp())
+        return self._current
+
+    def status(self):
+        bundle = self._current
+        return {
+            **(bundle.info() if bundle else {"version": None}),
+            "reloads": self.reloads,
+            "reload_failures": self.reload_failures,
+            "last_error": self.last_error,
+        }
+
+
+# ─────────────────────────────────────────────
+# Publishing
+# ─────────────────────────────────────────────
+
+def write_manifest(models_dir, version):
+    manifest = {
+        "version": version,
+        "path": os.path.join(VERSIONS_DIR, version),
+        "activated_at": datetime.utcnow().isoformat(),
+    }
+    tmp = os.path.join(models_dir, MANIFEST + ".tmp")
+    with open(tmp, "w") as f:
+        json.dump(manifest, f, indent=2)
+    os.replace(tmp, os.path.join(models_dir, MANIFEST))
+    return manifest
+
+
+def _snapshot(models_dir, src_dir, version, writers=None, activate=True):
+    """versions/<version>/ = src_dir's artifacts, except those produced by writers
+    ({artifact name: callable(path)}); activated once fully written"""
+    writers = writers or {}
+    if version is None:
+        # Timestamped; a second publish within the same second gets a suffix
+        stamp = datetime.utcnow().strftime("%Y%m%d-%H%M%S")
+        version, n = stamp, 1
+        while os.path.exists(os.path.join(models_dir, VERSIONS_DIR, version)):
+            n += 1
+            version = f"{stamp}-{n}"
+    dest = os.path.join(models_dir, VERSIONS_DIR, version)
+    if os.path.exists(dest):
+        raise FileExistsError(f"Model version {version} already exists")
+    tmp = dest + ".tmp"
+    os.makedirs(tmp)
+    for name in ARTIFACTS:
+        src = os.path.join(src_dir, name)
+        if name in writers:
+            writers[name](os.path.join(tmp, name))
+        elif os.path.isdir(src):
+            shutil.copytree(src, os.path.join(tmp, name))
+        elif os.path.exists(src):
+            shutil.copy2(src, os.path.join(tmp, name))
+    # Fully written before the manifest can point at it
+    os.replace(tmp, dest)
+    if activate:
+        write_manifest(models_dir, version)
+    return version
+
+
+def publish(models_dir="models", version=None, activate=True):
+    """Copy the flat artifacts in models_dir into versions/<version>/ (and activate it)"""
+    return _snapshot(models_dir, models_dir, version, activate=activate)
+
+
+def publish_derived(models_dir, writers, version=None, activate=True):
+    """New version from the active one with some artifacts rewritten, e.g. an
+    incrementally updated cluster_model.pkl next to the unchanged distraction model"""
+    return _snapshot(models_dir, active_version(models_dir)[1], version, writers, activate)
+
+
+def list_versions(models_dir="models"):
+    root = os.path.join(models_dir, VERSIONS_DIR)
+    if not os.path.isdir(root):
+        return []
+    return sorted(v for v in os.listdir(root) if not v.endswith(".tmp"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Manage versioned Nurova model artifacts")
+    parser.add_argument("command", choices=["publish", "activate", "list"])
+    parser.add_argument("version", nargs="?")
+    parser.add_argument("--models-dir", default="models")
+    args = parser.parse_args()
+
+    if args.command == "publish":
+        print(f"✅ Published and activated model version {publish(args.models_dir, args.version)}")
+    elif args.command == "activate":
+        if args.version not in list_versions(args.models_dir):
+            raise SystemExit(f"Unknown version {args.version!r}; see `python model_registry.py list`")
+        write_manifest(args.models_dir, args.version)
+        print(f"✅ Activated model version {args.version}")
+    else:
+        active = (read_manifest(args.models_dir) or {}).get("version")
+        for v in list_versions(args.models_dir):
+            print(f"{'*' if v == active else ' '} {v}")
@@ -0,0 +1,134 @@
+"""
+Nurova 2.0 — Personality clusters
+Display data for the four personality clusters, and batch labeling for
+cohort reports through the active model version's ClusterEngine (the scaler
+folded into the KMeans centroids, one vectorized distance pass per chunk).
+
+  python personality.py csv dataset/synthetic_data.csv labels.ndjson
+  python personality.py dataset dataset/synthetic labels.ndjson
+  python personality.py users nurova.db cohort.ndjson     # every user with stored sessions
+
+Each output line is {"row" | "user_id", "cluster", "traits", "emoji",
+"display_name"}; memory stays at one --chunk-rows chunk however large the input.
+"""
+
+import os
+import json
+import sqlite3
+import argparse
+
+DEFAULT_CLUSTER = "ProcrastinationBinger"
+
+CLUSTER_EMOJI = {
+    "NightScrollAddict": "🌙",
+    "StressScroller": "😰",
+    "ProcrastinationBinger": "📱",
+    "ProductiveSprinter": "⚡",
+}
+
+CLUSTER_TRAITS = {
+    "NightScrollAddict": ["Active late-night (10 PM+)", "Long scroll sessions", "Low next-day productivity"],
+    "StressScroller": ["High distraction frequency", "Low mood score", "Frequent context-switching"],
+    "ProcrastinationBinger": ["High screen time", "Low task completion", "Short productivity bursts"],
+    "ProductiveSprinter": ["Strong goal alignment", "Low distraction", "Consistent task completion"],
+}
+
+CHUNK_ROWS = 65536
+
+
+def personality_result(cluster_name):
+    return {
+        "cluster": cluster_name,
+        "traits": CLUSTER_TRAITS.get(cluster_name, []),
+        "emoji": CLUSTER_EMOJI.get(cluster_name, "🤖"),
+        "display_name": cluster_name.replace("_", " "),
+    }
+
+
+def label_vectors(engine, name_map, X):
+    """personality_result per raw feature row (columns in engine.features order)"""
+    results = {int(cid): personality_result(name) for cid, name in name_map.items()}
+    fallback = personality_result(DEFAULT_CLUSTER)
+    return [results.get(cid, fallback) for cid in engine.predict(X).tolist()]
+
+
+# ─────────────────────────────────────────────
+# Offline inputs: (keys, feature matrix) chunks
+# ─────────────────────────────────────────────
+
+def iter_csv(path, features, chunk_rows=CHUNK_ROWS):
+    import pandas as pd
+
+    start = 0
+    for frame in pd.read_csv(path, usecols=features, chunksize=chunk_rows):
+        yield range(start, start + len(frame)), frame[features].to_numpy(dtype="float64")
+        start += len(frame)
+
+
+def iter_dataset(path, features, chunk_rows=CHUNK_ROWS):
+    from columnar import load_dataset
+
+    ds = load_dataset(path)
+    for start in range(0, ds.rows, chunk_rows):
+        X = ds.matrix(features, start=start, stop=start + chunk_rows)
+        yield range(start, start + len(X)), X
+
+
+def iter_users(db_path, features, defaults, chunk_rows=CHUNK_ROWS):
+    """Stored running feature means per user; features a user never logged use defaults"""
+    import numpy as np
+    from session_store import iter_user_means
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        users, rows = [], []
+        for user_id, means in iter_user_means(conn):
+            users.append(user_id)
+            rows.append([means.get(f, defaults[f]) for f in features])
+            if len(users) == chunk_rows:
+                yield users, np.array(rows, dtype=np.float64)
+                users, rows = [], []
+        if users:
+            yield users, np.array(rows, dtype=np.float64)
+    finally:
+        conn.close()
+
+
+def label_to_ndjson(engine, name_map, chunks, out, key):
+    """Write one NDJSON line per input row; returns {cluster: count}"""
+    counts = {}
+    with open(out, "w", encoding="utf-8") as f:
+        for keys, X in chunks:
+            for k, result in zip(keys, label_vectors(engine, name_map, X)):
+                f.write(json.dumps({key: k, **result}, ensure_ascii=False) + "\n")
+                counts[result["cluster"]] = counts.get(result["cluster"], 0) + 1
+    return counts
+
+
+if __name__ == "__main__":
+    from model_registry import ModelRegistry
+
+    parser = argparse.ArgumentParser(description="Label many users or feature rows with a personality cluster")
+    parser.add_argument("kind", choices=["csv", "dataset", "users"])
+    parser.add_argument("source", help="CSV file, columnar dataset directory, or SQLite db with user_stats")
+    parser.add_argument("out", help="output NDJSON file")
+    parser.add_argument("--models-dir", default=os.getenv("NUROVA_MODELS_DIR", "models"))
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    bundle = ModelRegistry(args.models_dir).current()
+    engine, name_map = bundle.cluster_engine, bundle.cluster_model["cluster_name_map"]
+    features = engine.features
+    if args.kind == "csv":
+        chunks, key = iter_csv(args.source, features, args.chunk_rows), "row"
+    elif args.kind == "dataset":
+        chunks, key = iter_dataset(args.source, features, args.chunk_rows), "row"
+    else:
+        from app import DISTRACTION_DEFAULTS
+        defaults = {f: float(DISTRACTION_DEFAULTS[f][1]) for f in features}
+        chunks, key = iter_users(args.source, features, defaults, args.chunk_rows), "user_id"
+
+    counts = label_to_ndjson(engine, name_map, chunks, args.out, key)
+    print(f"✅ {sum(counts.values()):,} labeled with model {bundle.version} → {args.out}")
+    for name, n in sorted(counts.items(), key=lambda kv: -kv[1]):
+        print(f"   {CLUSTER_EMOJI.get(name, '🤖')} {name:<24} {n:>10,}")
@@ -0,0 +1,361 @@
+"""
+Nurova 2.0 — Content recommendation
+score_content is the reference per-item scoring rule. ScoringTables holds its
+branching as lookup tables over (risk level × category) and (cluster ×
+category), so score_items / rank_candidates score a whole candidate list with
+a few NumPy operations. CatalogIndex goes further for the fixed catalog:
+columnar arrays built once, so a request only does a few vectorized
+operations plus a partial sort (catalogs under INDEX_MIN_ITEMS, like the
+built-in one, are cheaper to rank item by item). Both rank identically to
+scoring every item through score_content.
+
+Weights come from SCORE_WEIGHT_GOAL / SCORE_WEIGHT_INTEREST / SCORE_WEIGHT_MOOD.
+"""
+
+import os
+
+import numpy as np
+
+# ─────────────────────────────────────────────
+# Content Scoring Algorithm
+# ─────────────────────────────────────────────
+
+CONTENT_CATALOG = [
+    {"title": "5 LeetCode Patterns You MUST Know", "url": "https://youtu.be/0K_eZGS5NsU",
+     "thumbnail": "https://img.youtube.com/vi/0K_eZGS5NsU/hqdefault.jpg",
+     "channel": "NeetCode", "duration": "11 min", "category": "DSA",
+     "views": 450000, "duration_mins": 11, "goal_relevance": 0.95, "user_interest": 0.88},
+    {"title": "System Design Interview — Step by Step Guide", "url": "https://youtu.be/bUHFg8CZFws",
+     "thumbnail": "https://img.youtube.com/vi/bUHFg8CZFws/hqdefault.jpg",
+     "channel": "Gaurav Sen", "duration": "14 min", "category": "System Design",
+     "views": 1200000, "duration_mins": 14, "goal_relevance": 0.92, "user_interest": 0.85},
+    {"title": "Python DSA Crash Course", "url": "https://youtu.be/pkYVOmU3MgA",
+     "thumbnail": "https://img.youtube.com/vi/pkYVOmU3MgA/hqdefault.jpg",
+     "channel": "Tech With Tim", "duration": "10 min", "category": "DSA",
+     "views": 320000, "duration_mins": 10, "goal_relevance": 0.90, "user_interest": 0.82},
+    {"title": "ML Pipeline End-to-End in 15 min", "url": "https://youtu.be/7eh4d6sabA0",
+     "thumbnail": "https://img.youtube.com/vi/7eh4d6sabA0/hqdefault.jpg",
+     "channel": "Sentdex", "duration": "13 min", "category": "ML/AI",
+     "views": 280000, "duration_mins": 13, "goal_relevance": 0.87, "user_interest": 0.80},
+    {"title": "How to Deep Work — Cal Newport Method", "url": "https://youtu.be/ZD7dXfdDPfg",
+     "thumbnail": "https://img.youtube.com/vi/ZD7dXfdDPfg/hqdefault.jpg",
+     "channel": "Thomas Frank", "duration": "9 min", "category": "Productivity",
+     "views": 850000, "duration_mins": 9, "goal_relevance": 0.78, "user_interest": 0.75},
+    {"title": "Focus Music — Deep Work Session 🎵", "url": "https://youtu.be/jfKfPfyJRdk",
+     "thumbnail": "https://img.youtube.com/vi/jfKfPfyJRdk/hqdefault.jpg",
+     "channel": "Lofi Girl", "duration": "57 min", "category": "Mindfulness",
+     "views": 5000000, "duration_mins": 57, "goal_relevance": 0.60, "user_interest": 0.90},
+    {"title": "Pomodoro Technique — Explained Properly", "url": "https://youtu.be/VFW3Ld7JO0w",
+     "thumbnail": "https://img.youtube.com/vi/VFW3Ld7JO0w/hqdefault.jpg",
+     "channel": "Thomas Frank", "duration": "7 min", "category": "Productivity",
+     "views": 1100000, "duration_mins": 7, "goal_relevance": 0.75, "user_interest": 0.72},
+    {"title": "REST API Design — Best Practices", "url": "https://youtu.be/7nm1pYuKAhY",
+     "thumbnail": "https://img.youtube.com/vi/7nm1pYuKAhY/hqdefault.jpg",
+     "channel": "Fireship", "duration": "11 min", "category": "Web Dev",
+     "views": 680000, "duration_mins": 11, "goal_relevance": 0.88, "user_interest": 0.85},
+]
+
+CLUSTER_BOOSTS = {
+    "NightScrollAddict": {"Mindfulness": 0.15, "Productivity": 0.10},
+    "StressScroller": {"Mindfulness": 0.20, "Productivity": 0.10},
+    "ProcrastinationBinger": {"DSA": 0.10, "System Design": 0.10, "Productivity": 0.05},
+    "ProductiveSprinter": {"ML/AI": 0.10, "System Design": 0.10},
+}
+
+# Mood match by risk level and category; anything not listed is neutral
+MOOD_MATCH = {
+    "high": {"Mindfulness": 0.9, "Productivity": 0.9},
+    "low": {"DSA": 0.85, "System Design": 0.85, "ML/AI": 0.85},
+}
+NEUTRAL_MOOD = 0.5
+
+SCORE_WEIGHTS = {
+    "goal_relevance": float(os.getenv("SCORE_WEIGHT_GOAL", "0.6")),
+    "user_interest": float(os.getenv("SCORE_WEIGHT_INTEREST", "0.3")),
+    "mood_match": float(os.getenv("SCORE_WEIGHT_MOOD", "0.1")),
+}
+
+RISK_FILTERS = {
+    "high": lambda x: x["duration_mins"] <= 15,
+    "medium": lambda x: x["duration_mins"] <= 30,
+    "low": lambda x: True,
+}
+
+
+def score_content(item, risk_level, cluster, query="", weights=None):
+    w = weights or SCORE_WEIGHTS
+    mood_match = MOOD_MATCH.get(risk_level, {}).get(item["category"], NEUTRAL_MOOD)
+
+    goal_relevance = item["goal_relevance"]
+    user_interest = item["user_interest"]
+
+    # Query match boost
+    if query and query.lower() in item["title"].lower():
+        goal_relevance = min(goal_relevance + 0.08, 1.0)
+    if query and query.lower() in item["category"].lower():
+        goal_relevance = min(goal_relevance + 0.05, 1.0)
+
+    # Cluster boost
+    boosts = CLUSTER_BOOSTS.get(cluster, {})
+    cluster_boost = boosts.get(item["category"], 0)
+
+    score = ((goal_relevance * w["goal_relevance"]) + (user_interest * w["user_interest"])
+             + (mood_match * w["mood_match"]) + cluster_boost)
+    return round(min(score, 1.0), 3)
+
+
+MIN_SCORE = 0.65
+MIN_VIEWS = 1000
+
+
+def rank_items(items, risk_level, cluster, query="", k=8):
+    """Reference ranking: filter, score every item, full sort, top k"""
+    risk_filter = RISK_FILTERS.get(risk_level, RISK_FILTERS["medium"])
+
+    scored = []
+    for item in items:
+        if not risk_filter(item):
+            continue
+        if item.get("views", 1001) < MIN_VIEWS:
+            continue
+        s = score_content(item, risk_level, cluster, query)
+        if s >= MIN_SCORE:
+            scored.append({**item, "score": s})
+
+    scored.sort(key=lambda x: x["score"], reverse=True)
+    return scored[:k]
+
+
+# ─────────────────────────────────────────────
+# Vectorized Scoring Tables
+# ─────────────────────────────────────────────
+
+RISK_MAX_DURATION = {"high": 15, "medium": 30, "low": None}
+NGRAM = 3
+# Below this many items the per-item path is faster than the index's fixed
+# NumPy overhead (crossover ~64 items in benchmarks/bench_recommend.py --sizes)
+INDEX_MIN_ITEMS = int(os.getenv("NUROVA_INDEX_MIN_ITEMS", "64"))
+
+
+class ScoringTables:
+    """score_content's branching precomputed for one set of weights.
+
+    mood[r, c]   weighted mood term for risk level r and category c
+    boost[k, c]  cluster boost for cluster k and category c
+
+    The last row / column is the neutral one for risk levels, clusters and
+    categories the tables don't name. Mood and boost stay two tables rather
+    than one summed risk × cluster × category cube so the additions happen in
+    score_content's order and scores match bit for bit.
+    """
+
+    def __init__(self, weights=None):
+        self.weights = dict(weights or SCORE_WEIGHTS)
+        categories = {c for table in (*MOOD_MATCH.values(), *CLUSTER_BOOSTS.values()) for c in table}
+        self.category_code = {c: i for i, c in enumerate(sorted(categories))}
+        self.risk_code = {r: i for i, r in enumerate(MOOD_MATCH)}
+        self.cluster_code = {k: i for i, k in enumerate(CLUSTER_BOOSTS)}
+
+        n_cat = len(self.category_code) + 1
+        w_mood = self.weights["mood_match"]
+        self.mood = np.full((len(MOOD_MATCH) + 1, n_cat), NEUTRAL_MOOD * w_mood)
+        for risk, table in MOOD_MATCH.items():
+            for category, mood in table.items():
+                self.mood[self.risk_code[risk], self.category_code[category]] = mood * w_mood
+        self.boost = np.zeros((len(CLUSTER_BOOSTS) + 1, n_cat))
+        for cluster, table in CLUSTER_BOOSTS.items():
+            for category, boost in table.items():
+                self.boost[self.cluster_code[cluster], self.category_code[category]] = boost
+
+    def codes(self, categories):
+        unknown = len(self.category_code)
+        return np.array([self.category_code.get(c, unknown) for c in categories], dtype=np.intp)
+
+    def score(self, goal_relevance, user_interest, codes, risk_level, cluster):
+        """Unrounded, uncapped scores for candidate columns (query boost already in goal_relevance)"""
+        w = self.weights
+        mood = self.mood[self.risk_code.get(risk_level, -1)]
+        boost = self.boost[self.cluster_code.get(cluster, -1)]
+        return ((goal_relevance * w["goal_relevance"]) + (user_interest * w["user_interest"])
+                + mood[codes] + boost[codes])
+
+
+SCORING_TABLES = ScoringTables()
+
+
+def _query_boost(goal_relevance, title_hits, category_hits):
+    goal = np.where(title_hits, np.minimum(goal_relevance + 0.08, 1.0), goal_relevance)
+    return np.where(category_hits, np.minimum(goal + 0.05, 1.0), goal)
+
+
+def _py_round3(values):
+    """np.round can differ from Python's round() when x*1000 sits on a .5
+    boundary; redo just those entries with round() so scores match exactly"""
+    rounded = np.round(values, 3)
+    frac = np.abs(np.mod(values * 1000.0, 1.0) - 0.5)
+    for i in np.flatnonzero(frac < 1e-6):
+        rounded[i] = round(float(values[i]), 3)
+    return rounded
+
+
+def _top_k(cand, rounded, n_items, k):
+    """Positions into cand of the top k, ordered by score desc, then catalog
+    position asc (what a stable list.sort by score gives)"""
+    milli = np.rint(rounded * 1000).astype(np.int64)
+    key = milli * (n_items + 1) - cand
+    top = np.argpartition(-key, k - 1)[:k] if len(cand) > k else np.arange(len(cand))
+    return top[np.argsort(-key[top])]
+
+
+def score_items(items, risk_level, cluster, query="", tables=None):
+    """[score_content(item, ...) for item in items] as one vector operation"""
+    tables = tables or SCORING_TABLES
+    n = len(items)
+    goal = np.fromiter((it["goal_relevance"] for it in items), dtype=np.float64, count=n)
+    interest = np.fromiter((it["user_interest"] for it in items), dtype=np.float64, count=n)
+    codes = tables.codes([it["category"] for it in items])
+    if query:
+        q = query.lower()
+        goal = _query_boost(
+            goal,
+            np.fromiter((q in it["title"].lower() for it in items), dtype=bool, count=n),
+            np.fromiter((q in it["category"].lower() for it in items), dtype=bool, count=n),
+        )
+    return _py_round3(np.minimum(tables.score(goal, interest, codes, risk_level, cluster), 1.0))
+
+
+def rank_candidates(items, risk_level, cluster, query="", k=8, tables=None):
+    """rank_items for an arbitrary candidate list (e.g. YouTube results), vectorized"""
+    max_dur = RISK_MAX_DURATION.get(risk_level, RISK_MAX_DURATION["medium"])
+    eligible = [
+        i for i, it in enumerate(items)
+        if (max_dur is None or it["duration_mins"] <= max_dur) and it.get("views", 1001) >= MIN_VIEWS
+    ]
+    if not eligible:
+        return []
+    cand = np.array(eligible, dtype=np.int64)
+    rounded = score_items([items[i] for i in eligible], risk_level, cluster, query, tables)
+    keep = rounded >= MIN_SCORE
+    cand, rounded = cand[keep], rounded[keep]
+    if not len(cand):
+        return []
+    return [{**items[cand[i]], "score": float(rounded[i])} for i in _top_k(cand, rounded, len(items), k)]
+
+
+# ─────────────────────────────────────────────
+# Precomputed Catalog Index
+# ─────────────────────────────────────────────
+
+class CatalogIndex:
+    def __init__(self, items, tables=None, min_items=INDEX_MIN_ITEMS):
+        self.items = list(items)
+        self.tables = tables or SCORING_TABLES
+        self.min_items = min_items
+        n = len(self.items)
+        categories = [it["category"] for it in self.items]
+        self.category_codes = self.tables.codes(categories)
+        self.goal_relevance = np.array([it["goal_relevance"] for it in self.items], dtype=np.float64)
+        self.user_interest = np.array([it["user_interest"] for it in self.items], dtype=np.float64)
+        self.duration_mins = np.array([it["duration_mins"] for it in self.items], dtype=np.float64)
+        views_ok = np.array([it.get("views", 1001) >= MIN_VIEWS for it in self.items], dtype=bool)
+
+        # Duration index: catalog positions sorted by duration, so each risk
+        # filter is one searchsorted + slice
+        order = np.argsort(self.duration_mins, kind="stable")
+        sorted_dur = self.duration_mins[order]
+        self.eligible = {}
+        for risk, max_dur in RISK_MAX_DURATION.items():
+            mask = np.zeros(n, dtype=bool)
+            cut = n if max_dur is None else np.searchsorted(sorted_dur, max_dur, side="right")
+            mask[order[:cut]] = True
+            self.eligible[risk] = mask & views_ok
+
+        # Base scores per (risk_level, cluster) for items without a query boost
+        self.base_scores = {
+            (risk, cluster): self._combine(self.goal_relevance, slice(None), risk, cluster)
+            for risk in RISK_MAX_DURATION
+            for cluster in list(CLUSTER_BOOSTS) + [None]
+        }
+
+        # Inverted n-gram index over lower-cased titles and categories. A query
+        # of length ≥ NGRAM can only be a substring of a text containing all
+        # its n-grams, so candidates are verified with `in` on a short list.
+        self.titles = [it["title"].lower() for it in self.items]
+        self.categories = [c.lower() for c in categories]
+        self.title_grams = self._build_ngrams(self.titles)
+        self.category_grams = self._build_ngrams(self.categories)
+        self._query_cache = {}
+
+    def _combine(self, goal_relevance, idx, risk, cluster):
+        return self.tables.score(goal_relevance, self.user_interest[idx], self.category_codes[idx], risk, cluster)
+
+    @staticmethod
+    def _build_ngrams(texts):
+        index = {}
+        for i, text in enumerate(texts):
+            for j in range(len(text) - NGRAM + 1):
+                index.setdefault(text[j:j + NGRAM], set()).add(i)
+        return index
+
+    @staticmethod
+    def _matches(q, texts, grams):
+        if len(q) < NGRAM:
+            candidates = range(len(texts))
+        else:
+            sets = []
+            for j in range(len(q) - NGRAM + 1):
+                hit = grams.get(q[j:j + NGRAM])
+                if not hit:
+                    return []
+                sets.append(hit)
+            candidates = sorted(set.intersection(*sorted(sets, key=len)))
+        return [i for i in candidates if q in texts[i]]
+
+    def _query_hits(self, query):
+        """(title_hits, category_hits) boolean masks, cached per query"""
+        q = query.lower()
+        hits = self._query_cache.get(q)
+        if hits is None:
+            n = len(self.items)
+            title_hits = np.zeros(n, dtype=bool)
+            title_hits[self._matches(q, self.titles, self.title_grams)] = True
+            category_hits = np.zeros(n, dtype=bool)
+            category_hits[self._matches(q, self.categories, self.category_grams)] = True
+            if len(self._query_cache) >= 4096:
+                self._query_cache.clear()
+            hits = self._query_cache[q] = (title_hits, category_hits)
+        return hits
+
+    def scores(self, risk_level, cluster, query=""):
+        """Unrounded, uncapped score for every catalog item (before filtering)"""
+        risk = risk_level if risk_level in RISK_MAX_DURATION else "medium"
+        cluster = cluster if cluster in CLUSTER_BOOSTS else None
+        score = self.base_scores[(risk, cluster)]
+        if not query:
+            return score
+
+        title_hits, category_hits = self._query_hits(query)
+        touched = np.flatnonzero(title_hits | category_hits)
+        if not len(touched):
+            return score
+
+        # Only query-boosted items are rescored; the rest keep their base score
+        goal = _query_boost(self.goal_relevance[touched], title_hits[touched], category_hits[touched])
+        score = score.copy()
+        score[touched] = self._combine(goal, touched, risk, cluster)
+        return score
+
+    def recommend(self, risk_level, cluster, query="", k=8):
+        """Top-k items, ranked identically to rank_items(self.items, ...)"""
+        if len(self.items) < self.min_items:
+            return rank_items(self.items, risk_level, cluster, query, k)
+        risk = risk_level if risk_level in RISK_MAX_DURATION else "medium"
+        cand = np.flatnonzero(self.eligible[risk])
+        rounded = _py_round3(np.minimum(self.scores(risk_level, cluster, query)[cand], 1.0))
+        keep = rounded >= MIN_SCORE
+        cand, rounded = cand[keep], rounded[keep]
+        if not len(cand):
+            return []
+
+        return [{**self.items[cand[i]], "score": float(rounded[i])}
+                for i in _top_k(cand, rounded, len(self.items), k)]
@@ -0,0 +1,154 @@
+"""
+Nurova 2.0 — Response cache for deterministic endpoints
+A bounded in-process LRU of encoded results, keyed on a namespace, the active
+model version and the normalized inputs (so a model rollout never serves a
+stale answer). Optionally backed by a SQLite file shared by all workers on the
+host (NUROVA_RESPONSE_CACHE_DB): a miss in one worker's LRU can then be
+answered from another worker's work.
+
+  cache = ResponseCache()
+  body = cache.get("recommend", version, ("dsa", "high", "StressScroller"))
+  if body is None:
+      body = render(...)
+      cache.put("recommend", version, ("dsa", "high", "StressScroller"), body)
+  cache.stats()      # hits / misses / evictions per tier
+
+Values are bytes; callers encode and decode.
+"""
+
+import os
+import json
+import time
+import sqlite3
+import hashlib
+import threading
+from collections import OrderedDict
+
+CACHE_SIZE = int(os.getenv("NUROVA_RESPONSE_CACHE_SIZE", "4096"))
+SHARED_DB = os.getenv("NUROVA_RESPONSE_CACHE_DB") or None
+SHARED_SIZE = int(os.getenv("NUROVA_RESPONSE_CACHE_SHARED_SIZE", "100000"))
+
+
+def etag_for(body):
+    return hashlib.blake2b(body, digest_size=12).hexdigest()
+
+
+class _SharedTier:
+    """SQLite-backed second tier; the file is disposable, so durability is off.
+
+    Each thread (of each worker) has its own connection, so threaded workers
+    read the tier concurrently instead of queueing on one handle.
+    """
+
+    def __init__(self, path, maxsize):
+        self.path = path
+        self.maxsize = maxsize
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        self._inserts = 0
+
+    def _connection(self):
+        # Connections don't survive fork; each worker thread opens its own
+        local = self._local
+        if getattr(local, "pid", None) != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=1, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=OFF")
+            conn.execute("""
+                CREATE TABLE IF NOT EXISTS response_cache (
+                    key TEXT PRIMARY KEY,
+                    value BLOB NOT NULL,
+                    stored_at REAL NOT NULL
+                )
+            """)
+            local.conn, local.pid = conn, os.getpid()
+        return local.conn
+
+    def get(self, key):
+        row = self._connection().execute(
+            "SELECT value FROM response_cache WHERE key = ?", (key,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def put(self, key, value):
+        conn = self._connection()
+        conn.execute("INSERT OR REPLACE INTO response_cache (key, value, stored_at) VALUES (?, ?, ?)",
+                     (key, value, time.time()))
+        with self._lock:
+            self._inserts += 1
+            trim = self._inserts >= max(self.maxsize // 10, 1)
+            if trim:
+                self._inserts = 0
+        if trim:
+            conn.execute("""
+                DELETE FROM response_cache WHERE key IN (
+                    SELECT key FROM response_cache ORDER BY stored_at DESC LIMIT -1 OFFSET ?)
+            """, (self.maxsize,))
+
+
+class ResponseCache:
+    def __init__(self, maxsize=CACHE_SIZE, shared_db=SHARED_DB, shared_size=SHARED_SIZE):
+        self.maxsize = maxsize
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._shared = _SharedTier(shared_db, shared_size) if shared_db else None
+        self._counters = {"hits": 0, "shared_hits": 0, "misses": 0, "evictions": 0, "shared_errors": 0}
+
+    @staticmethod
+    def key(namespace, version, parts):
+        return f"{namespace}|{version}|{json.dumps(parts, separators=(',', ':'))}"
+
+    def get(self, namespace, version, parts):
+        key = self.key(namespace, version, parts)
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+                self._counters["hits"] += 1
+                return value
+        if self._shared is not None:
+            try:
+                value = self._shared.get(key)
+            except sqlite3.Error:
+                value = None
+                with self._lock:
+                    self._counters["shared_errors"] += 1
+            if value is not None:
+                with self._lock:
+                    self._counters["shared_hits"] += 1
+                self._store(key, value)
+                return value
+        with self._lock:
+            self._counters["misses"] += 1
+        return None
+
+    def put(self, namespace, version, parts, value):
+        key = self.key(namespace, version, parts)
+        self._store(key, value)
+        if self._shared is not None:
+            try:
+                self._shared.put(key, value)
+            except sqlite3.Error:
+                with self._lock:
+                    self._counters["shared_errors"] += 1
+
+    def _store(self, key, value):
+        with self._lock:
+            self._entries[key] = value
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+                self._counters["evictions"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            c = dict(self._counters)
+            c["entries"] = len(self._entries)
+        c["maxsize"] = self.maxsize
+        c["shared"] = self._shared is not None
+        lookups = c["hits"] + c["shared_hits"] + c["misses"]
+        c["hit_ratio"] = round((c["hits"] + c["shared_hits"]) / lookups, 4) if lookups else 0.0
+        return c
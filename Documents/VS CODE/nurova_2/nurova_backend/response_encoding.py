@@ -0,0 +1,152 @@
+"""
+Nurova 2.0 — Response encoding and content negotiation
+JSON stays the default, encoded with orjson when it is installed. A client
+that prefers MessagePack in its Accept header (application/msgpack) gets
+MessagePack from every JSON endpoint; /recommend_content also drops the item
+fields the app derives or never reads (see app.py). Bodies of at least
+NUROVA_COMPRESS_MIN_BYTES are compressed with brotli or gzip, whichever the
+client's Accept-Encoding prefers.
+
+  app.json = NegotiatingJSONProvider(app)   # every jsonify() negotiates
+  fmt = negotiate(request)                  # "json" or "msgpack"
+  body = encode(obj, fmt)
+  compress_response(response, request)      # in after_request
+
+orjson, msgpack and brotli are optional: without them the stdlib encoder is
+used, MessagePack is not offered (clients get JSON) and only gzip is.
+"""
+
+import os
+import gzip
+import json
+
+from flask import has_request_context, request
+from flask.json.provider import DefaultJSONProvider
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+JSON_MIMETYPE = "application/json"
+MSGPACK_MIMETYPE = "application/msgpack"
+MIMETYPES = {"json": JSON_MIMETYPE, "msgpack": MSGPACK_MIMETYPE}
+# Also accepted in Accept for MessagePack
+MSGPACK_ALIASES = ("application/x-msgpack", "application/vnd.msgpack")
+
+COMPRESS_MIN_BYTES = int(os.getenv("NUROVA_COMPRESS_MIN_BYTES", "1024"))
+GZIP_LEVEL = int(os.getenv("NUROVA_GZIP_LEVEL", "6"))
+BROTLI_QUALITY = int(os.getenv("NUROVA_BROTLI_QUALITY", "5"))
+COMPRESSIBLE = (JSON_MIMETYPE, MSGPACK_MIMETYPE, "text/plain")
+
+if orjson is not None:
+    # Sorted keys like jsonify, so encoded bodies (and their ETags) are stable
+    ORJSON_OPTIONS = orjson.OPT_SORT_KEYS | orjson.OPT_NON_STR_KEYS | orjson.OPT_SERIALIZE_NUMPY
+
+
+def negotiate(req=None):
+    """Response format for the request: msgpack if its Accept header prefers
+    MessagePack to JSON (and msgpack is installed), else json. JSON wins ties,
+    so no Accept header or */* keeps JSON."""
+    if msgpack is None:
+        return "json"
+    best = (req or request).accept_mimetypes.best_match((JSON_MIMETYPE, MSGPACK_MIMETYPE, *MSGPACK_ALIASES),
+                                                        default=JSON_MIMETYPE)
+    return "json" if best == JSON_MIMETYPE else "msgpack"
+
+
+def dumps_json(obj, default=DefaultJSONProvider.default):
+    if orjson is not None:
+        return orjson.dumps(obj, default=default, option=ORJSON_OPTIONS)
+    return json.dumps(obj, default=default, sort_keys=True, separators=(",", ":")).encode()
+
+
+def _msgpack_default(o):
+    # numpy scalars and arrays (risk scores) → plain Python values
+    if hasattr(o, "tolist"):
+        return o.tolist()
+    return DefaultJSONProvider.default(o)
+
+
+def encode(obj, fmt="json"):
+    """obj → response body bytes in the negotiated format"""
+    if fmt == "msgpack":
+        return msgpack.packb(obj, default=_msgpack_default, use_bin_type=True)
+    return dumps_json(obj)
+
+
+def decode(body, fmt="json"):
+    if fmt == "msgpack":
+        return msgpack.unpackb(body, raw=False, strict_map_key=False)
+    return orjson.loads(body) if orjson is not None else json.loads(body)
+
+
+class NegotiatingJSONProvider(DefaultJSONProvider):
+    """jsonify() through orjson, or as MessagePack when the client asks for it"""
+
+    def dumps(self, obj, **kwargs):
+        if orjson is None or kwargs:
+            return super().dumps(obj, **kwargs)
+        return dumps_json(obj, self.default).decode()
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        fmt = negotiate() if has_request_context() else "json"
+        return self._app.response_class(encode(obj, fmt), mimetype=MIMETYPES[fmt])
+
+
+# ─────────────────────────────────────────────
+# Compression
+# ─────────────────────────────────────────────
+
+def choose_coding(accept_encodings):
+    """Content-Encoding to use (br, gzip or None); brotli wins ties when it is installed"""
+    best, best_q = None, 0
+    for coding in (("br",) if brotli is not None else ()) + ("gzip",):
+        q = accept_encodings[coding]
+        if q > best_q:
+            best, best_q = coding, q
+    return best
+
+
+def compress(data, coding):
+    if coding == "br":
+        return brotli.compress(data, quality=BROTLI_QUALITY)
+    return gzip.compress(data, compresslevel=GZIP_LEVEL, mtime=0)
+
+
+def compress_response(response, req=None, min_bytes=None):
+    """Compress a buffered JSON / MessagePack / text response in place.
+
+    Streamed responses (NDJSON) and 304s are left alone. A compressed body's
+    ETag becomes weak, which If-None-Match still matches.
+    """
+    req = req or request
+    if response.mimetype not in COMPRESSIBLE:
+        return response
+    if response.mimetype in (JSON_MIMETYPE, MSGPACK_MIMETYPE) and msgpack is not None:
+        response.vary.add("Accept")
+    if response.is_streamed or response.direct_passthrough or "Content-Encoding" in response.headers \
+            or not 200 <= response.status_code < 300 or response.status_code == 204:
+        return response
+    response.vary.add("Accept-Encoding")
+    data = response.get_data()
+    if len(data) < (COMPRESS_MIN_BYTES if min_bytes is None else min_bytes):
+        return response
+    coding = choose_coding(req.accept_encodings)
+    if coding is None:
+        return response
+    response.set_data(compress(data, coding))
+    response.headers["Content-Encoding"] = coding
+    etag, weak = response.get_etag()
+    if etag and not weak:
+        response.set_etag(etag, weak=True)
+    return response
@@ -0,0 +1,179 @@
+"""
+Nurova 2.0 — Session retention and compaction
+Rolls monthly session partitions older than the retention window into
+gzip-compressed NDJSON archives (app names decoded, so an archive stands on
+its own), drops them, and hands the freed pages back to the filesystem with
+incremental vacuum. Rollups, user_stats and user_trend are kept, so
+/analytics, /get_personality and /risk_trend still cover archived months.
+
+  python retention.py --keep-months 12              # archive + compact nurova.db
+  python retention.py --keep-months 12 --dry-run    # list what would be archived
+  python retention.py --compact-only
+
+  for session in iter_archive("archives/sessions_202501.ndjson.gz"): ...
+
+Safe to run (e.g. from cron) while the app is serving: each partition is read
+without blocking writers, and only the final drop takes the write lock.
+"""
+
+import os
+import gzip
+import json
+import argparse
+from datetime import datetime
+
+from session_store import (
+    NO_MONTH, SESSION_COLUMNS, SessionStore, app_names_by_id, connect, decode_apps,
+    drop_partition, list_partitions,
+)
+
+RETENTION_MONTHS = int(os.getenv("NUROVA_RETENTION_MONTHS", "12"))
+ARCHIVE_DIR = os.getenv("NUROVA_ARCHIVE_DIR") or None
+
+
+def cutoff_key(keep_months, now=None):
+    """Oldest month kept: the current month and the keep_months - 1 before it"""
+    now = now or datetime.utcnow()
+    index = now.year * 12 + now.month - 1 - (max(keep_months, 1) - 1)
+    return f"{index // 12:04d}{index % 12 + 1:02d}"
+
+
+def default_archive_dir(db_path):
+    return ARCHIVE_DIR or os.path.join(os.path.dirname(os.path.abspath(db_path)), "archives")
+
+
+def _archive_path(archive_dir, key):
+    # A month archived again (late uploads recreated its partition) gets .2, .3, ...
+    path, n = os.path.join(archive_dir, f"sessions_{key}.ndjson.gz"), 1
+    while os.path.exists(path):
+        n += 1
+        path = os.path.join(archive_dir, f"sessions_{key}.{n}.ndjson.gz")
+    return path
+
+
+def _write_rows(f, conn, key, after_id):
+    names = app_names_by_id(conn)
+    n, last = 0, after_id
+    for row in conn.execute(
+        f"SELECT id, {', '.join(SESSION_COLUMNS)} FROM sessions_{key} WHERE id > ? ORDER BY id", (after_id,)
+    ):
+        session = dict(zip(("id", *SESSION_COLUMNS), row))
+        session["apps_used"] = decode_apps(session["apps_used"], names)
+        f.write(json.dumps(session, separators=(",", ":")).encode() + b"\n")
+        n, last = n + 1, row[0]
+    return n, last
+
+
+def archive_partition(conn, key, archive_dir):
+    """Write one partition to a gzip NDJSON archive and drop it → (path, rows).
+
+    The rows are read without holding the write lock; rows that arrived in
+    the meantime (late uploads for that month) are appended as a second gzip
+    member inside the transaction that drops the partition.
+    """
+    os.makedirs(archive_dir, exist_ok=True)
+    path = _archive_path(archive_dir, key)
+    tmp = path + ".tmp"
+    with gzip.open(tmp, "wb") as f:
+        rows, last = _write_rows(f, conn, key, 0)
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        with gzip.open(tmp, "ab") as f:
+            late, _ = _write_rows(f, conn, key, last)
+        with open(tmp, "rb") as f:
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        drop_partition(conn, key)
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+    return path, rows + late
+
+
+def iter_archive(path):
+    """Session dicts from an archive file, in id order"""
+    with gzip.open(path, "rt") as f:
+        for line in f:
+            yield json.loads(line)
+
+
+def apply_retention(db_path, keep_months=RETENTION_MONTHS, archive_dir=None, now=None, dry_run=False):
+    """Archive and drop every partition older than the retention window. Returns the report."""
+    if not dry_run:
+        SessionStore(db_path).init_schema()     # migrates a pre-partitioning database first
+    archive_dir = archive_dir or default_archive_dir(db_path)
+    cutoff = cutoff_key(keep_months, now)
+    conn = connect(db_path)
+    try:
+        keys = list_partitions(conn)
+        expired = [k for k in keys if k < cutoff]
+        report = {"cutoff": cutoff, "archive_dir": archive_dir, "archived": [],
+                  "kept": [k for k in keys if k >= cutoff]}
+        for key in expired:
+            if dry_run:
+                rows = conn.execute(f"SELECT COUNT(*) FROM sessions_{key}").fetchone()[0]
+                report["archived"].append({"month": key, "rows": rows, "path": None, "bytes": None})
+                continue
+            path, rows = archive_partition(conn, key, archive_dir)
+            report["archived"].append({"month": key, "rows": rows, "path": path, "bytes": os.path.getsize(path)})
+    finally:
+        conn.close()
+    return report
+
+
+def _file_bytes(db_path):
+    return sum(os.path.getsize(db_path + s) for s in ("", "-wal") if os.path.exists(db_path + s))
+
+
+def compact(db_path):
+    """Return free pages to the filesystem. A database created before
+    auto_vacuum=INCREMENTAL gets one full VACUUM to switch it over; after
+    that it's an incremental vacuum, which only touches the free pages."""
+    conn = connect(db_path)
+    try:
+        before = _file_bytes(db_path)
+        free_pages = conn.execute("PRAGMA freelist_count").fetchone()[0]
+        if conn.execute("PRAGMA auto_vacuum").fetchone()[0] != 2:
+            conn.execute("PRAGMA auto_vacuum=INCREMENTAL")
+            conn.execute("VACUUM")
+            method = "vacuum"
+        else:
+            # executescript steps the pragma to completion (execute frees one page)
+            conn.executescript("PRAGMA incremental_vacuum;")
+            method = "incremental"
+        conn.execute("PRAGMA wal_checkpoint(TRUNCATE)").fetchall()
+        return {"method": method, "free_pages": free_pages, "bytes_before": before, "bytes_after": _file_bytes(db_path)}
+    finally:
+        conn.close()
+
+
+def print_report(report, compaction):
+    if report is not None:
+        print(f"🗄️  Retention: keeping {len(report['kept'])} month(s) from {report['cutoff']}")
+        for a in report["archived"]:
+            month = "no timestamp" if a["month"] == NO_MONTH else a["month"]
+            where = f"→ {a['path']} ({a['bytes'] / 1e6:.2f} MB)" if a["path"] else "(dry run)"
+            print(f"   {month:<12} {a['rows']:>10,} sessions {where}")
+        if not report["archived"]:
+            print("   Nothing to archive")
+    if compaction is not None:
+        print(f"🧹 {compaction['method']}: {compaction['free_pages']:,} free pages, "
+              f"{compaction['bytes_before'] / 1e6:.2f} MB → {compaction['bytes_after'] / 1e6:.2f} MB")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Archive old session partitions and compact the database")
+    parser.add_argument("--db", default=os.getenv("NUROVA_DB_PATH", "nurova.db"))
+    parser.add_argument("--keep-months", type=int, default=RETENTION_MONTHS)
+    parser.add_argument("--archive-dir", help="default: NUROVA_ARCHIVE_DIR or archives/ next to the database")
+    parser.add_argument("--dry-run", action="store_true", help="report what would be archived, change nothing")
+    parser.add_argument("--compact-only", action="store_true", help="skip retention, only vacuum")
+    args = parser.parse_args()
+
+    report = None
+    if not args.compact_only:
+        report = apply_retention(args.db, args.keep_months, args.archive_dir, dry_run=args.dry_run)
+    print_report(report, None if args.dry_run else compact(args.db))
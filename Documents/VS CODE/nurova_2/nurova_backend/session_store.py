@@ -0,0 +1,1027 @@
+"""
+Nurova 2.0 — SQLite session store
+Pooled WAL-mode connections plus a write-behind writer that groups
+/log_session inserts into short batches (one commit per batch). Each batch
+also folds its rows into the daily_rollups / daily_cluster_rollups tables,
+the per-user running feature statistics (user_stats) and the per-user risk
+trend (user_trend) in the same transaction, so /analytics, /get_personality
+and /risk_trend never scan raw sessions.
+
+Raw sessions are partitioned by month (sessions_YYYYMM) behind a `sessions`
+view, with apps_used dictionary-encoded against the apps table; retention.py
+archives and drops old partitions.
+
+  store = SessionStore("nurova.db")
+  store.log({...})                 # queued, returns None
+  store.log({...}, durable=True)   # waits for the batch commit, returns row id
+  with store.connection() as conn: # pooled connection for reads
+      ...
+  store.insert_rows([{...}, ...])  # uploads: one short transaction per chunk
+  with store.bulk_insert() as insert:  # loaders: one transaction, executemany
+      insert([{...}, ...])
+
+Pools and the writer thread are per process: after a gunicorn fork the
+first call in the worker transparently rebuilds them. Within a process the
+store is shared by all request threads (gthread workers): a pooled
+connection is only ever used by the thread that borrowed it, and all session
+writes go through the one writer thread (or insert_rows() / bulk_insert() transactions). The schema is created
+(or migrated) by init_schema(), or else on first use.
+
+The writer retries with backoff while another connection holds the write
+lock (up to NUROVA_DB_WRITE_RETRY_SECONDS). A batch that fails for any other
+reason is retried row by row, so one bad row doesn't take its batch with it.
+store.status() reports the writer's state for /health.
+"""
+
+import os
+import json
+import math
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+# Session column → SQL type (apps_used holds comma-separated ids into apps)
+SESSION_TYPES = {
+    "user_id": "TEXT",
+    "screen_time": "REAL",
+    "productive_mins": "INTEGER",
+    "apps_used": "TEXT",
+    "risk_prob": "REAL",
+    "personality_cluster": "TEXT",
+    "created_at": "TEXT",
+    "distraction_freq": "REAL",
+    "mood_score": "REAL",
+    "goal_alignment_score": "REAL",
+    "task_completion_rate": "REAL",
+    "time_of_day": "REAL",
+}
+SESSION_COLUMNS = tuple(SESSION_TYPES)
+
+# Cluster-model feature → sessions column it is averaged from
+USER_STAT_FEATURES = {
+    "daily_screen_time": "screen_time",
+    "distraction_frequency": "distraction_freq",
+    "mood_score": "mood_score",
+    "goal_alignment_score": "goal_alignment_score",
+    "task_completion_rate": "task_completion_rate",
+    "time_of_day": "time_of_day",
+}
+
+# Logged sessions in the distraction-model training layout. hour_of_session
+# isn't stored, so the hour the session was logged stands in; the label is the
+# served decision (risk_prob > 0.5).
+TRAINING_QUERY = """
+    SELECT screen_time            AS daily_screen_time,
+           distraction_freq       AS distraction_frequency,
+           mood_score,
+           goal_alignment_score,
+           task_completion_rate,
+           time_of_day,
+           CAST(strftime('%H', created_at) AS REAL)
+             + CAST(strftime('%M', created_at) AS REAL) / 60.0 AS hour_of_session,
+           CASE WHEN risk_prob > 0.5 THEN 1 ELSE 0 END AS distraction_risk
+    FROM sessions
+    WHERE screen_time IS NOT NULL AND distraction_freq IS NOT NULL
+      AND mood_score IS NOT NULL AND goal_alignment_score IS NOT NULL
+      AND task_completion_rate IS NOT NULL AND time_of_day IS NOT NULL
+      AND risk_prob IS NOT NULL AND created_at IS NOT NULL
+"""
+
+# Sessions with checkpoint < id <= upto that have every cluster feature, in the
+# cluster-model layout. A rowid range scan in each partition, so incremental
+# cluster updates cost O(new sessions) however long the history is.
+CLUSTER_SESSIONS_QUERY = """
+    SELECT user_id,
+           screen_time            AS daily_screen_time,
+           distraction_freq       AS distraction_frequency,
+           mood_score,
+           goal_alignment_score,
+           task_completion_rate,
+           time_of_day
+    FROM sessions
+    WHERE id > ? AND id <= ?
+      AND screen_time IS NOT NULL AND distraction_freq IS NOT NULL
+      AND mood_score IS NOT NULL AND goal_alignment_score IS NOT NULL
+      AND task_completion_rate IS NOT NULL AND time_of_day IS NOT NULL
+    ORDER BY id
+"""
+
+PRAGMAS = (
+    # Only takes effect on a new file (before WAL is set), or at the next full
+    # VACUUM (retention.compact); lets retention hand dropped pages back
+    "PRAGMA auto_vacuum=INCREMENTAL",
+    "PRAGMA journal_mode=WAL",
+    "PRAGMA synchronous=NORMAL",    # WAL + NORMAL: durable across app crashes, fsync at checkpoints
+    "PRAGMA cache_size=-16000",     # ~16 MB page cache per connection
+    "PRAGMA temp_store=MEMORY",
+    "PRAGMA busy_timeout=5000",
+)
+
+# Risk trend windows: EWMA span in sessions, half-life (hours) of the
+# time-decayed mean and slope
+TREND_SESSIONS = int(os.getenv("NUROVA_TREND_SESSIONS", "10"))
+TREND_HALF_LIFE_HOURS = float(os.getenv("NUROVA_TREND_HALF_LIFE_HOURS", "24"))
+
+BATCH_SIZE = int(os.getenv("NUROVA_DB_BATCH_SIZE", "256"))
+BATCH_WAIT_MS = float(os.getenv("NUROVA_DB_BATCH_WAIT_MS", "5"))
+QUEUE_SIZE = int(os.getenv("NUROVA_DB_QUEUE_SIZE", "10000"))
+# How long the writer keeps retrying (with backoff) while another connection
+# holds the write lock past busy_timeout, e.g. retention.py or a bulk upload
+WRITE_RETRY_SECONDS = float(os.getenv("NUROVA_DB_WRITE_RETRY_SECONDS", "30"))
+# Idle connections kept per worker; defaults to one per gunicorn request thread
+POOL_SIZE = int(os.getenv("NUROVA_DB_POOL_SIZE", os.getenv("GUNICORN_THREADS", "4")))
+
+
+def connect(db_path):
+    conn = sqlite3.connect(db_path, timeout=5, check_same_thread=False)
+    for pragma in PRAGMAS:
+        conn.execute(pragma)
+    return conn
+
+
+def is_busy(error):
+    """True for the transient 'database is locked / busy' errors worth retrying"""
+    return isinstance(error, sqlite3.OperationalError) and \
+        any(word in str(error) for word in ("locked", "busy"))
+
+
+# ─────────────────────────────────────────────
+# Monthly partitions
+# ─────────────────────────────────────────────
+
+# One table per month of created_at, UNION ALLed by the `sessions` view, so
+# readers keep querying `sessions` and SQLite pushes id / created_at filters
+# down to each partition's indexes. Ids come from the session_ids counter and
+# keep increasing across partitions. Rows without a usable timestamp go to
+# sessions_000000.
+NO_MONTH = "000000"
+PARTITION_GLOB = "sessions_[0-9][0-9][0-9][0-9][0-9][0-9]"
+
+
+def partition_key(created_at):
+    """'2026-10-17T08:00:00' → '202610'"""
+    s = created_at or ""
+    key = s[:4] + s[5:7]
+    return key if len(key) == 6 and key.isdigit() else NO_MONTH
+
+
+def list_partitions(conn):
+    """Month keys of the existing partitions, oldest first"""
+    return [name[len("sessions_"):] for (name,) in conn.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table' AND name GLOB ? ORDER BY name",
+        (PARTITION_GLOB,))]
+
+
+def refresh_sessions_view(conn):
+    """(Re)create the `sessions` view over every partition"""
+    columns = ", ".join(("id", *SESSION_COLUMNS))
+    parts = [f"SELECT {columns} FROM sessions_{key}" for key in list_partitions(conn)]
+    empty = f"SELECT {', '.join(f'NULL AS {c}' for c in ('id', *SESSION_COLUMNS))} WHERE 0"
+    conn.execute("DROP VIEW IF EXISTS sessions")
+    conn.execute(f"CREATE VIEW sessions AS {' UNION ALL '.join(parts) or empty}")
+
+
+def create_partition(conn, key):
+    table = f"sessions_{key}"
+    columns = ", ".join(f"{c} {t}" for c, t in SESSION_TYPES.items())
+    conn.execute(f"CREATE TABLE IF NOT EXISTS {table} (id INTEGER PRIMARY KEY, {columns})")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_created_at ON {table} (created_at)")
+    conn.execute(f"CREATE INDEX IF NOT EXISTS idx_{table}_user ON {table} (user_id, created_at)")
+    refresh_sessions_view(conn)
+
+
+def drop_partition(conn, key):
+    conn.execute(f"DROP TABLE IF EXISTS sessions_{key}")
+    refresh_sessions_view(conn)
+
+
+def sessions_source(conn, since=None, until=None):
+    """FROM-clause source covering only the partitions whose month overlaps
+    since <= created_at < until (ISO strings, None for open-ended). Callers
+    still filter on created_at themselves."""
+    keys = list_partitions(conn)
+    if since is not None or until is not None:
+        lo = partition_key(since) if since is not None else ""
+        hi = partition_key(until) if until is not None else "999999"
+        keys = [k for k in keys if k != NO_MONTH and lo <= k <= hi]
+    columns = ", ".join(("id", *SESSION_COLUMNS))
+    if not keys:
+        return f"(SELECT {', '.join(f'NULL AS {c}' for c in ('id', *SESSION_COLUMNS))} WHERE 0)"
+    return "(" + " UNION ALL ".join(f"SELECT {columns} FROM sessions_{k}" for k in keys) + ")"
+
+
+def last_session_id(conn):
+    """Highest session id handed out so far (ids only increase, across partitions)"""
+    return conn.execute("SELECT next_id - 1 FROM session_ids").fetchone()[0]
+
+
+def iter_sessions(conn, since=None, until=None, user_id=None):
+    """Session dicts (apps_used decoded to names) in id order, reading only
+    the partitions in the created_at window"""
+    where, params = [], []
+    if since is not None:
+        where.append("created_at >= ?")
+        params.append(since)
+    if until is not None:
+        where.append("created_at < ?")
+        params.append(until)
+    if user_id is not None:
+        where.append("user_id = ?")
+        params.append(user_id)
+    names = app_names_by_id(conn)
+    cur = conn.execute(
+        f"SELECT id, {', '.join(SESSION_COLUMNS)} FROM {sessions_source(conn, since, until)} "
+        f"{'WHERE ' + ' AND '.join(where) if where else ''} ORDER BY id", params)
+    for row in cur:
+        session = dict(zip(("id", *SESSION_COLUMNS), row))
+        session["apps_used"] = decode_apps(session["apps_used"], names)
+        yield session
+
+
+# ─────────────────────────────────────────────
+# App name dictionary
+# ─────────────────────────────────────────────
+
+def app_list(value):
+    """apps_used as given (a list, or JSON text from older callers) → names; None stays None"""
+    if value is None:
+        return None
+    if isinstance(value, str):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            return [value] if value else []
+    if not isinstance(value, (list, tuple)):
+        return [str(value)]
+    return [str(name) for name in value]
+
+
+def decode_apps(encoded, names):
+    """'3,17' → app names, given {id: name}"""
+    if encoded is None:
+        return None
+    return [names[int(i)] for i in encoded.split(",")] if encoded else []
+
+
+def app_names_by_id(conn):
+    return dict(conn.execute("SELECT id, name FROM apps"))
+
+
+class _Catalog:
+    """Per-store cache for the write path: app name → id, and the partitions
+    that exist at a given PRAGMA schema_version.
+
+    Ids of apps a transaction inserts are staged and only cached after it
+    commits. The partition set is re-read whenever the schema version moves
+    (a partition created here or by another worker, or dropped by retention),
+    and never cached from inside a transaction that changed the schema.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._apps = {}
+        self._partitions = (None, frozenset())
+
+    @staticmethod
+    def begin():
+        return {"apps": {}, "ddl": False}
+
+    def commit(self, staged):
+        if staged["apps"]:
+            with self._lock:
+                self._apps.update(staged["apps"])
+
+    def partitions(self, cur, staged):
+        version = cur.execute("PRAGMA schema_version").fetchone()[0]
+        cached_version, keys = self._partitions
+        if version != cached_version:
+            keys = frozenset(list_partitions(cur))
+            if not staged["ddl"]:
+                self._partitions = (version, keys)
+        return keys
+
+    def app_ids(self, cur, names, staged):
+        """{name: id} for names, adding unseen names to the apps table"""
+        ids, missing = {}, []
+        for name in names:
+            app_id = self._apps.get(name) or staged["apps"].get(name)
+            if app_id is None:
+                missing.append(name)
+            else:
+                ids[name] = app_id
+        for start in range(0, len(missing), 500):
+            chunk = missing[start:start + 500]
+            found = dict(cur.execute(
+                f"SELECT name, id FROM apps WHERE name IN ({', '.join('?' for _ in chunk)})", chunk))
+            if found:
+                # Not staged by this transaction, so committed by someone
+                with self._lock:
+                    self._apps.update(found)
+            ids.update(found)
+            for name in chunk:
+                if name not in found:
+                    cur.execute("INSERT INTO apps (name) VALUES (?)", (name,))
+                    ids[name] = staged["apps"][name] = cur.lastrowid
+        return ids
+
+
+def write_partitions(cur, ids, rows, catalog, staged):
+    """Insert rows (dicts) with the given ids into their monthly partitions,
+    creating partitions as needed and dictionary-encoding apps_used"""
+    apps = [app_list(r.get("apps_used")) for r in rows]
+    app_ids = catalog.app_ids(cur, {name for names in apps if names for name in names}, staged)
+    existing = catalog.partitions(cur, staged)
+    apps_at = SESSION_COLUMNS.index("apps_used")
+    by_month = {}
+    for session_id, r, names in zip(ids, rows, apps):
+        values = [session_id, *map(r.get, SESSION_COLUMNS)]
+        values[apps_at + 1] = None if names is None else ",".join(str(app_ids[n]) for n in names)
+        by_month.setdefault(partition_key(r.get("created_at")), []).append(values)
+    for key, params in by_month.items():
+        if key not in existing:
+            create_partition(cur, key)
+            staged["ddl"] = True
+        cur.executemany(
+            f"INSERT INTO sessions_{key} (id, {', '.join(SESSION_COLUMNS)}) "
+            f"VALUES ({', '.join('?' for _ in range(len(SESSION_COLUMNS) + 1))})", params)
+
+
+def insert_sessions(cur, rows, catalog, staged):
+    """Store a batch of new sessions and fold it into the rollups, user stats
+    and trend. Runs inside the caller's write transaction; returns the ids."""
+    cur.execute("UPDATE session_ids SET next_id = next_id + ?", (len(rows),))
+    first = cur.execute("SELECT next_id FROM session_ids").fetchone()[0] - len(rows)
+    ids = range(first, first + len(rows))
+    write_partitions(cur, ids, rows, catalog, staged)
+    update_rollups(cur, rows)
+    update_user_stats(cur, rows)
+    update_user_trend(cur, rows)
+    return ids
+
+
+def migrate_legacy_sessions(conn, chunk_rows=10000):
+    """Move a pre-partitioning sessions table (JSON apps_used) into monthly
+    partitions, keeping ids. Runs inside the caller's transaction."""
+    seq = None
+    if conn.execute("SELECT 1 FROM sqlite_master WHERE name = 'sqlite_sequence'").fetchone():
+        seq = conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'sessions'").fetchone()
+    conn.execute("ALTER TABLE sessions RENAME TO sessions_legacy")
+    present = {row[1] for row in conn.execute("PRAGMA table_info(sessions_legacy)")}
+    select = ", ".join(c if c in present else f"NULL AS {c}" for c in SESSION_COLUMNS)
+    catalog, staged = _Catalog(), _Catalog.begin()
+    cur = conn.execute(f"SELECT id, {select} FROM sessions_legacy ORDER BY id")
+    write = conn.cursor()
+    last = 0
+    while True:
+        batch = cur.fetchmany(chunk_rows)
+        if not batch:
+            break
+        write_partitions(write, [r[0] for r in batch],
+                         [dict(zip(SESSION_COLUMNS, r[1:])) for r in batch], catalog, staged)
+        last = batch[-1][0]
+    conn.execute("DROP TABLE sessions_legacy")
+    refresh_sessions_view(conn)
+    conn.execute("UPDATE session_ids SET next_id = ?", (max(last, seq[0] if seq else 0) + 1,))
+
+
+# ─────────────────────────────────────────────
+# Daily rollups
+# ─────────────────────────────────────────────
+
+def update_rollups(cur, rows):
+    """Fold a batch of session rows (dicts) into the per-day rollup tables"""
+    days, clusters = {}, {}
+    for r in rows:
+        day = (r.get("created_at") or "")[:10]
+        risk = r.get("risk_prob") or 0.0
+        screen = r.get("screen_time") or 0.0
+        for acc, key in ((days, day), (clusters, (day, r.get("personality_cluster") or ""))):
+            n, s_risk, s_screen = acc.get(key, (0, 0.0, 0.0))
+            acc[key] = (n + 1, s_risk + risk, s_screen + screen)
+
+    cur.executemany("""
+        INSERT INTO daily_rollups (day, sessions, sum_risk, sum_screen_time) VALUES (?, ?, ?, ?)
+        ON CONFLICT (day) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            sum_risk = sum_risk + excluded.sum_risk,
+            sum_screen_time = sum_screen_time + excluded.sum_screen_time
+    """, [(day, *agg) for day, agg in days.items()])
+    cur.executemany("""
+        INSERT INTO daily_cluster_rollups (day, cluster, sessions, sum_risk, sum_screen_time)
+        VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (day, cluster) DO UPDATE SET
+            sessions = sessions + excluded.sessions,
+            sum_risk = sum_risk + excluded.sum_risk,
+            sum_screen_time = sum_screen_time + excluded.sum_screen_time
+    """, [(day, cluster, *agg) for (day, cluster), agg in clusters.items()])
+
+
+def rebuild_rollups(conn):
+    """Recompute the rollups of every day that has retained sessions, one
+    partition at a time (days whose partitions were archived keep theirs)"""
+    for key in list_partitions(conn):
+        table = f"sessions_{key}"
+        for rollups in ("daily_rollups", "daily_cluster_rollups"):
+            conn.execute(f"DELETE FROM {rollups} WHERE day IN "
+                         f"(SELECT DISTINCT COALESCE(substr(created_at, 1, 10), '') FROM {table})")
+        conn.execute(f"""
+            INSERT INTO daily_rollups (day, sessions, sum_risk, sum_screen_time)
+            SELECT COALESCE(substr(created_at, 1, 10), ''), COUNT(*), TOTAL(risk_prob), TOTAL(screen_time)
+            FROM {table} GROUP BY 1
+        """)
+        conn.execute(f"""
+            INSERT INTO daily_cluster_rollups (day, cluster, sessions, sum_risk, sum_screen_time)
+            SELECT COALESCE(substr(created_at, 1, 10), ''), COALESCE(personality_cluster, ''),
+                   COUNT(*), TOTAL(risk_prob), TOTAL(screen_time)
+            FROM {table} GROUP BY 1, 2
+        """)
+
+
+def query_daily_analytics(conn, since_day):
+    """Per-day totals (with per-cluster breakdown) for days >= since_day"""
+    days = conn.execute("""
+        SELECT day, sessions, sum_risk, sum_screen_time
+        FROM daily_rollups WHERE day >= ? ORDER BY day
+    """, (since_day,)).fetchall()
+    by_cluster = {}
+    for day, cluster, n, s_risk, s_screen in conn.execute("""
+        SELECT day, cluster, sessions, sum_risk, sum_screen_time
+        FROM daily_cluster_rollups WHERE day >= ?
+    """, (since_day,)):
+        by_cluster.setdefault(day, {})[cluster] = {
+            "sessions": n,
+            "avg_risk": round(s_risk / n, 3),
+            "total_screen_time": round(s_screen, 2),
+        }
+
+    return [
+        {"date": day, "avg_risk": round(s_risk / n, 3),
+         "total_screen_time": round(s_screen, 2), "sessions": n,
+         "by_cluster": by_cluster.get(day, {})}
+        for day, n, s_risk, s_screen in days
+    ]
+
+
+# ─────────────────────────────────────────────
+# Per-user running feature statistics
+# ─────────────────────────────────────────────
+
+def update_user_stats(cur, rows):
+    """Merge a batch into user_stats (count / mean / M2 per user and feature).
+
+    The batch is summarised in Python, then combined with the stored
+    aggregate using Chan's parallel-variance update inside the upsert, so the
+    cost is O(batch) no matter how long a user's history is.
+    """
+    acc = {}
+    for r in rows:
+        user_id = r.get("user_id")
+        if not user_id:
+            continue
+        for feature, column in USER_STAT_FEATURES.items():
+            value = r.get(column)
+            if value is not None:
+                acc.setdefault((user_id, feature), []).append(float(value))
+
+    params = []
+    for (user_id, feature), values in acc.items():
+        n = len(values)
+        if n == 1:
+            # Most keys in a batch: one session per user
+            params.append((user_id, feature, 1, values[0], 0.0))
+            continue
+        mean = sum(values) / n
+        m2 = sum([(v - mean) * (v - mean) for v in values])
+        params.append((user_id, feature, n, mean, m2))
+
+    cur.executemany("""
+        INSERT INTO user_stats (user_id, feature, n, mean, m2) VALUES (?, ?, ?, ?, ?)
+        ON CONFLICT (user_id, feature) DO UPDATE SET
+            n = n + excluded.n,
+            mean = mean + (excluded.mean - mean) * excluded.n / (n + excluded.n),
+            m2 = m2 + excluded.m2
+                 + (excluded.mean - mean) * (excluded.mean - mean) * n * excluded.n / (n + excluded.n)
+    """, params)
+
+
+def query_user_stats(conn, user_id):
+    """{feature: {"n", "mean", "variance"}} for one user (empty if unknown)"""
+    return {
+        feature: {"n": n, "mean": mean, "variance": m2 / n if n else 0.0}
+        for feature, n, mean, m2 in conn.execute(
+            "SELECT feature, n, mean, m2 FROM user_stats WHERE user_id = ?", (user_id,)
+        )
+    }
+
+
+def query_user_means(conn, user_ids):
+    """{user_id: {feature: mean}} for many users; users without sessions are absent"""
+    users = list(dict.fromkeys(user_ids))
+    means = {}
+    for start in range(0, len(users), 500):
+        chunk = users[start:start + 500]
+        for user_id, feature, mean in conn.execute(
+            "SELECT user_id, feature, mean FROM user_stats "
+            f"WHERE user_id IN ({', '.join('?' for _ in chunk)})", chunk
+        ):
+            means.setdefault(user_id, {})[feature] = mean
+    return means
+
+
+def iter_user_means(conn):
+    """(user_id, {feature: mean}) for every user with stored sessions, in user_id order"""
+    user, means = None, {}
+    for user_id, feature, mean in conn.execute(
+        "SELECT user_id, feature, mean FROM user_stats ORDER BY user_id"
+    ):
+        if user_id != user:
+            if user is not None:
+                yield user, means
+            user, means = user_id, {}
+        means[feature] = mean
+    if user is not None:
+        yield user, means
+
+
+# ─────────────────────────────────────────────
+# Per-user risk trend
+# ─────────────────────────────────────────────
+
+# user_trend state. t_ref is the newest session time (hours since the epoch);
+# w / wt / wx / wtt / wtx are exponentially time-decayed sums of 1, t, risk,
+# t² and t·risk with t measured in hours relative to t_ref, which is enough
+# for the decayed mean and weighted least-squares slope.
+TREND_COLUMNS = (
+    "sessions", "last_at", "last_risk", "ewma_risk", "ewma_screen_time",
+    "t_ref", "w", "wt", "wx", "wtt", "wtx",
+)
+
+
+def _epoch_hours(created_at):
+    return datetime.fromisoformat(created_at).replace(tzinfo=timezone.utc).timestamp() / 3600.0
+
+
+def fold_trend(state, created_at, risk, screen_time,
+               span=TREND_SESSIONS, half_life=TREND_HALF_LIFE_HOURS):
+    """Add one session to a user_trend state dict (None for a new user) in O(1).
+
+    The EWMA follows arrival order; the decayed sums are exact for any order,
+    so sessions uploaded late (offline, /log_session/bulk) land at their own time.
+    """
+    alpha = 2.0 / (span + 1)
+    decay = math.log(2) / half_life
+    ts = _epoch_hours(created_at)
+    if state is None:
+        state = {"sessions": 0, "last_at": created_at, "last_risk": risk, "ewma_risk": risk,
+                 "ewma_screen_time": screen_time, "t_ref": ts,
+                 "w": 0.0, "wt": 0.0, "wx": 0.0, "wtt": 0.0, "wtx": 0.0}
+    else:
+        state["ewma_risk"] += alpha * (risk - state["ewma_risk"])
+        if screen_time is not None:
+            prev = state["ewma_screen_time"]
+            state["ewma_screen_time"] = screen_time if prev is None else prev + alpha * (screen_time - prev)
+
+    if ts > state["t_ref"]:
+        # Move the origin to the new session and decay everything older
+        d = ts - state["t_ref"]
+        f = math.exp(-decay * d)
+        w, wt, wx, wtt, wtx = (state[k] for k in ("w", "wt", "wx", "wtt", "wtx"))
+        state.update(w=w * f, wx=wx * f, wt=(wt - d * w) * f,
+                     wtt=(wtt - 2 * d * wt + d * d * w) * f, wtx=(wtx - d * wx) * f,
+                     t_ref=ts, last_at=created_at, last_risk=risk)
+    t = ts - state["t_ref"]
+    g = math.exp(decay * t)
+    state["w"] += g
+    state["wt"] += g * t
+    state["wx"] += g * risk
+    state["wtt"] += g * t * t
+    state["wtx"] += g * t * risk
+    state["sessions"] += 1
+    return state
+
+
+def update_user_trend(cur, rows):
+    """Fold a batch into user_trend: one read and one upsert per user in the batch"""
+    by_user = {}
+    for r in rows:
+        if r.get("user_id") and r.get("risk_prob") is not None and r.get("created_at"):
+            by_user.setdefault(r["user_id"], []).append(r)
+    if not by_user:
+        return
+
+    states = {}
+    users = list(by_user)
+    for start in range(0, len(users), 500):
+        chunk = users[start:start + 500]
+        for row in cur.execute(
+            f"SELECT user_id, {', '.join(TREND_COLUMNS)} FROM user_trend "
+            f"WHERE user_id IN ({', '.join('?' for _ in chunk)})", chunk
+        ):
+            states[row[0]] = dict(zip(TREND_COLUMNS, row[1:]))
+
+    params = []
+    for user_id, user_rows in by_user.items():
+        state = states.get(user_id)
+        for r in user_rows:
+            state = fold_trend(state, r["created_at"], float(r["risk_prob"]), r.get("screen_time"))
+        params.append((user_id, *(state[c] for c in TREND_COLUMNS)))
+    cur.executemany(
+        f"INSERT OR REPLACE INTO user_trend (user_id, {', '.join(TREND_COLUMNS)}) "
+        f"VALUES ({', '.join('?' for _ in range(len(TREND_COLUMNS) + 1))})", params)
+
+
+def rebuild_user_trend(conn):
+    """Recompute user_trend from the retained sessions (arrival order)"""
+    conn.execute("DELETE FROM user_trend")
+    cur = conn.execute("""
+        SELECT user_id, risk_prob, screen_time, created_at FROM sessions
+        WHERE user_id IS NOT NULL ORDER BY id
+    """)
+    while True:
+        batch = cur.fetchmany(10000)
+        if not batch:
+            break
+        update_user_trend(conn.cursor(), [
+            {"user_id": u, "risk_prob": r, "screen_time": s, "created_at": c} for u, r, s, c in batch
+        ])
+
+
+def query_user_trend(conn, user_id):
+    """Trend state plus decayed mean / slope for one user (None if unknown)"""
+    row = conn.execute(
+        f"SELECT {', '.join(TREND_COLUMNS)} FROM user_trend WHERE user_id = ?", (user_id,)
+    ).fetchone()
+    if row is None:
+        return None
+    state = dict(zip(TREND_COLUMNS, row))
+    w, wt, wx, wtt, wtx = (state.pop(k) for k in ("w", "wt", "wx", "wtt", "wtx"))
+    var_t = w * wtt - wt * wt
+    state["recent_risk"] = wx / w if w else None
+    # No slope until the window spans some time (weighted spread of at least ~1 minute)
+    state["slope_per_hour"] = (w * wtx - wt * wx) / var_t if var_t > 3e-4 * w * w else None
+    state.pop("t_ref")
+    return state
+
+
+class _Pending:
+    """One queued insert (or, with row None, a flush barrier);
+    `done` is set once its batch has committed"""
+    __slots__ = ("row", "durable", "done", "rowid", "error")
+
+    def __init__(self, row, durable=False):
+        self.row = row
+        self.durable = durable
+        self.done = threading.Event()
+        self.rowid = None
+        self.error = None
+
+
+class SessionStore:
+    def __init__(self, db_path, batch_size=BATCH_SIZE, batch_wait_ms=BATCH_WAIT_MS,
+                 queue_size=QUEUE_SIZE, pool_size=POOL_SIZE, on_commit=None,
+                 write_retry_seconds=WRITE_RETRY_SECONDS):
+        self.db_path = db_path
+        self.write_retry = write_retry_seconds
+        self.on_commit = on_commit      # optional callback(seconds, n_rows) per batch
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait_ms / 1000.0
+        self.queue_size = queue_size
+        self.pool_size = pool_size
+        self._lock = threading.Lock()
+        self._pid = None
+        self._schema_lock = threading.Lock()
+        self._schema_ready = False
+        self._catalog = _Catalog()
+        self._counters = {"write_errors": 0, "busy_retries": 0, "writer_restarts": 0}
+        self.last_error = None
+        atexit.register(self.close)
+
+    # ── per-process state ───────────────────────
+
+    def _ensure_process(self):
+        if self._pid == os.getpid():
+            return
+        with self._lock:
+            if self._pid == os.getpid():
+                return
+            # Anything inherited from a parent process is unusable here
+            self._pool = queue.LifoQueue(maxsize=self.pool_size)
+            self._queue = queue.Queue(maxsize=self.queue_size)
+            self._closed = False
+            self._pid = os.getpid()
+            self._start_writer()
+
+    def _start_writer(self):
+        self._writer = threading.Thread(target=self._write_loop, name="nurova-db-writer", daemon=True)
+        self._writer.start()
+
+    def _ensure_writer(self):
+        # The loop survives database errors; this covers anything that still kills it
+        if self._writer.is_alive() or self._closed:
+            return
+        with self._lock:
+            if not self._writer.is_alive() and not self._closed:
+                self._counters["writer_restarts"] += 1
+                self._start_writer()
+
+    def _ensure_schema(self):
+        if self._schema_ready:
+            return
+        with self._schema_lock:
+            if not self._schema_ready:
+                self.init_schema()
+
+    def init_schema(self):
+        conn = connect(self.db_path)
+        conn.executescript("""
+            CREATE TABLE IF NOT EXISTS session_ids (next_id INTEGER NOT NULL);
+            INSERT INTO session_ids (next_id) SELECT 1 WHERE NOT EXISTS (SELECT 1 FROM session_ids);
+
+            CREATE TABLE IF NOT EXISTS apps (
+                id INTEGER PRIMARY KEY,
+                name TEXT NOT NULL UNIQUE
+            );
+
+            CREATE TABLE IF NOT EXISTS user_stats (
+                user_id TEXT NOT NULL,
+                feature TEXT NOT NULL,
+                n INTEGER NOT NULL,
+                mean REAL NOT NULL,
+                m2 REAL NOT NULL,
+                PRIMARY KEY (user_id, feature)
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS user_trend (
+                user_id TEXT PRIMARY KEY,
+                sessions INTEGER NOT NULL,
+                last_at TEXT NOT NULL,
+                last_risk REAL NOT NULL,
+                ewma_risk REAL NOT NULL,
+                ewma_screen_time REAL,
+                t_ref REAL NOT NULL,
+                w REAL NOT NULL,
+                wt REAL NOT NULL,
+                wx REAL NOT NULL,
+                wtt REAL NOT NULL,
+                wtx REAL NOT NULL
+            ) WITHOUT ROWID;
+
+            CREATE TABLE IF NOT EXISTS daily_rollups (
+                day TEXT PRIMARY KEY,
+                sessions INTEGER NOT NULL,
+                sum_risk REAL NOT NULL,
+                sum_screen_time REAL NOT NULL
+            ) WITHOUT ROWID;
+            CREATE TABLE IF NOT EXISTS daily_cluster_rollups (
+                day TEXT NOT NULL,
+                cluster TEXT NOT NULL,
+                sessions INTEGER NOT NULL,
+                sum_risk REAL NOT NULL,
+                sum_screen_time REAL NOT NULL,
+                PRIMARY KEY (day, cluster)
+            ) WITHOUT ROWID;
+        """)
+        conn.execute("BEGIN IMMEDIATE")
+        kind = conn.execute("SELECT type FROM sqlite_master WHERE name = 'sessions'").fetchone()
+        if kind is None:
+            refresh_sessions_view(conn)
+        elif kind[0] == "table":
+            # Databases from before partitioning: one sessions table, JSON apps_used
+            migrate_legacy_sessions(conn)
+
+        # Databases created before rollups existed: backfill once from raw sessions
+        has_sessions = conn.execute("SELECT 1 FROM sessions LIMIT 1").fetchone()
+        has_rollups = conn.execute("SELECT 1 FROM daily_rollups LIMIT 1").fetchone()
+        if has_sessions and not has_rollups:
+            rebuild_rollups(conn)
+        has_user_sessions = conn.execute("SELECT 1 FROM sessions WHERE user_id IS NOT NULL LIMIT 1").fetchone()
+        has_trend = conn.execute("SELECT 1 FROM user_trend LIMIT 1").fetchone()
+        if has_user_sessions and not has_trend:
+            rebuild_user_trend(conn)
+        conn.commit()
+        conn.close()
+        self._schema_ready = True
+
+    @contextmanager
+    def connection(self):
+        """Borrow a pooled connection (reads, or ad-hoc writes the caller commits)"""
+        self._ensure_process()
+        self._ensure_schema()
+        try:
+            conn = self._pool.get_nowait()
+        except queue.Empty:
+            conn = connect(self.db_path)
+        try:
+            yield conn
+        finally:
+            try:
+                self._pool.put_nowait(conn)
+            except queue.Full:
+                conn.close()
+
+    # ── bulk ingestion ──────────────────────────
+
+    def insert_rows(self, rows):
+        """Insert rows (dicts) in one short transaction → count.
+
+        For uploads that stream in: parse and validate a chunk with no lock
+        held, then insert it here, so the write lock is only held for the
+        executemany and the writer thread's batches interleave with the
+        upload's chunks. Retries while the database is locked, like the writer.
+        """
+        if not rows:
+            return 0
+        with self.connection() as conn:
+            def insert():
+                staged = self._catalog.begin()
+                t0 = time.perf_counter()
+                with conn:
+                    conn.execute("BEGIN IMMEDIATE")
+                    insert_sessions(conn.cursor(), rows, self._catalog, staged)
+                self._catalog.commit(staged)
+                if self.on_commit is not None:
+                    self.on_commit(time.perf_counter() - t0, len(rows))
+            self._retry_busy(insert)
+        return len(rows)
+
+    @contextmanager
+    def bulk_insert(self):
+        """One transaction for a whole load: yields insert(rows) → count.
+
+        Rows (dicts) are inserted with executemany and folded into the
+        rollups / user stats / trend as they arrive, so the caller can stream chunks
+        without holding the whole load. Commits on exit, rolls back on error.
+        Holds the write lock throughout, so it is for offline loaders; request
+        handlers use insert_rows().
+        """
+        with self.connection() as conn:
+            cur = conn.cursor()
+            staged = self._catalog.begin()
+            t0 = time.perf_counter()
+            total = 0
+
+            def insert(rows):
+                nonlocal total
+                if not rows:
+                    return 0
+                insert_sessions(cur, rows, self._catalog, staged)
+                total += len(rows)
+                return len(rows)
+
+            try:
+                cur.execute("BEGIN IMMEDIATE")
+                yield insert
+                conn.commit()
+            except BaseException:
+                conn.rollback()
+                raise
+            self._catalog.commit(staged)
+            if self.on_commit is not None and total:
+                self.on_commit(time.perf_counter() - t0, total)
+
+    # ── write-behind inserts ────────────────────
+
+    def log(self, row, durable=False, timeout=10.0):
+        """Queue one session row. With durable=True, block until its batch has
+        committed and return the new row id."""
+        self._ensure_process()
+        self._ensure_schema()
+        if self._closed:
+            raise RuntimeError("session store is closed")
+        self._ensure_writer()
+        pending = _Pending({c: row.get(c) for c in SESSION_COLUMNS}, durable)
+        self._queue.put(pending, timeout=timeout)   # bounded: blocks under backpressure
+        if not durable:
+            return None
+        if not pending.done.wait(timeout):
+            raise TimeoutError("session write was not committed in time")
+        if pending.error is not None:
+            raise pending.error
+        return pending.rowid
+
+    def _write_loop(self):
+        conn = None
+        stop = False
+        while not stop:
+            first = self._queue.get()
+            if first is None:
+                break
+            batch = [first]
+            waiting = first.durable
+            # Gather more rows until the batch is full or the wait window closes.
+            # Once someone is blocked on the commit (durable write or flush
+            # barrier) only drain what is already queued: group commit, no delay.
+            try:
+                while len(batch) < self.batch_size:
+                    if waiting:
+                        item = self._queue.get_nowait()
+                    else:
+                        item = self._queue.get(timeout=self.batch_wait)
+                    if item is None:
+                        stop = True
+                        break
+                    batch.append(item)
+                    waiting = waiting or item.durable
+            except queue.Empty:
+                pass
+            try:
+                if conn is None:
+                    conn = self._retry_busy(lambda: connect(self.db_path))
+                self._commit_batch(conn, batch)
+            except Exception as e:
+                # Never leave callers waiting on a batch, and keep the writer alive
+                self._fail([p for p in batch if p.row is not None], e)
+                for pending in batch:
+                    pending.done.set()
+        if conn is not None:
+            conn.close()
+
+    def _retry_busy(self, fn):
+        """fn(), retried with backoff for up to write_retry seconds while the
+        database is locked by another connection"""
+        deadline = time.monotonic() + self.write_retry
+        delay = 0.05
+        while True:
+            try:
+                return fn()
+            except sqlite3.OperationalError as e:
+                if not is_busy(e) or time.monotonic() + delay > deadline:
+                    raise
+            self._counters["busy_retries"] += 1
+            time.sleep(delay)
+            delay = min(delay * 2, 1.0)
+
+    def _insert(self, conn, pending_rows):
+        staged = self._catalog.begin()
+        with conn:
+            ids = insert_sessions(conn.cursor(), [p.row for p in pending_rows], self._catalog, staged)
+        self._catalog.commit(staged)
+        for pending, rowid in zip(pending_rows, ids):
+            pending.rowid = rowid
+
+    def _fail(self, pending_rows, error):
+        for pending in pending_rows:
+            pending.error = error
+        if pending_rows:
+            self._counters["write_errors"] += len(pending_rows)
+            self.last_error = f"{type(error).__name__}: {error}"
+
+    def _commit_batch(self, conn, batch):
+        rows = [p for p in batch if p.row is not None]
+        t0 = time.perf_counter()
+        if rows:
+            try:
+                self._retry_busy(lambda: self._insert(conn, rows))
+            except Exception as e:
+                if is_busy(e):
+                    self._fail(rows, e)
+                else:
+                    # One row that can't be stored rolls back the whole batch:
+                    # retry row by row so only that row is lost
+                    for i, pending in enumerate(rows):
+                        try:
+                            self._retry_busy(lambda pending=pending: self._insert(conn, [pending]))
+                        except Exception as row_error:
+                            if is_busy(row_error):
+                                self._fail(rows[i:], row_error)
+                                break
+                            self._fail([pending], row_error)
+        if self.on_commit is not None and rows:
+            self.on_commit(time.perf_counter() - t0, len(rows))
+        for pending in batch:
+            pending.done.set()
+
+    def flush(self, timeout=10.0):
+        """Block until everything queued before this call has been committed"""
+        self._ensure_process()
+        self._ensure_writer()
+        barrier = _Pending(None, durable=True)
+        self._queue.put(barrier, timeout=timeout)
+        return barrier.done.wait(timeout)
+
+    def status(self):
+        """Writer health for /health: running / dead / closed, queue depth, error counts"""
+        if self._pid != os.getpid():
+            return {"writer": "not_started"}
+        writer = "closed" if self._closed else "running" if self._writer.is_alive() else "dead"
+        return {"writer": writer, "queued": self._queue.qsize(), **self._counters, "last_error": self.last_error}
+
+    def close(self, timeout=10.0):
+        """Flush queued writes and stop the writer (called at exit / worker_exit)"""
+        if self._pid != os.getpid() or self._closed:
+            return
+        self._closed = True
+        try:
+            self._queue.put(None, timeout=timeout)
+        except queue.Full:
+            pass    # writer is stuck behind a full queue; don't hang worker_exit on it
+        self._writer.join(timeout)
+        while True:
+            try:
+                self._pool.get_nowait().close()
+            except queue.Empty:
+                break
@@ -1,15 +1,23 @@
 """
 Nurova 2.0 - ML Training Pipeline
 Run: python train_models.py
+     python train_models.py --export-engine   (re-export engine from existing pkl)
+     python train_models.py --risk-table      (also precompute the risk lookup table;
+                                               --export-engine --risk-table for the existing pkl)
+     python train_models.py --data big.csv    (chunked, multi-core; also --data nurova.db)
+     python train_models.py --update-clusters nurova.db   (mini-batch steps on sessions
+                                               logged since the last update → new model version)
 Outputs: models/distraction_model.pkl, models/cluster_model.pkl
-         dataset/synthetic_data.csv
+         models/distraction_engine/ (sklearn-free serving arrays)
+         models/risk_table/ (with --risk-table, if within the error bound)
+         dataset/synthetic_data.csv, dataset/synthetic/ (columnar copy)
 """
 
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
 from sklearn.ensemble import RandomForestClassifier, VotingClassifier
-from sklearn.cluster import KMeans
+from sklearn.cluster import KMeans, MiniBatchKMeans
 from sklearn.preprocessing import StandardScaler
 from sklearn.model_selection import train_test_split
 from sklearn.metrics import (
@@ -17,7 +25,22 @@ from sklearn.metrics import (
 )
 import joblib
 import os
+import copy
+import shutil
+import sqlite3
+import time
 import json
+import argparse
+from contextlib import contextmanager
+from datetime import datetime
+
+from inference import (
+    ENGINE_DIR, RISK_TABLE_DIR, RISK_TABLE_MAX_ERROR, RISK_TABLE_MEAN_ERROR, compile_distraction_model,
+    compile_risk_table, engine_fingerprint, load_risk_table, replace_file, save_engine, save_risk_table,
+)
+from columnar import is_dataset, load_dataset, save_dataset
+from session_store import CLUSTER_SESSIONS_QUERY, TRAINING_QUERY, last_session_id, query_user_means
+from model_registry import active_version, publish, publish_derived
 
 np.random.seed(42)
 os.makedirs("models", exist_ok=True)
@@ -27,16 +50,15 @@ os.makedirs("dataset", exist_ok=True)
 # 1. GENERATE SYNTHETIC DATASET (2000 rows)
 # ─────────────────────────────────────────────
 
-def generate_dataset(n=2000):
-    print("📊 Generating synthetic dataset...")
-
-    daily_screen_time = np.random.uniform(2, 16, n)
-    distraction_frequency = np.random.randint(0, 51, n)
-    mood_score = np.random.randint(1, 11, n)
-    goal_alignment_score = np.random.uniform(0, 1, n)
-    task_completion_rate = np.random.uniform(0, 1, n)
-    time_of_day = np.random.randint(0, 24, n)
-    hour_of_session = np.random.uniform(0, 24, n)
+def synthetic_frame(n, rand=np.random):
+    """n labelled rows; `rand` is np.random or a RandomState (for chunked generation)"""
+    daily_screen_time = rand.uniform(2, 16, n)
+    distraction_frequency = rand.randint(0, 51, n)
+    mood_score = rand.randint(1, 11, n)
+    goal_alignment_score = rand.uniform(0, 1, n)
+    task_completion_rate = rand.uniform(0, 1, n)
+    time_of_day = rand.randint(0, 24, n)
+    hour_of_session = rand.uniform(0, 24, n)
 
     # Build risk label with domain knowledge
     risk_score = (
@@ -48,7 +70,7 @@ def generate_dataset(n=2000):
         0.10 * np.where((time_of_day >= 22) | (time_of_day < 5), 1, 0)
     )
 
-    noise = np.random.normal(0, 0.05, n)
+    noise = rand.normal(0, 0.05, n)
     risk_score = np.clip(risk_score + noise, 0, 1)
     distraction_risk = (risk_score > 0.50).astype(int)
 
@@ -62,8 +84,15 @@ def generate_dataset(n=2000):
         "hour_of_session": hour_of_session,
         "distraction_risk": distraction_risk,
     })
+    return df
 
+
+def generate_dataset(n=2000):
+    print("📊 Generating synthetic dataset...")
+    df = synthetic_frame(n)
     df.to_csv("dataset/synthetic_data.csv", index=False)
+    save_dataset("dataset/synthetic", {c: df[c].to_numpy() for c in df.columns},
+                 source="train_models.generate_dataset")
     print(f"✅ Dataset saved: {n} rows | Class balance: {df.distraction_risk.value_counts().to_dict()}")
     return df
 
@@ -72,14 +101,23 @@ def generate_dataset(n=2000):
 # 2. TRAIN DISTRACTION PREDICTOR
 # ─────────────────────────────────────────────
 
-def train_distraction_model(df):
+DISTRACTION_FEATURES = [
+    "daily_screen_time", "distraction_frequency", "mood_score",
+    "goal_alignment_score", "task_completion_rate", "time_of_day",
+    "hour_of_session"
+]
+CLUSTER_FEATURES = [
+    "daily_screen_time", "distraction_frequency", "mood_score",
+    "goal_alignment_score", "task_completion_rate", "time_of_day"
+]
+LABEL = "distraction_risk"
+
+
+def train_distraction_model(df, risk_table=None):
+    """risk_table: None, or build_risk_table options ({} for the defaults)"""
     print("\n🤖 Training Distraction Prediction Model...")
 
-    features = [
-        "daily_screen_time", "distraction_frequency", "mood_score",
-        "goal_alignment_score", "task_completion_rate", "time_of_day",
-        "hour_of_session"
-    ]
+    features = list(DISTRACTION_FEATURES)
     X = df[features]
     y = df["distraction_risk"]
 
@@ -119,7 +157,8 @@ def train_distraction_model(df):
         "accuracy": accuracy,
         "confusion_matrix": cm.tolist(),
     }
-    joblib.dump(model_package, "models/distraction_model.pkl")
+    # Replaced, not overwritten: running workers memory-map the pkl
+    replace_file("models/distraction_model.pkl", lambda f: joblib.dump(model_package, f))
     print("✅ Distraction model saved → models/distraction_model.pkl")
 
     # Save metrics for README
@@ -133,9 +172,120 @@ def train_distraction_model(df):
     with open("models/distraction_metrics.json", "w") as f:
         json.dump(metrics, f, indent=2)
 
+    engine = export_distraction_engine(model_package, df)
+    if risk_table is not None:
+        build_risk_table(model_package, engine, X_test, **risk_table)
+
     return ensemble, scaler, features
 
 
+def export_distraction_engine(model_package, df, tolerance=1e-9):
+    """Export the ensemble as flat arrays and check it reproduces predict_proba"""
+    print("\n⚙️  Exporting compiled distraction engine...")
+    engine = compile_distraction_model(model_package)
+
+    X = df[model_package["features"]].values
+    expected = model_package["model"].predict_proba(model_package["scaler"].transform(X))[:, 1]
+    max_err = float(np.abs(engine.predict_risk(X) - expected).max())
+    print(f"   {engine.meta['n_trees']} trees | {engine.meta['n_nodes']} nodes | "
+          f"max |Δ predict_proba| = {max_err:.2e} over {len(X)} rows")
+    if max_err > tolerance:
+        raise RuntimeError(f"Compiled engine deviates from sklearn by {max_err:.2e} (> {tolerance:.0e})")
+
+    save_engine(engine, ENGINE_DIR)
+    print(f"✅ Engine saved → {ENGINE_DIR}/")
+    if os.path.exists(os.path.join(RISK_TABLE_DIR, "table.json")) and \
+            load_risk_table(RISK_TABLE_DIR).meta["engine_fingerprint"] != engine_fingerprint(engine):
+        shutil.rmtree(RISK_TABLE_DIR)
+        print(f"🗑️  Removed {RISK_TABLE_DIR}/ (built from the previous engine)")
+    return engine
+
+
+# Optional risk lookup table (app serves it with NUROVA_RISK_TABLE=1). The grid
+# spans the generate_dataset ranges: one point per value on the discrete
+# features, RISK_TABLE_BINS equal bins on the continuous ones. Inputs outside
+# the grid are scored by the engine at serve time.
+RISK_TABLE_RANGES = {
+    "daily_screen_time": (2, 16, None),
+    "distraction_frequency": (0, 50, 51),
+    "mood_score": (1, 10, 10),
+    "goal_alignment_score": (0, 1, None),
+    "task_completion_rate": (0, 1, None),
+    "time_of_day": (0, 23, 24),
+    "hour_of_session": (0, 24, None),
+}
+RISK_TABLE_BINS = {
+    "daily_screen_time": 8,
+    "goal_alignment_score": 4,
+    "task_completion_rate": 4,
+    "hour_of_session": 4,
+}
+
+
+def risk_table_axes(features, bins=None):
+    bins = {**RISK_TABLE_BINS, **(bins or {})}
+    axes = []
+    for f in features:
+        lo, hi, points = RISK_TABLE_RANGES[f]
+        axes.append((f, lo, hi, points or bins[f] + 1))
+    return axes
+
+
+def _risk_level(p):
+    # The app's low / medium / high cut points (_risk_result)
+    return np.digitize(p, [0.45, 0.75], right=True)
+
+
+def build_risk_table(model_package, engine, X_test, bins=None,
+                     max_error=RISK_TABLE_MAX_ERROR, mean_error=RISK_TABLE_MEAN_ERROR, out_dir=RISK_TABLE_DIR):
+    """Precompute the ensemble over the quantized grid and measure it against
+    the sklearn ensemble on the held-out split. Saved to out_dir only if both
+    errors are within bounds; returns the report."""
+    print("\n🧮 Building risk lookup table...")
+    t0 = time.perf_counter()
+    table = compile_risk_table(engine, risk_table_axes(engine.features, bins), exact=engine.predict_risk)
+    build_s = time.perf_counter() - t0
+
+    X = np.asarray(X_test, dtype=np.float64)
+    features = model_package["features"]
+    expected = model_package["model"].predict_proba(
+        model_package["scaler"].transform(pd.DataFrame(X, columns=features)))[:, 1]
+    served = table.predict_risk(X)
+    err = np.abs(served - expected)
+    outside = int(len(X) - table.covers(X).sum())
+    report = {
+        "rows": len(X),
+        "outside_grid": outside,
+        "max_abs_error": round(float(err.max()), 6),
+        "mean_abs_error": round(float(err.mean()), 6),
+        "p99_abs_error": round(float(np.percentile(err, 99)), 6),
+        "level_changes": int((_risk_level(served) != _risk_level(expected)).sum()),
+        "max_error_bound": max_error,
+        "mean_error_bound": mean_error,
+    }
+    table.meta["bins"] = {**RISK_TABLE_BINS, **(bins or {})}
+    table.meta["error"] = report
+    report.update(cells=table.meta["cells"], bytes=table.meta["bytes"], build_seconds=round(build_s, 2))
+
+    grid = " × ".join(str(a["points"]) for a in table.meta["axes"])
+    print(f"   grid {grid} = {table.meta['cells']:,} cells | {table.meta['bytes'] / 1e6:.1f} MB | "
+          f"built in {build_s:.1f}s")
+    print(f"   held-out |Δ risk| over {len(X):,} rows ({outside} outside the grid): "
+          f"max {report['max_abs_error']:.4f} | mean {report['mean_abs_error']:.4f} | "
+          f"p99 {report['p99_abs_error']:.4f} | risk level changed for {report['level_changes']}")
+
+    report["saved"] = report["max_abs_error"] <= max_error and report["mean_abs_error"] <= mean_error
+    if report["saved"]:
+        save_risk_table(table, out_dir)
+        print(f"✅ Risk table saved → {out_dir}/")
+    else:
+        if os.path.exists(out_dir):
+            shutil.rmtree(out_dir)
+        print(f"❌ Risk table not saved: error exceeds the bound (max ≤ {max_error}, mean ≤ {mean_error}); "
+              f"use more bins (--risk-table-bins) or serve with the engine")
+    return report
+
+
 # ─────────────────────────────────────────────
 # 3. TRAIN PERSONALITY CLUSTERING (KMeans)
 # ─────────────────────────────────────────────
@@ -170,13 +320,28 @@ CLUSTER_TRAITS = {
     ],
 }
 
+def name_clusters(centers_df):
+    """Map cluster ids to personality types from their (unscaled) centroids"""
+    # Sort by time_of_day descending → NightScrollAddict gets highest
+    sorted_by_time = centers_df["time_of_day"].argsort().values[::-1]
+    sorted_by_dist = centers_df["distraction_frequency"].argsort().values[::-1]
+    sorted_by_prod = centers_df["goal_alignment_score"].argsort().values
+
+    cluster_name_map = {}
+    cluster_name_map[sorted_by_time[0]] = "NightScrollAddict"
+    remaining = [c for c in range(4) if c not in cluster_name_map]
+    cluster_name_map[sorted_by_dist[next(i for i, c in enumerate(sorted_by_dist) if c in remaining)]] = "StressScroller"
+    remaining = [c for c in range(4) if c not in cluster_name_map]
+    cluster_name_map[sorted_by_prod[next(i for i, c in enumerate(sorted_by_prod) if c in remaining)]] = "ProductiveSprinter"
+    remaining = [c for c in range(4) if c not in cluster_name_map]
+    cluster_name_map[remaining[0]] = "ProcrastinationBinger"
+    return cluster_name_map
+
+
 def train_cluster_model(df):
     print("\n🎭 Training Personality Cluster Model...")
 
-    cluster_features = [
-        "daily_screen_time", "distraction_frequency", "mood_score",
-        "goal_alignment_score", "task_completion_rate", "time_of_day"
-    ]
+    cluster_features = list(CLUSTER_FEATURES)
     X_cluster = df[cluster_features]
 
     scaler_c = StandardScaler()
@@ -197,20 +362,7 @@ def train_cluster_model(df):
     print("\nCluster centroids (inverse scaled):")
     print(centers_df.round(2))
 
-    # Map clusters to personality types by heuristic
-    # Sort by time_of_day descending → NightScrollAddict gets highest
-    sorted_by_time = centers_df["time_of_day"].argsort().values[::-1]
-    sorted_by_dist = centers_df["distraction_frequency"].argsort().values[::-1]
-    sorted_by_prod = centers_df["goal_alignment_score"].argsort().values
-
-    cluster_name_map = {}
-    cluster_name_map[sorted_by_time[0]] = "NightScrollAddict"
-    remaining = [c for c in range(4) if c not in cluster_name_map]
-    cluster_name_map[sorted_by_dist[next(i for i, c in enumerate(sorted_by_dist) if c in remaining)]] = "StressScroller"
-    remaining = [c for c in range(4) if c not in cluster_name_map]
-    cluster_name_map[sorted_by_prod[next(i for i, c in enumerate(sorted_by_prod) if c in remaining)]] = "ProductiveSprinter"
-    remaining = [c for c in range(4) if c not in cluster_name_map]
-    cluster_name_map[remaining[0]] = "ProcrastinationBinger"
+    cluster_name_map = name_clusters(centers_df)
 
     model_package = {
         "model": kmeans,
@@ -220,7 +372,7 @@ def train_cluster_model(df):
         "cluster_traits": CLUSTER_TRAITS,
         "silhouette_score": sil,
     }
-    joblib.dump(model_package, "models/cluster_model.pkl")
+    replace_file("models/cluster_model.pkl", lambda f: joblib.dump(model_package, f))
     print("✅ Cluster model saved → models/cluster_model.pkl")
 
     metrics = {
@@ -236,7 +388,376 @@ def train_cluster_model(df):
 
 
 # ─────────────────────────────────────────────
-# 4. PRINT FINAL SUMMARY
+# 4. CHUNKED, PARALLEL TRAINING (large datasets)
+# ─────────────────────────────────────────────
+
+def _peak_rss_mb():
+    """Peak resident memory since the last _reset_peak_rss() (process peak as fallback)"""
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _reset_peak_rss():
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+    except OSError:
+        pass
+
+
+class StageReport:
+    """Wall time and peak RSS per named training stage"""
+
+    def __init__(self):
+        self.stages = []
+
+    @contextmanager
+    def stage(self, name):
+        _reset_peak_rss()
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.stages.append({
+                "stage": name,
+                "seconds": round(time.perf_counter() - t0, 3),
+                "peak_rss_mb": round(_peak_rss_mb(), 1),
+            })
+
+    def print(self):
+        print("\n⏱️  Stage report:")
+        print(f"   {'stage':<22}{'wall s':>10}{'peak RSS MB':>14}")
+        for s in self.stages:
+            print(f"   {s['stage']:<22}{s['seconds']:>10.3f}{s['peak_rss_mb']:>14.1f}")
+
+
+def iter_chunks(source, chunksize):
+    """Yield DataFrames of at most `chunksize` rows from a columnar dataset, a CSV or a SQLite sessions db"""
+    columns = DISTRACTION_FEATURES + [LABEL]
+    if is_dataset(source):
+        yield from load_dataset(source).iter_frames(chunksize, columns)
+    elif source.endswith((".db", ".sqlite", ".sqlite3")):
+        import sqlite3
+        conn = sqlite3.connect(f"file:{source}?mode=ro", uri=True)
+        try:
+            yield from pd.read_sql_query(TRAINING_QUERY, conn, chunksize=chunksize)
+        finally:
+            conn.close()
+    else:
+        yield from pd.read_csv(source, usecols=columns, chunksize=chunksize)
+
+
+def load_columns(source, chunksize, test_size=0.2, seed=42):
+    """Stream `source` once into compact float32 feature matrices.
+
+    Rows are assigned to train/test as they arrive, and the distraction and
+    cluster scalers are fitted incrementally, so nothing but the float32
+    arrays (and one chunk) is ever held in memory.
+    """
+    rng = np.random.RandomState(seed)
+    scaler = StandardScaler()
+    scaler_c = StandardScaler()
+    parts = {"X_train": [], "y_train": [], "X_test": [], "y_test": []}
+    n_rows = 0
+    for chunk in iter_chunks(source, chunksize):
+        chunk = chunk.dropna()
+        if chunk.empty:
+            continue
+        X = chunk[DISTRACTION_FEATURES].to_numpy(dtype=np.float32)
+        y = chunk[LABEL].to_numpy(dtype=np.int8)
+        test = rng.random_sample(len(X)) < test_size
+
+        scaler.partial_fit(X[~test])
+        scaler_c.partial_fit(X[:, :len(CLUSTER_FEATURES)])
+        parts["X_train"].append(X[~test])
+        parts["y_train"].append(y[~test])
+        parts["X_test"].append(X[test])
+        parts["y_test"].append(y[test])
+        n_rows += len(X)
+        print(f"   … {n_rows:,} rows read", end="\r", flush=True)
+    print()
+    if not n_rows:
+        raise ValueError(f"No usable rows in {source}")
+    data = {k: np.concatenate(v) for k, v in parts.items()}
+    return data, scaler, scaler_c
+
+
+def train_large(source, chunksize=100_000, n_jobs=-1, silhouette_sample=10_000,
+                verify_rows=20_000, batch_size=4096, risk_table=None):
+    """Out-of-core variant of the full pipeline; writes the same model packages"""
+    report = StageReport()
+    print(f"📊 Streaming training data from {source} (chunks of {chunksize:,})...")
+
+    with report.stage("load"):
+        data, scaler, scaler_c = load_columns(source, chunksize)
+    X_train, y_train = data["X_train"], data["y_train"]
+    X_test, y_test = data["X_test"], data["y_test"]
+    print(f"✅ {len(X_train) + len(X_test):,} rows | train {len(X_train):,} | test {len(X_test):,}")
+
+    # ── distraction model ──
+    print("\n🤖 Training Distraction Prediction Model...")
+    with report.stage("scale"):
+        X_train_s = scaler.transform(X_train)
+        X_test_s = scaler.transform(X_test)
+    with report.stage("fit_ensemble"):
+        lr = LogisticRegression(max_iter=1000, C=1.0, random_state=42)
+        rf = RandomForestClassifier(n_estimators=100, max_depth=8, random_state=42, n_jobs=n_jobs)
+        ensemble = VotingClassifier(estimators=[("lr", lr), ("rf", rf)], voting="soft")
+        ensemble.fit(X_train_s, y_train)
+        # Serve like the single-threaded model: no thread pool per predict call
+        ensemble.named_estimators_["rf"].n_jobs = None
+    with report.stage("evaluate"):
+        y_pred = ensemble.predict(X_test_s)
+        accuracy = accuracy_score(y_test, y_pred)
+        cm = confusion_matrix(y_test, y_pred, labels=[0, 1])
+    del X_train_s, X_test_s
+    print(f"📈 Accuracy: {accuracy:.4f} ({accuracy*100:.1f}%)")
+    print(f"Confusion Matrix:\n{cm}")
+
+    model_package = {
+        "model": ensemble,
+        "scaler": scaler,
+        "features": list(DISTRACTION_FEATURES),
+        "accuracy": accuracy,
+        "confusion_matrix": cm.tolist(),
+    }
+    replace_file("models/distraction_model.pkl", lambda f: joblib.dump(model_package, f))
+    print("✅ Distraction model saved → models/distraction_model.pkl")
+    with open("models/distraction_metrics.json", "w") as f:
+        json.dump({
+            "accuracy": round(accuracy, 4),
+            "confusion_matrix": cm.tolist(),
+            "model_type": "VotingClassifier(LogReg + RandomForest)",
+            "training_samples": len(X_train),
+            "test_samples": len(X_test),
+        }, f, indent=2)
+
+    with report.stage("export_engine"):
+        # Check the compiled engine on a sample; the traversal is O(rows × trees) in memory
+        sample = X_test[:verify_rows].astype(np.float64)
+        engine = export_distraction_engine(model_package, pd.DataFrame(sample, columns=DISTRACTION_FEATURES))
+    if risk_table is not None:
+        with report.stage("risk_table"):
+            build_risk_table(model_package, engine, sample, **risk_table)
+
+    # ── personality clusters ──
+    print("\n🎭 Training Personality Cluster Model (mini-batch)...")
+    X_all = np.concatenate([X_train[:, :len(CLUSTER_FEATURES)], X_test[:, :len(CLUSTER_FEATURES)]])
+    del data, X_train, X_test
+    with report.stage("scale_clusters"):
+        # float64 like the in-memory KMeans package, so centroids keep full precision
+        X_scaled = scaler_c.transform(X_all.astype(np.float64))
+    del X_all
+    with report.stage("fit_kmeans"):
+        kmeans = MiniBatchKMeans(n_clusters=4, random_state=42, n_init=3,
+                                 batch_size=batch_size, max_iter=100)
+        labels = kmeans.fit_predict(X_scaled)
+    with report.stage("silhouette"):
+        sil = float(silhouette_score(X_scaled, labels, sample_size=min(silhouette_sample, len(X_scaled)),
+                                     random_state=42))
+    print(f"📊 Silhouette Score: {sil:.4f} (sample of {min(silhouette_sample, len(X_scaled)):,})")
+    print(f"Cluster distribution: {dict(enumerate(np.bincount(labels, minlength=4).tolist()))}")
+
+    centers_df = pd.DataFrame(scaler_c.inverse_transform(kmeans.cluster_centers_), columns=CLUSTER_FEATURES)
+    print("\nCluster centroids (inverse scaled):")
+    print(centers_df.round(2))
+    cluster_name_map = name_clusters(centers_df)
+
+    cluster_package = {
+        "model": kmeans,
+        "scaler": scaler_c,
+        "features": list(CLUSTER_FEATURES),
+        "cluster_name_map": cluster_name_map,
+        "cluster_traits": CLUSTER_TRAITS,
+        "silhouette_score": sil,
+    }
+    replace_file("models/cluster_model.pkl", lambda f: joblib.dump(cluster_package, f))
+    print("✅ Cluster model saved → models/cluster_model.pkl")
+    with open("models/cluster_metrics.json", "w") as f:
+        json.dump({
+            "silhouette_score": round(sil, 4),
+            "n_clusters": 4,
+            "cluster_names": {int(k): v for k, v in cluster_name_map.items()},
+            "model_type": "MiniBatchKMeans",
+            "silhouette_sample": min(silhouette_sample, len(X_scaled)),
+        }, f, indent=2)
+
+    report.print()
+    with open("models/training_report.json", "w") as f:
+        json.dump({"source": source, "rows": int(len(labels)), "n_jobs": n_jobs,
+                   "stages": report.stages}, f, indent=2)
+    return accuracy, sil
+
+
+# ─────────────────────────────────────────────
+# 5. INCREMENTAL CLUSTER UPDATES (logged sessions)
+# ─────────────────────────────────────────────
+# The package carries a checkpoint (last session id consumed) and a per-centroid
+# count. An update reads only sessions after the checkpoint, in batches, and
+# moves each centroid to the running mean of everything assigned to it
+# (mini-batch k-means, learning rate 1/count). The scaler is kept as trained so
+# the centroids stay comparable across versions; cluster ids never change, so
+# names carry over and the naming heuristic is only re-checked.
+
+def _center_counts(pkg):
+    """Points already absorbed per centroid: stored by a previous update, else the fit's labels"""
+    model = pkg["model"]
+    if "center_counts" in pkg:
+        return np.asarray(pkg["center_counts"], dtype=np.float64)
+    if getattr(model, "labels_", None) is not None:
+        return np.bincount(model.labels_, minlength=model.n_clusters).astype(np.float64)
+    return np.ones(model.n_clusters)
+
+
+def _nearest(centers, X_scaled):
+    return ((X_scaled[:, None, :] - centers[None, :, :]) ** 2).sum(axis=2).argmin(axis=1)
+
+
+def minibatch_step(centers, counts, X_scaled):
+    """One mini-batch k-means step in place; returns the batch's labels"""
+    labels = _nearest(centers, X_scaled)
+    for c in range(len(centers)):
+        members = X_scaled[labels == c]
+        if len(members):
+            counts[c] += len(members)
+            centers[c] += (members.sum(axis=0) - len(members) * centers[c]) / counts[c]
+    return labels
+
+
+def update_clusters(db_path, models_dir="models", batch_size=4096, rename=False, dry_run=False):
+    """Fold sessions logged since the active cluster model's checkpoint into its
+    centroids and publish the result as a new model version. Returns the report."""
+    t0 = time.perf_counter()
+    version, path = active_version(models_dir)
+    pkg = joblib.load(os.path.join(path, "cluster_model.pkl"))
+    model, scaler, features = pkg["model"], pkg["scaler"], pkg["features"]
+    checkpoint = pkg.get("checkpoint", {"last_session_id": 0, "sessions": 0})
+
+    old_centers = np.asarray(model.cluster_centers_, dtype=np.float64)
+    centers, counts = old_centers.copy(), _center_counts(pkg)
+    assigned = np.zeros(len(centers), dtype=np.int64)
+    users = set()
+
+    conn = sqlite3.connect(f"file:{db_path}?mode=ro", uri=True)
+    try:
+        upto = last_session_id(conn)
+        cur = conn.execute(CLUSTER_SESSIONS_QUERY, (checkpoint["last_session_id"], upto))
+        while True:
+            rows = cur.fetchmany(batch_size)
+            if not rows:
+                break
+            users.update(r[0] for r in rows if r[0])
+            X = scaler.transform(pd.DataFrame([r[1:] for r in rows], columns=features, dtype=np.float64))
+            assigned += np.bincount(minibatch_step(centers, counts, X), minlength=len(centers))
+        means = query_user_means(conn, sorted(users))
+    finally:
+        conn.close()
+
+    name_map = {int(k): v for k, v in pkg["cluster_name_map"].items()}
+    proposed = {int(k): v for k, v in name_clusters(
+        pd.DataFrame(scaler.inverse_transform(centers), columns=features)).items()}
+    renamed = proposed != name_map
+    if renamed and rename:
+        name_map = proposed
+
+    # Users seen in this update, classified from their running means before and after
+    X_users = np.array([[m.get(f, mu) for f, mu in zip(features, scaler.mean_)] for m in means.values()])
+    if len(X_users):
+        X_users = scaler.transform(pd.DataFrame(X_users, columns=features))
+        before = [pkg["cluster_name_map"][int(c)] for c in _nearest(old_centers, X_users)]
+        after = [name_map[int(c)] for c in _nearest(centers, X_users)]
+    else:
+        before = after = []
+    changed = {}
+    for b, a in zip(before, after):
+        if b != a:
+            changed[f"{b} → {a}"] = changed.get(f"{b} → {a}", 0) + 1
+
+    sessions = int(assigned.sum())
+    report = {
+        "base_version": version,
+        "sessions": sessions,
+        "session_ids": [checkpoint["last_session_id"], upto],
+        "drift": {
+            name_map[c]: {
+                "assigned": int(assigned[c]),
+                "shift_scaled": round(float(np.linalg.norm(centers[c] - old_centers[c])), 6),
+                "centroid": dict(zip(features, np.round(scaler.inverse_transform(centers[c:c + 1])[0], 4).tolist())),
+            }
+            for c in range(len(centers))
+        },
+        "users_seen": len(X_users),
+        "users_changed": sum(changed.values()),
+        "changes": changed,
+        "naming_heuristic": {int(k): v for k, v in proposed.items()},
+        "renamed": renamed and rename,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    if renamed and not rename:
+        print("⚠️  Naming heuristic now ranks the centroids differently; kept the existing names "
+              "(see naming_heuristic, rerun with --rename to adopt it)")
+
+    if dry_run or not sessions:
+        report["published"] = None
+        return report
+
+    updated = copy.deepcopy(model)
+    updated.cluster_centers_ = centers
+    new_pkg = {
+        **pkg,
+        "model": updated,
+        "cluster_name_map": name_map,
+        "center_counts": counts.tolist(),
+        "checkpoint": {"last_session_id": upto, "sessions": checkpoint["sessions"] + sessions,
+                       "updated_at": datetime.utcnow().isoformat()},
+    }
+
+    def write_metrics(out):
+        with open(out, "w") as f:
+            json.dump({
+                "silhouette_score": round(float(pkg.get("silhouette_score", 0.0)), 4),
+                "n_clusters": len(centers),
+                "cluster_names": name_map,
+                "model_type": f"{type(model).__name__} + incremental mini-batch updates",
+                "sessions_since_fit": new_pkg["checkpoint"]["sessions"],
+            }, f, indent=2)
+
+    def write_report(out):
+        with open(out, "w") as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+
+    report["published"] = publish_derived(models_dir, {
+        "cluster_model.pkl": lambda out: joblib.dump(new_pkg, out),
+        "cluster_metrics.json": write_metrics,
+        "cluster_update.json": write_report,
+    })
+    return report
+
+
+def print_cluster_update(report):
+    print(f"\n🎭 Cluster update from {report['base_version']}: {report['sessions']:,} new sessions "
+          f"(ids {report['session_ids'][0]}–{report['session_ids'][1]}) in {report['seconds']} s")
+    print(f"   {'cluster':<24}{'assigned':>10}{'drift (σ)':>12}")
+    for name, d in report["drift"].items():
+        print(f"   {name:<24}{d['assigned']:>10,}{d['shift_scaled']:>12.4f}")
+    print(f"   Users changed cluster: {report['users_changed']:,} of {report['users_seen']:,} seen")
+    for change, n in sorted(report["changes"].items(), key=lambda kv: -kv[1]):
+        print(f"     {change}: {n:,}")
+    if report["published"]:
+        print(f"🚚 Published model version {report['published']}")
+    else:
+        print("   Nothing published")
+
+
+# ─────────────────────────────────────────────
+# 6. PRINT FINAL SUMMARY
 # ─────────────────────────────────────────────
 
 def print_summary(accuracy, sil_score):
@@ -249,16 +770,94 @@ def print_summary(accuracy, sil_score):
     print("\n  Files generated:")
     print("    📁 models/distraction_model.pkl")
     print("    📁 models/cluster_model.pkl")
+    print("    📁 models/distraction_engine/")
+    if os.path.exists(RISK_TABLE_DIR):
+        print(f"    📁 {RISK_TABLE_DIR}/")
     print("    📁 models/distraction_metrics.json")
     print("    📁 models/cluster_metrics.json")
     print("    📁 dataset/synthetic_data.csv")
+    print("    📁 dataset/synthetic/")
     print("\n  Now start the API: python app.py")
     print("=" * 50)
 
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Nurova ML training pipeline")
+    parser.add_argument("--export-engine", action="store_true",
+                        help="only re-export models/distraction_engine/ from the existing pkl")
+    parser.add_argument("--publish", action="store_true",
+                        help="after training, snapshot the models as a new version and activate it "
+                             "(running workers hot-reload it)")
+    parser.add_argument("--data", metavar="PATH",
+                        help="train out-of-core on a columnar dataset dir, a CSV, "
+                             "or a SQLite db's sessions table (*.db)")
+    parser.add_argument("--chunksize", type=int, default=100_000,
+                        help="rows per chunk read from --data (default 100000)")
+    parser.add_argument("--n-jobs", type=int, default=-1,
+                        help="cores for the random forest with --data (default: all)")
+    parser.add_argument("--silhouette-sample", type=int, default=10_000,
+                        help="rows sampled for the silhouette score with --data (default 10000)")
+    parser.add_argument("--update-clusters", metavar="DB",
+                        help="update the active cluster model with sessions logged in DB since its "
+                             "last update, and publish the result as a new version")
+    parser.add_argument("--rename", action="store_true",
+                        help="with --update-clusters, adopt the naming heuristic's names if they changed")
+    parser.add_argument("--dry-run", action="store_true",
+                        help="with --update-clusters, print the report without publishing")
+    parser.add_argument("--risk-table", action="store_true",
+                        help="also precompute models/risk_table/ (served with NUROVA_RISK_TABLE=1); "
+                             "with --export-engine, for the existing pkl")
+    parser.add_argument("--risk-table-bins", metavar="FEATURE=N,...",
+                        help="bins per continuous feature, e.g. daily_screen_time=16,hour_of_session=8 "
+                             f"(defaults: {','.join(f'{f}={n}' for f, n in RISK_TABLE_BINS.items())})")
+    parser.add_argument("--risk-table-max-error", type=float, default=RISK_TABLE_MAX_ERROR,
+                        help="refuse the table above this held-out max |Δ risk| "
+                             "(default NUROVA_RISK_TABLE_MAX_ERROR or 0.10)")
+    parser.add_argument("--risk-table-mean-error", type=float, default=RISK_TABLE_MEAN_ERROR,
+                        help="refuse the table above this held-out mean |Δ risk| "
+                             "(default NUROVA_RISK_TABLE_MEAN_ERROR or 0.02)")
+    args = parser.parse_args()
+
+    risk_table = None
+    if args.risk_table:
+        risk_table = {"max_error": args.risk_table_max_error, "mean_error": args.risk_table_mean_error}
+        if args.risk_table_bins:
+            risk_table["bins"] = {f: int(n) for f, n in (item.split("=") for item in args.risk_table_bins.split(","))}
+            unknown = set(risk_table["bins"]) - set(RISK_TABLE_BINS)
+            if unknown:
+                parser.error(f"--risk-table-bins: not a continuous feature: {', '.join(sorted(unknown))}")
+
+    if args.update_clusters:
+        print_cluster_update(update_clusters(args.update_clusters, rename=args.rename, dry_run=args.dry_run))
+        raise SystemExit(0)
+
+    if args.data:
+        accuracy, sil = train_large(args.data, chunksize=args.chunksize, n_jobs=args.n_jobs,
+                                    silhouette_sample=args.silhouette_sample, risk_table=risk_table)
+        print_summary(accuracy, sil)
+        if args.publish:
+            print(f"🚚 Published model version {publish('models')}")
+        raise SystemExit(0)
+
+    if args.export_engine:
+        if is_dataset("dataset/synthetic"):
+            ds = load_dataset("dataset/synthetic")
+            data = pd.DataFrame(ds.matrix(DISTRACTION_FEATURES + [LABEL]), columns=DISTRACTION_FEATURES + [LABEL])
+        else:
+            data = pd.read_csv("dataset/synthetic_data.csv")
+        model_package = joblib.load("models/distraction_model.pkl")
+        engine = export_distraction_engine(model_package, data)
+        if risk_table is not None:
+            # Same held-out split as train_distraction_model
+            _, X_test = train_test_split(data[DISTRACTION_FEATURES], test_size=0.2, random_state=42,
+                                         stratify=data[LABEL])
+            build_risk_table(model_package, engine, X_test, **risk_table)
+        if args.publish:
+            print(f"🚚 Published model version {publish('models')}")
+        raise SystemExit(0)
+
     df = generate_dataset(2000)
-    model, scaler, features = train_distraction_model(df)
+    model, scaler, features = train_distraction_model(df, risk_table=risk_table)
     kmeans, scaler_c, c_features, c_map = train_cluster_model(df)
 
     # Load metrics to display
@@ -268,3 +867,5 @@ if __name__ == "__main__":
         c_metrics = json.load(f)
 
     print_summary(d_metrics["accuracy"], c_metrics["silhouette_score"])
+    if args.publish:
+        print(f"🚚 Published model version {publish('models')}")
@@ -0,0 +1,249 @@
+"""
+Nurova 2.0 — YouTube search with caching
+One reusable Data API client per fetch thread, a bounded TTL + LRU cache keyed on
+(query, risk_level), stale-while-revalidate refresh and single-flight
+coalescing, so N identical concurrent misses cost one upstream call.
+
+  cache = SearchCache(YouTubeSearchBackend(api_key))
+  items = cache.get("DSA", "high")          # list of catalog-shaped dicts, or None
+  items = cache.get("DSA", "high", timeout=0.3)
+                                            # None if not answered within 300 ms; the
+                                            # fetch finishes in the background and fills the cache
+  cache.backend = FakeSearchBackend(...)    # offline / tests / benchmarks
+  cache.stats()                             # hit / miss / upstream latency counters
+"""
+
+import os
+import time
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+CACHE_SIZE = int(os.getenv("YOUTUBE_CACHE_SIZE", "1024"))
+CACHE_TTL = float(os.getenv("YOUTUBE_CACHE_TTL", "900"))          # fresh for 15 min
+CACHE_STALE_TTL = float(os.getenv("YOUTUBE_CACHE_STALE_TTL", "21600"))  # served stale up to 6 h
+CACHE_ERROR_TTL = float(os.getenv("YOUTUBE_CACHE_ERROR_TTL", "30"))   # back off after a failure
+FETCH_THREADS = int(os.getenv("YOUTUBE_FETCH_THREADS", "4"))
+
+DURATION_MAP = {"high": "short", "medium": "medium", "low": "any"}
+
+
+# ─────────────────────────────────────────────
+# Search backends
+# ─────────────────────────────────────────────
+
+def _to_item(query, vid_id, snippet):
+    return {
+        "title": snippet["title"],
+        "url": f"https://youtu.be/{vid_id}",
+        "thumbnail": snippet["thumbnails"]["high"]["url"],
+        "channel": snippet["channelTitle"],
+        "duration": "~10 min",
+        "category": query,
+        "views": 5000,
+        "duration_mins": 10,
+        "goal_relevance": 0.82,
+        "user_interest": 0.78,
+    }
+
+
+class YouTubeSearchBackend:
+    """YouTube Data API v3; the discovery client is built once per thread and reused
+    (its httplib2 transport must not be shared between threads)"""
+
+    def __init__(self, api_key):
+        self.api_key = api_key
+        self._local = threading.local()
+
+    def _get_client(self):
+        client = getattr(self._local, "client", None)
+        if client is None:
+            from googleapiclient.discovery import build
+            client = self._local.client = build("youtube", "v3", developerKey=self.api_key, cache_discovery=False)
+        return client
+
+    def search(self, query, risk_level):
+        search_resp = self._get_client().search().list(
+            q=query + " tutorial",
+            type="video",
+            part="snippet",
+            maxResults=10,
+            videoDuration=DURATION_MAP.get(risk_level, "medium"),
+            relevanceLanguage="en",
+        ).execute()
+        return [
+            _to_item(query, item["id"]["videoId"], item["snippet"])
+            for item in search_resp.get("items", [])
+        ]
+
+
+class FakeSearchBackend:
+    """Offline stand-in: deterministic results, optional delay / failures.
+    `delay` is seconds, or a callable returning seconds per call (jitter)."""
+
+    def __init__(self, delay=0.0, fail=False, n_results=10):
+        self.delay = delay
+        self.fail = fail
+        self.n_results = n_results
+        self.calls = 0
+        self._lock = threading.Lock()
+
+    def search(self, query, risk_level):
+        with self._lock:
+            self.calls += 1
+        delay = self.delay() if callable(self.delay) else self.delay
+        if delay:
+            time.sleep(delay)
+        if self.fail:
+            raise RuntimeError("fake upstream failure")
+        return [
+            _to_item(query, f"fake-{risk_level}-{i}", {
+                "title": f"{query} tutorial #{i + 1}",
+                "thumbnails": {"high": {"url": f"https://img.youtube.com/vi/fake{i}/hqdefault.jpg"}},
+                "channelTitle": "Fake Channel",
+            })
+            for i in range(self.n_results)
+        ]
+
+
+# ─────────────────────────────────────────────
+# Cache
+# ─────────────────────────────────────────────
+
+class _Flight:
+    __slots__ = ("done", "value")
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+
+
+class SearchCache:
+    def __init__(self, backend, maxsize=CACHE_SIZE, ttl=CACHE_TTL,
+                 stale_ttl=CACHE_STALE_TTL, error_ttl=CACHE_ERROR_TTL, clock=time.monotonic,
+                 fetch_threads=FETCH_THREADS):
+        self.backend = backend
+        self.fetch_threads = fetch_threads
+        self._executor = None
+        self._executor_pid = None
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.error_ttl = error_ttl
+        self.clock = clock
+        self._entries = OrderedDict()   # key → (items or None, stored_at, fetched_at)
+        self._flights = {}              # key → _Flight for the in-progress upstream call
+        self._lock = threading.Lock()
+        self._counters = {
+            "hits": 0, "stale_hits": 0, "misses": 0, "coalesced": 0, "budget_timeouts": 0,
+            "upstream_calls": 0, "upstream_errors": 0, "evictions": 0,
+            "upstream_seconds_total": 0.0, "upstream_seconds_max": 0.0,
+        }
+
+    @staticmethod
+    def key(query, risk_level):
+        return (" ".join(query.lower().split()), risk_level)
+
+    def _submit(self, *args):
+        """Run a fetch on the background pool (rebuilt after fork: threads don't survive it)"""
+        if self._executor_pid != os.getpid():
+            self._executor = ThreadPoolExecutor(self.fetch_threads, thread_name_prefix="nurova-yt")
+            self._executor_pid = os.getpid()
+        self._executor.submit(self._fetch, *args)
+
+    def get(self, query, risk_level, timeout=None):
+        """Cached search results, or None if upstream is failing and nothing is cached.
+
+        With a timeout (seconds), a miss waits at most that long: if upstream
+        hasn't answered, return None and let the fetch complete in the
+        background so the result lands in the cache for later requests.
+        """
+        key = self.key(query, risk_level)
+        now = self.clock()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                items, stored_at, fetched_at = entry
+                age = now - stored_at
+                ttl = self.ttl if items is not None else self.error_ttl
+                if age < ttl:
+                    # Within ttl of the fetch, or of a failed refresh (error back-off)
+                    self._entries.move_to_end(key)
+                    self._counters["hits" if now - fetched_at < ttl else "stale_hits"] += 1
+                    return items
+                if items is not None and now - fetched_at < self.stale_ttl:
+                    # Stale-while-revalidate: answer now, refresh in the background
+                    self._entries.move_to_end(key)
+                    self._counters["stale_hits"] += 1
+                    if key not in self._flights:
+                        self._flights[key] = _Flight()
+                        self._submit(key, query, risk_level, self._flights[key])
+                    return items
+
+            self._counters["misses"] += 1
+            flight = self._flights.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._flights[key] = _Flight()
+                if timeout is not None:
+                    self._submit(key, query, risk_level, flight)
+            else:
+                self._counters["coalesced"] += 1
+
+        if leader and timeout is None:
+            self._fetch(key, query, risk_level, flight)
+        elif not flight.done.wait(timeout):
+            with self._lock:
+                self._counters["budget_timeouts"] += 1
+            return None
+        return flight.value
+
+    def _fetch(self, key, query, risk_level, flight):
+        t0 = time.perf_counter()
+        try:
+            items = self.backend.search(query, risk_level)
+            failed = False
+        except Exception:
+            items, failed = None, True
+        elapsed = time.perf_counter() - t0
+
+        with self._lock:
+            c = self._counters
+            c["upstream_calls"] += 1
+            c["upstream_errors"] += failed
+            c["upstream_seconds_total"] += elapsed
+            c["upstream_seconds_max"] = max(c["upstream_seconds_max"], elapsed)
+
+            now = self.clock()
+            previous = self._entries.get(key)
+            if items is None and previous is not None and previous[0] is not None \
+                    and now - previous[2] < self.stale_ttl:
+                # A failed refresh keeps serving the last good (stale) result, re-stamped
+                # so the next refresh waits error_ttl instead of hitting a failing upstream
+                # on every request; it still expires stale_ttl after it was fetched
+                self._entries[key] = (previous[0], now - self.ttl + self.error_ttl, previous[2])
+                flight.value = previous[0]
+            else:
+                self._entries[key] = (items, now, now)
+                self._entries.move_to_end(key)
+                flight.value = items
+                while len(self._entries) > self.maxsize:
+                    self._entries.popitem(last=False)
+                    c["evictions"] += 1
+            del self._flights[key]
+        flight.done.set()
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            c = dict(self._counters)
+            c["entries"] = len(self._entries)
+        lookups = c["hits"] + c["stale_hits"] + c["misses"]
+        c["hit_ratio"] = round((c["hits"] + c["stale_hits"]) / lookups, 4) if lookups else 0.0
+        c["upstream_seconds_avg"] = (
+            round(c["upstream_seconds_total"] / c["upstream_calls"], 6) if c["upstream_calls"] else 0.0
+        )
+        return c
@@ -43,6 +43,8 @@ class PredictionBloc extends Bloc<PredictionEvent, PredictionState> {
       final prediction = await ApiService.predictDistraction(e.features);
       _lastPrediction = prediction;
       emit(PredictionLoaded(prediction, personality: _lastPersonality));
+      // Back online: send anything logged while offline
+      ApiService.flushPendingSessions();
     } catch (err) {
       // Fallback to local calculation if API unavailable
       _lastPrediction = _localPredict(e.features);
@@ -53,7 +55,8 @@ class PredictionBloc extends Bloc<PredictionEvent, PredictionState> {
   Future<void> _onFetchPersonality(
       FetchPersonalityEvent e, Emitter<PredictionState> emit) async {
     try {
-      final personality = await ApiService.getPersonality(e.history);
+      final personality = await ApiService.getPersonality(
+          await ApiService.userId(), e.history);
       _lastPersonality = personality;
       if (_lastPrediction != null) {
         emit(PredictionLoaded(_lastPrediction!, personality: personality));
@@ -8,7 +8,11 @@ abstract class SessionEvent {}
 class StartSessionEvent extends SessionEvent {}
 class TickSessionEvent extends SessionEvent {}
 class UpdateMoodEvent extends SessionEvent { final int mood; UpdateMoodEvent(this.mood); }
-class EndSessionEvent extends SessionEvent {}
+class EndSessionEvent extends SessionEvent {
+  final double? riskProbability;
+  final String? personalityCluster;
+  EndSessionEvent({this.riskProbability, this.personalityCluster});
+}
 
 // States
 abstract class SessionState {}
@@ -49,9 +53,18 @@ class SessionBloc extends Bloc<SessionEvent, SessionState> {
     if (state is SessionRunning) emit(SessionRunning(_buildSession()));
   }
 
-  void _onEnd(EndSessionEvent e, Emitter<SessionState> emit) {
+  Future<void> _onEnd(EndSessionEvent e, Emitter<SessionState> emit) async {
+    if (state is! SessionRunning) return;
     _ticker?.cancel();
-    emit(SessionEnded(_buildSession()));
+    final session = _buildSession();
+    emit(SessionEnded(session));
+    // Queued locally by ApiService if the server can't be reached
+    await ApiService.logSession(await ApiService.userId(), {
+      ...session.toFeatures(),
+      if (e.riskProbability != null) 'risk_prob': e.riskProbability,
+      if (e.personalityCluster != null)
+        'personality_cluster': e.personalityCluster,
+    });
   }
 
   SessionModel _buildSession() {
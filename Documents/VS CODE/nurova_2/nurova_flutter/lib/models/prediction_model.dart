@@ -96,7 +96,11 @@ class ContentModel {
       thumbnail: json['thumbnail'] as String? ?? '',
       score: (json['score'] as num).toDouble(),
       channel: json['channel'] as String? ?? '',
-      duration: json['duration'] as String? ?? '~10 min',
+      // Compact (MessagePack) items send only duration_mins for "<n> min"
+      duration: json['duration'] as String? ??
+          (json['duration_mins'] != null
+              ? '${json['duration_mins']} min'
+              : '~10 min'),
     );
   }
 }
@@ -19,13 +19,15 @@ class HomeScreen extends StatefulWidget {
   State<HomeScreen> createState() => _HomeScreenState();
 }
 
-class _HomeScreenState extends State<HomeScreen> with TickerProviderStateMixin {
+class _HomeScreenState extends State<HomeScreen>
+    with TickerProviderStateMixin, WidgetsBindingObserver {
   late AnimationController _pulseController;
   double _lastRisk = 0.45;
 
   @override
   void initState() {
     super.initState();
+    WidgetsBinding.instance.addObserver(this);
     _pulseController = AnimationController(
       vsync: this,
       duration: const Duration(seconds: 2),
@@ -55,8 +57,27 @@ class _HomeScreenState extends State<HomeScreen> with TickerProviderStateMixin {
     }
   }
 
+  // A session is one stretch in the foreground: it is logged when the app
+  // is backgrounded and a new one starts when it comes back
+  @override
+  void didChangeAppLifecycleState(AppLifecycleState lifecycle) {
+    final sessions = context.read<SessionBloc>();
+    if (lifecycle == AppLifecycleState.paused) {
+      final prediction = context.read<PredictionBloc>().state;
+      sessions.add(prediction is PredictionLoaded
+          ? EndSessionEvent(
+              riskProbability: prediction.prediction.riskProbability,
+              personalityCluster: prediction.personality?.cluster)
+          : EndSessionEvent());
+    } else if (lifecycle == AppLifecycleState.resumed &&
+        sessions.state is SessionEnded) {
+      sessions.add(StartSessionEvent());
+    }
+  }
+
   @override
   void dispose() {
+    WidgetsBinding.instance.removeObserver(this);
     _pulseController.dispose();
     super.dispose();
   }
@@ -1,6 +1,8 @@
 import 'dart:convert';
 import 'package:http/http.dart' as http;
+import 'package:msgpack_dart/msgpack_dart.dart' as msgpack;
 import 'package:shared_preferences/shared_preferences.dart';
+import 'package:uuid/uuid.dart';
 import '../models/prediction_model.dart';
 
 class ApiService {
@@ -18,6 +20,21 @@ class ApiService {
     await prefs.setString('api_base_url', url);
   }
 
+  static String? _userId;
+
+  /// Anonymous id for this install, generated once and kept in preferences.
+  /// Sessions are logged under it so the server can keep per-user stats.
+  static Future<String> userId() async {
+    if (_userId != null) return _userId!;
+    final prefs = await SharedPreferences.getInstance();
+    _userId = prefs.getString('user_id');
+    if (_userId == null) {
+      _userId = const Uuid().v4();
+      await prefs.setString('user_id', _userId!);
+    }
+    return _userId!;
+  }
+
   static Future<PredictionModel> predictDistraction(
       Map<String, dynamic> features) async {
     final response = await http
@@ -34,13 +51,15 @@ class ApiService {
     throw Exception('Prediction failed: ${response.statusCode}');
   }
 
+  /// The server classifies from the sessions it has already logged for
+  /// [userId]; [history] only fills in features it has nothing stored for.
   static Future<PersonalityModel> getPersonality(
-      List<Map<String, dynamic>> history) async {
+      String userId, List<Map<String, dynamic>> history) async {
     final response = await http
         .post(
           Uri.parse('$_baseUrl/get_personality'),
           headers: {'Content-Type': 'application/json'},
-          body: jsonEncode({'usage_history': history}),
+          body: jsonEncode({'user_id': userId, 'usage_history': history}),
         )
         .timeout(const Duration(seconds: 10));
 
@@ -50,6 +69,23 @@ class ApiService {
     throw Exception('Personality failed: ${response.statusCode}');
   }
 
+  /// Server-maintained risk trend for [userId] (EWMA, slope per hour and a
+  /// "warning" flag), or null if nothing has been logged for that user yet.
+  static Future<Map<String, dynamic>?> getRiskTrend(String userId) async {
+    final response = await http
+        .get(Uri.parse('$_baseUrl/risk_trend')
+            .replace(queryParameters: {'user_id': userId}))
+        .timeout(const Duration(seconds: 10));
+    if (response.statusCode == 200) {
+      return jsonDecode(response.body) as Map<String, dynamic>;
+    }
+    if (response.statusCode == 404) return null;
+    throw Exception('Risk trend failed: ${response.statusCode}');
+  }
+
+  // Last recommendations per URL with their ETag, revalidated via If-None-Match
+  static final Map<String, MapEntry<String, List<ContentModel>>> _recommendationCache = {};
+
   static Future<List<ContentModel>> getRecommendations({
     required String query,
     required String riskLevel,
@@ -60,27 +96,143 @@ class ApiService {
       'risk_level': riskLevel,
       'cluster': cluster,
     });
+    final cached = _recommendationCache[uri.toString()];
 
-    final response = await http.get(uri).timeout(const Duration(seconds: 10));
+    // MessagePack with compact items; JSON from servers that don't offer it
+    final headers = {'Accept': 'application/msgpack, application/json;q=0.9'};
+    if (cached != null) headers['If-None-Match'] = cached.key;
+    final response = await http
+        .get(uri, headers: headers)
+        .timeout(const Duration(seconds: 10));
 
+    if (response.statusCode == 304 && cached != null) {
+      return cached.value;
+    }
     if (response.statusCode == 200) {
-      final List data = jsonDecode(response.body);
-      return data.map((e) => ContentModel.fromJson(e)).toList();
+      final List data = _decodeBody(response);
+      final items = data
+          .map((e) => ContentModel.fromJson(Map<String, dynamic>.from(e)))
+          .toList();
+      final etag = response.headers['etag'];
+      if (etag != null) {
+        _recommendationCache[uri.toString()] = MapEntry(etag, items);
+      }
+      return items;
     }
     throw Exception('Recommendations failed');
   }
 
-  static Future<void> logSession(Map<String, dynamic> sessionData) async {
+  /// JSON or MessagePack body, whichever the server negotiated
+  static dynamic _decodeBody(http.Response response) {
+    final type = response.headers['content-type'] ?? '';
+    if (type.startsWith('application/msgpack')) {
+      return msgpack.deserialize(response.bodyBytes);
+    }
+    return jsonDecode(response.body);
+  }
+
+  static const _pendingSessionsKey = 'pending_sessions';
+  static bool _flushing = false;
+
+  static Future<void> logSession(
+      String userId, Map<String, dynamic> sessionData) async {
+    final session = {
+      'created_at': DateTime.now().toUtc().toIso8601String(),
+      'user_id': userId,
+      ...sessionData,
+    };
     try {
-      await http
+      final response = await http
           .post(
             Uri.parse('$_baseUrl/log_session'),
             headers: {'Content-Type': 'application/json'},
-            body: jsonEncode(sessionData),
+            body: jsonEncode(session),
           )
           .timeout(const Duration(seconds: 5));
+      if (response.statusCode == 200) return;
     } catch (_) {
-      // Silently fail - offline-first
+      // Offline-first: fall through and keep it for the next upload
     }
+    final prefs = await SharedPreferences.getInstance();
+    final pending = prefs.getStringList(_pendingSessionsKey) ?? [];
+    await prefs.setStringList(
+        _pendingSessionsKey, [...pending, jsonEncode(session)]);
+  }
+
+  /// Uploads sessions in one request as NDJSON; returns the server's
+  /// {accepted, rejected, errors} summary. Throws [UploadException] with
+  /// the status code if the server answers anything but 200.
+  static Future<Map<String, dynamic>> uploadSessions(
+      List<Map<String, dynamic>> sessions) async {
+    final response = await http
+        .post(
+          Uri.parse('$_baseUrl/log_session/bulk'),
+          headers: {'Content-Type': 'application/x-ndjson'},
+          body: sessions.map(jsonEncode).join('\n'),
+        )
+        .timeout(const Duration(seconds: 30));
+    if (response.statusCode == 200) {
+      return jsonDecode(response.body) as Map<String, dynamic>;
+    }
+    throw UploadException(response.statusCode);
   }
+
+  // Sessions per upload: one server-side chunk, so each batch is committed
+  // all-or-nothing, and far below the server's BULK_MAX_ROWS (100000)
+  static const _uploadBatchSize = 1000;
+  static const _deadSessionsKey = 'pending_sessions_dead';
+  static const _maxDeadSessions = 5000;
+
+  /// Sends sessions queued while offline, oldest first, in batches of
+  /// [_uploadBatchSize]. Rows the server rejects as invalid are dropped, and
+  /// a batch it refuses outright (4xx) is moved to [_deadSessionsKey], since
+  /// resending either would fail the same way. Network errors and 5xx keep
+  /// the rest queued for the next flush.
+  static Future<void> flushPendingSessions() async {
+    final prefs = await SharedPreferences.getInstance();
+    if (_flushing) return;
+    _flushing = true;
+    try {
+      while (true) {
+        final pending = prefs.getStringList(_pendingSessionsKey) ?? [];
+        if (pending.isEmpty) return;
+        final batch = pending.take(_uploadBatchSize).toList();
+        try {
+          await uploadSessions(batch
+              .map((s) => jsonDecode(s) as Map<String, dynamic>)
+              .toList());
+        } on UploadException catch (e) {
+          if (!e.isPermanent) return;
+          final dead = prefs.getStringList(_deadSessionsKey) ?? [];
+          final kept = [...dead, ...batch];
+          final overflow = kept.length - _maxDeadSessions;
+          await prefs.setStringList(_deadSessionsKey,
+              overflow > 0 ? kept.sublist(overflow) : kept);
+        }
+        // Keep anything logged while the upload was in flight
+        final latest = prefs.getStringList(_pendingSessionsKey) ?? [];
+        await prefs.setStringList(
+            _pendingSessionsKey, latest.skip(batch.length).toList());
+      }
+    } catch (_) {
+      // Still offline; try again later
+    } finally {
+      _flushing = false;
+    }
+  }
+}
+
+/// Non-200 answer from the API
+class UploadException implements Exception {
+  final int statusCode;
+  UploadException(this.statusCode);
+
+  /// The server refused the request itself; retrying won't help.
+  /// 408 / 429 are only "not now".
+  bool get isPermanent =>
+      statusCode >= 400 && statusCode < 500 &&
+      statusCode != 408 && statusCode != 429;
+
+  @override
+  String toString() => 'Bulk upload failed: $statusCode';
 }